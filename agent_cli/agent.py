@@ -1,134 +1,359 @@
 import argparse
 import json
 import re
-import requests
-from typing import List, Dict
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import asdict
+from typing import Callable, ContextManager, List, Dict, Optional
 
-import boto3
 from .config import settings
 from .glue_catalog import get_tables_and_columns
+from .column_stats import TableStats, load_stats, render_table_stats
+from .catalog_watch import watch_catalog, tables_version
+from .llm import GenerationMetrics, get_backend
+from .executor import get_executor
+from .llm_cache import cache_key, get_llm_cache, is_cacheable
+from .candidates import select_candidate
+from .fewshot import record_success, select_examples
+from .schema_linking import link_schema
+from .semantic_cache import get_semantic_cache
+from .sql_lexer import statement_end
+from .tokens import PromptBuild, Section, estimate_tokens, fit_sections
+from .sql_utils import ensure_limit, quote_table_names, referenced_tables
+from .repair import check_and_execute, classify_error, retry_feedback
 from .prompts import SYSTEM, FEWSHOTS
 
 # --- Helpers ---
+_BARE_IDENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_THINK = re.compile(r"<think>.*?</think>", re.DOTALL | re.IGNORECASE)
+_SQL_KEYWORD = re.compile(r"\b(select|with|create|describe|show)\b", re.IGNORECASE)
+_FENCE_LANG = re.compile(r"^\s*sql", re.IGNORECASE)
+
 def _quote_if_needed(name: str) -> str:
-    if re.match(r"^[A-Za-z_][A-Za-z0-9_]*$", name):
+    if _BARE_IDENT.match(name):
         return name
     return f'"{name}"'
 
 def auto_quote_numeric_table_names(sql: str, table_names: List[str]) -> str:
-    patched = sql
-    for t in table_names:
-        if not re.match(r"^[A-Za-z_][A-Za-z0-9_]*$", t):
-            patched = re.sub(rf'(?<!")\b{re.escape(t)}\b(?!")', f'"{t}"', patched)
-    return patched
+    return quote_table_names(sql, table_names)
 
 def clean_llm_output(text: str) -> str:
     """Strip <think> blocks, fences, and return the first SQL statement."""
-    text = re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL | re.IGNORECASE).strip()
+    text = _THINK.sub("", text).strip()
     if "```" in text:
         parts = text.split("```")
         for p in parts:
-            if re.search(r"\b(select|with|create|describe|show)\b", p, flags=re.IGNORECASE):
-                return re.sub(r"^\s*sql", "", p.strip(), flags=re.IGNORECASE)
-    m = re.search(r"(?is)\b(select|with|create|describe|show)\b.*?;", text)
+            if _SQL_KEYWORD.search(p):
+                return _FENCE_LANG.sub("", p.strip())
+    m = _SQL_KEYWORD.search(text)
     if m:
-        return m.group(0).strip()
+        end = statement_end(text, m.start())  # a ';' inside a literal or comment doesn't end it
+        if end is not None:
+            return text[m.start():end].strip()
     return text
 
+def prepare_sql(reply: str, table_names: List[str]) -> str:
+    """LLM reply -> statement to run: first statement, quoted table names, row cap."""
+    sql = auto_quote_numeric_table_names(clean_llm_output(reply), table_names)
+    return ensure_limit(sql, settings.sql_row_limit) if settings.sql_row_limit else sql
+
 # --- Tool: run SQL via Chunk 2 API ---
 def run_sql_via_api(sql: str, database: str) -> Dict:
-    if not settings.query_api_base:
-        return {"error": "QUERY_API_BASE not set in .env"}
-    url = f"{settings.query_api_base}/sql"
-    try:
-        r = requests.post(url, json={"query": sql, "database": database}, timeout=120)
-    except Exception as e:
-        return {"error": f"HTTP error: {e}"}
-    if r.status_code != 200:
-        return {"error": r.text}
-    return r.json()
-
-# --- Bedrock LLM call ---
-bedrock = boto3.client("bedrock-runtime", region_name=settings.aws_region)
-
-def ask_bedrock(prompt: str) -> str:
-    response = bedrock.invoke_model(
-        modelId="meta.llama3-8b-instruct-v1:0",
-        body=json.dumps({
-            "prompt": prompt,
-            "max_gen_len": 500,
-            "temperature": 0.1,
-            "top_p": 0.9
-        })
-    )
-    body = json.loads(response["body"].read())
-    return body["generation"]
+    """Execute through the configured executor (SQL_EXECUTOR: Query API over HTTP, or in-process)."""
+    return get_executor().run(sql, database)
+
+# --- LLM call ---
+GENERATION_PARAMS = {"max_tokens": settings.llm_max_tokens, "temperature": settings.llm_temperature,
+                     "top_p": settings.llm_top_p}
+
+_metrics = threading.local()
+
+def last_generation_metrics() -> Optional[GenerationMetrics]:
+    """Metrics of the most recent ask_llm call on this thread."""
+    return getattr(_metrics, "last", None)
+
+def _generation_params(temperature: float | None) -> Dict:
+    params = dict(GENERATION_PARAMS)
+    if temperature is not None:
+        params["temperature"] = temperature
+    return params
+
+def ask_llm(prompt: str, temperature: float | None = None, use_cache: bool = True) -> str:
+    backend = get_backend()
+    params = _generation_params(temperature)
+
+    cache = get_llm_cache() if use_cache and settings.llm_cache_enabled and is_cacheable(params) else None
+    key = cache_key(backend.model_id, params, prompt) if cache else None
+    if cache:
+        hit = cache.get(key)
+        if hit is not None:
+            _metrics.last = GenerationMetrics(total_ms=0.0, cached=True)
+            return hit
 
+    generation, metrics = backend.generate(prompt, params, stream=settings.llm_streaming)
+    _metrics.last = metrics
+    if cache:
+        cache.put(key, generation, referenced_tables(clean_llm_output(generation)))
+    return generation
+
+ask_bedrock = ask_llm  # original name, kept for existing callers
+
+def forget_llm(prompt: str, temperature: float | None = None) -> None:
+    """Drop the cached completion for this prompt, if any: its SQL failed validation or execution."""
+    params = _generation_params(temperature)
+    if settings.llm_cache_enabled and is_cacheable(params):
+        get_llm_cache().discard(cache_key(get_backend().model_id, params, prompt))
 
 
 # --- Build schema string ---
-def schema_string(tables: List[Dict]) -> str:
-    return "\n".join(
-        f'- {_quote_if_needed(t["table"])}(columns={t["columns"]}, partitions={t["partitions"]})'
-        for t in tables
-    )
+def schema_string(tables: List[Dict], stats: Dict[str, TableStats] | None = None) -> str:
+    lines = []
+    for t in tables:
+        lines.append(f'- {_quote_if_needed(t["table"])}(columns={t["columns"]}, partitions={t["partitions"]})')
+        if stats and t["table"] in stats:
+            lines.append(f'  stats: {render_table_stats(stats[t["table"]], t["columns"] + t["partitions"])}')
+    return "\n".join(lines)
+
+# --- Prompt ---
+def assemble_prompt(schema_info: str, question: str, examples: str, feedback: Optional[str] = None,
+                    budget: Optional[int] = None) -> PromptBuild:
+    """Build the prompt under PROMPT_TOKEN_BUDGET.
+
+    When it doesn't fit, few-shot examples go first (least similar first), then the
+    retry feedback, then trailing schema tables; the instructions, the question and
+    at least one table always stay. Schema linking and few-shot retrieval have their
+    own budgets, so this is the hard cap behind them.
+    """
+    t0 = time.perf_counter()
+    built = fit_sections([
+        Section("system", SYSTEM, priority=0, suffix="\n\n", required=True),
+        Section("examples", examples or "", priority=3, prefix="Here are some examples:\n", suffix="\n\n", split="\n\n"),
+        Section("schema", schema_info, priority=1, prefix="Schema:\n", suffix="\n\n", split="\n- ", required=True),
+        Section("feedback", feedback or "", priority=2, suffix="\n\n"),
+        Section("question", question, priority=0, prefix="Q: ", suffix="\nSQL:", required=True),
+    ], budget or settings.prompt_token_budget)
+    built.build_ms = (time.perf_counter() - t0) * 1000
+    return built
+
+def build_prompt(schema_info: str, question: str, examples: str, feedback: Optional[str] = None) -> str:
+    return assemble_prompt(schema_info, question, examples, feedback).text
+
+_prompt_log_lock = threading.Lock()
+
+def log_attempt(entry: Dict) -> None:
+    """Append one structured attempt record to PROMPT_LOG (JSONL), if set."""
+    if not settings.prompt_log:
+        return
+    line = json.dumps(entry, default=str)
+    with _prompt_log_lock, open(settings.prompt_log, "a") as f:
+        f.write(line + "\n")
 
 # --- Main agent ---
-def run_langchain_agent(question: str, database: str, max_retries: int = 3) -> None:
-    tables = get_tables_and_columns(database)
+def _format_metrics(m: GenerationMetrics) -> str:
+    if m.cached:
+        return "cache hit"
+    fmt = lambda v: f"{v:.0f} ms" if v is not None else "-"
+    note = " (stopped at end of SQL)" if m.early_stop else ""
+    return f"ttft {fmt(m.ttft_ms)} | sql {fmt(m.sql_ms)} | total {fmt(m.total_ms)}{note}"
+
+def _print_result(result: Dict) -> None:
+    print("\n-- Execution result --")
+    print("rows:", result.get("row_count"), "| bytes_scanned:", result.get("bytes_scanned"))
+    for row in result.get("rows", [])[:5]:
+        print(row)
+    loc = result.get("result_location")
+    if result.get("truncated") and loc:
+        print(f"full result ({loc['format']}): {loc['uri']}\n  {loc['url']}")
+    elif result.get("truncated"):
+        print(f"showing the first {len(result.get('rows', []))} rows (no link to the full result)")
+
+def answer_question(question: str, database: str, tables: List[Dict] | None = None,
+                    stats: Dict[str, TableStats] | None = None, max_retries: int = 3,
+                    candidates: int | None = None, log: Callable[[str], None] | None = print,
+                    llm_gate: ContextManager | None = None, athena_gate: ContextManager | None = None,
+                    render: Callable[[List[Dict]], str] | None = None) -> Dict:
+    """Question -> SQL -> result. Returns a JSON-serialisable record; never prints unless `log` does.
+
+    `tables`/`stats` let callers reuse one catalog load across questions, and `render`
+    (tables -> schema text) a memoized schema_string. `llm_gate` and `athena_gate`
+    (e.g. semaphores) bound concurrent model calls and query executions.
+    """
+    log = log or (lambda msg: None)
+    llm_gate = llm_gate or nullcontext()
+    athena_gate = athena_gate or nullcontext()
+    t_start = time.perf_counter()
+    record = {"question": question, "database": database, "ok": False, "sql": None, "result": None,
+              "error": None, "errors": [], "attempts": 0, "semantic_cache": False,
+              "llm_calls": 0, "llm_ms": 0.0, "athena_calls": 0, "athena_ms": 0.0, "attempt_log": []}
+    lock = threading.Lock()
+
+    def timed(kind: str, gate: ContextManager, fn: Callable, *args, **kwargs):
+        with gate:
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with lock:
+                    record[f"{kind}_calls"] += 1
+                    record[f"{kind}_ms"] += (time.perf_counter() - t0) * 1000
+
+    def execute(q: str) -> Dict:
+        return timed("athena", athena_gate, run_sql_via_api, q, database)
+
+    def finish(**fields) -> Dict:
+        record.update(fields)
+        record["total_ms"] = (time.perf_counter() - t_start) * 1000
+        return record
+
+    tables = tables if tables is not None else get_tables_and_columns(database)
     if not tables:
-        print(f"No tables found in Glue database '{database}'.")
-        return
+        return finish(error=f"No tables found in Glue database '{database}'.")
+
+    version = tables_version(tables)
+    watch_catalog(database, version)
+    cache = get_semantic_cache() if settings.semantic_cache_enabled else None
+    if cache is not None:
+        hit = cache.lookup(question, database, version)
+        if hit:
+            log(f"[semantic cache] hit {hit.score:.2f}: {hit.entry.question!r}")
+            log(f"[Cached SQL]: {hit.entry.sql}")
+            result = execute(hit.entry.sql)
+            if "error" not in result:
+                return finish(ok=True, sql=hit.entry.sql, result=result, semantic_cache=True)
+            cache.evict(hit.entry.question, database, version)  # no longer valid; regenerate
+
+    stats = stats if stats is not None else load_stats(database)
+    render = render or (lambda ts: schema_string(ts, stats))
+    if settings.schema_linking:
+        linked = link_schema(question, tables, render=render)
+        schema_info = linked.rendered
+        log(f"[schema] {linked.summary()}")
+    else:
+        schema_info = render(tables)
 
-    schema_info = schema_string(tables)
+    examples = select_examples(question, database, [t["table"] for t in tables]) if settings.fewshot_retrieval else FEWSHOTS
 
-    template = (
-        SYSTEM + "\n\n"
-        "Here are some examples:\n"
-        f"{FEWSHOTS}\n\n"
-        f"Schema:\n{schema_info}\n\n"
-        "Q: {question}\n"
-        "SQL:"
-    )
-    prompt = ChatPromptTemplate.from_template(template)
+    table_names = [t["table"] for t in tables]
+    candidates = candidates or settings.candidates
 
+    feedback = None
     last_error = None
     for attempt in range(1, max_retries + 1):
-        print(f"\n=== Attempt {attempt} ===")
-        messages = prompt.format_messages(question=question)
-        raw_prompt = messages[0].content + "\n" + messages[1].content  # flatten for Bedrock
-        raw_reply = ask_bedrock(raw_prompt)
-        sql = clean_llm_output(raw_reply)
-        sql = auto_quote_numeric_table_names(sql, [t["table"] for t in tables])
-
-        print(f"[Raw LLM reply]: {raw_reply}")
-        print(f"[Cleaned SQL]: {sql}")
-
-        result = run_sql_via_api(sql, database)
-        if "error" in result:
-            print("\n[exec error]", result["error"])
-            last_error = result["error"]
-            question = f"{question}\nFix the SQL based on this error: {last_error}"
+        record["attempts"] = attempt
+        log(f"\n=== Attempt {attempt} ===")
+        built = assemble_prompt(schema_info, question, examples, feedback)
+        prompt = built.text
+        entry = {"question": question, "database": database, "attempt": attempt,
+                 "prompt_tokens": built.total_tokens, "budget": built.budget, "sections": built.tokens,
+                 "dropped": built.dropped, "trimmed": built.trimmed, "build_ms": round(built.build_ms, 2)}
+        log(f"[prompt] {built.total_tokens}/{built.budget} tokens ("
+            + ", ".join(f"{k} {v}" for k, v in built.tokens.items() if v)
+            + (f"; dropped {', '.join(built.dropped)}" if built.dropped else "")
+            + (f"; trimmed {built.trimmed}" if built.trimmed else "") + f") built in {built.build_ms:.2f} ms")
+        errors = None
+        t_gen = time.perf_counter()
+        if candidates > 1:
+            run = select_candidate(
+                candidates,
+                generate=lambda temp: prepare_sql(timed("llm", llm_gate, ask_llm, prompt, temperature=temp), table_names),
+                explain=execute,
+                tables=tables,
+                stats=stats,
+            )
+            entry.update(generation_ms=round((time.perf_counter() - t_gen) * 1000, 1), completion_tokens=None)
+            log(f"[candidates] {run.summary()}")
+            for c in run.candidates:
+                log(f"  T={c.temperature}: {c.error or c.sql}")
+                if c.error:
+                    forget_llm(prompt, c.temperature)
+            if run.chosen is None:
+                failed = next((c for c in run.candidates if c.sql), None)
+                if failed is None:
+                    last_error = "; ".join(sorted({c.error for c in run.candidates if c.error}))
+                    entry["error"] = last_error
+                    record["attempt_log"].append(entry)
+                    log_attempt(entry)
+                    continue
+                # Repair the coolest failed candidate before asking the model again.
+                sql, errors = failed.sql, [classify_error(failed.error)]
+                temperature = failed.temperature
+            else:
+                sql, temperature = run.chosen.sql, run.chosen.temperature
+        else:
+            raw_reply = timed("llm", llm_gate, ask_llm, prompt)
+            sql, temperature = prepare_sql(raw_reply, table_names), None
+
+            m = last_generation_metrics()
+            entry.update(generation_ms=round((time.perf_counter() - t_gen) * 1000, 1),
+                         completion_tokens=estimate_tokens(raw_reply), cached=bool(m and m.cached))
+            if m:
+                log(f"[llm] {_format_metrics(m)}")
+            log(f"[Raw LLM reply]: {raw_reply}")
+        log(f"[Cleaned SQL]: {sql}")
+
+        generated = sql
+        sql, result, errors = check_and_execute(sql, tables, execute, errors=errors, log=log)
+        if errors or sql != generated:  # the completion itself failed; don't replay it
+            forget_llm(prompt, temperature)
+        entry["error"] = "; ".join(e.compact() for e in errors) if errors else None
+        record["attempt_log"].append(entry)
+        log_attempt(entry)
+        if errors:
+            last_error = "; ".join(e.compact() for e in errors)
+            record["errors"] = [asdict(e) for e in errors]
+            feedback = retry_feedback(sql, errors)
+            record["sql"] = sql
             continue
 
-        print("\n-- Execution result --")
-        print("rows:", result.get("row_count"), "| bytes_scanned:", result.get("bytes_scanned"))
-        for row in result.get("rows", [])[:5]:
-            print(row)
-        return
+        if cache is not None:
+            cache.insert(question, sql, database, version)
+        record_success(question, sql, database)
+        return finish(ok=True, sql=sql, result=result, errors=[])
 
+    return finish(error=last_error or f"Could not produce a working query after {max_retries} attempts.")
+
+def run_langchain_agent(question: str, database: str, max_retries: int = 3, candidates: int | None = None) -> None:
+    record = answer_question(question, database, max_retries=max_retries, candidates=candidates)
+    if record["ok"]:
+        _print_result(record["result"])
+        return
+    if record["attempts"] == 0:
+        print(record["error"])
+        return
     print("\n❌ Could not produce a working query after", max_retries, "attempts.")
-    if last_error:
-        print("Last error:", last_error)
+    print("Last error:", record["error"])
 
 # --- Entry point ---
 def main():
     ap = argparse.ArgumentParser(description="Bedrock Athena Copilot")
     ap.add_argument("--db", default=settings.glue_database)
-    ap.add_argument("--question", required=True)
+    group = ap.add_mutually_exclusive_group(required=True)
+    group.add_argument("--question")
+    group.add_argument("--questions-file", help="JSONL of questions ('-' for stdin); results are written as JSONL")
     ap.add_argument("--max-retries", type=int, default=5)
+    ap.add_argument("--candidates", type=int, default=settings.candidates,
+                    help="generate N candidates in parallel and execute the cheapest valid one")
+    ap.add_argument("--output", default="-", help="batch results file (default stdout)")
+    ap.add_argument("--llm-concurrency", type=int, default=settings.batch_llm_concurrency)
+    ap.add_argument("--athena-concurrency", type=int, default=settings.batch_athena_concurrency)
     args = ap.parse_args()
-    run_langchain_agent(args.question, args.db, max_retries=args.max_retries)
+    if args.question:
+        run_langchain_agent(args.question, args.db, max_retries=args.max_retries, candidates=args.candidates)
+        return
+
+    from .batch import format_summary, read_questions, run_batch
+    items = read_questions(args.questions_file)
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        summary = run_batch(items, out, database=args.db, max_retries=args.max_retries, candidates=args.candidates,
+                            llm_concurrency=args.llm_concurrency, athena_concurrency=args.athena_concurrency)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    # Keep stdout pure JSONL when results go there.
+    print(format_summary(summary), file=sys.stderr if out is sys.stdout else sys.stdout)
 
 if __name__ == "__main__":
     main()
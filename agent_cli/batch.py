@@ -0,0 +1,126 @@
+"""Batch mode: many questions, one process, one catalog load.
+
+    python -m agent_cli.agent --questions-file questions.jsonl --output results.jsonl \
+        --llm-concurrency 4 --athena-concurrency 8
+
+Input lines are {"question": ..., "db": ..., "id": ...} objects (db and id
+optional) or bare JSON strings. Questions run on a worker pool; model calls and
+Athena executions are bounded by separate semaphores, so a slow warehouse
+doesn't hold LLM slots and vice versa. Each result is written as one JSON line
+as soon as it finishes (completion order; `index` is the input line), followed
+by a throughput/latency summary.
+"""
+import json
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, TextIO
+
+from .agent import answer_question
+from .column_stats import load_stats
+from .config import settings
+from .glue_catalog import get_tables_and_columns
+
+def read_questions(path: str) -> List[Dict]:
+    out = []
+    with (sys.stdin if path == "-" else open(path)) as f:
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {"question": item}
+            if not item.get("question"):
+                raise ValueError(f"{path}:{n}: missing 'question'")
+            out.append(item)
+    return out
+
+def failed_record(question: str, database: str, error: str) -> Dict:
+    """Record for a question that never reached answer_question's own bookkeeping."""
+    return {"question": question, "database": database, "ok": False, "error": error, "errors": [], "sql": None,
+            "result": None, "attempts": 0, "semantic_cache": False, "llm_calls": 0, "llm_ms": 0.0, "athena_calls": 0,
+            "athena_ms": 0.0, "attempt_log": [], "total_ms": 0.0}
+
+def summarize(records: List[Dict], wall_s: float) -> Dict:
+    lat = [r["total_ms"] for r in records] or [0.0]
+    # 99 cut points; "inclusive" interpolates like numpy.percentile's default
+    cuts = statistics.quantiles(lat, n=100, method="inclusive") if len(lat) > 1 else lat * 99
+    ok = sum(r["ok"] for r in records)
+    prompt_tokens = [a["prompt_tokens"] for r in records for a in r.get("attempt_log", [])]
+    return {
+        "questions": len(records),
+        "ok": ok,
+        "failed": len(records) - ok,
+        "semantic_cache_hits": sum(r["semantic_cache"] for r in records),
+        "wall_s": round(wall_s, 2),
+        "questions_per_s": round(len(records) / wall_s, 2) if wall_s else None,
+        "latency_ms": {q: round(cuts[q - 1], 1) for q in (50, 90, 95, 99)} | {"max": round(max(lat), 1)},
+        "llm_calls": sum(r["llm_calls"] for r in records),
+        "llm_ms_mean": round(sum(r["llm_ms"] for r in records) / max(len(records), 1), 1),
+        "athena_calls": sum(r["athena_calls"] for r in records),
+        "athena_ms_mean": round(sum(r["athena_ms"] for r in records) / max(len(records), 1), 1),
+        "attempts_mean": round(sum(r["attempts"] for r in records) / max(len(records), 1), 2),
+        "prompt_tokens_mean": round(statistics.fmean(prompt_tokens), 1) if prompt_tokens else None,
+        "prompt_tokens_max": max(prompt_tokens, default=None),
+    }
+
+def run_batch(items: Iterable[Dict], out: TextIO, database: Optional[str] = None, max_retries: int = 3,
+              candidates: Optional[int] = None, llm_concurrency: Optional[int] = None,
+              athena_concurrency: Optional[int] = None, workers: Optional[int] = None) -> Dict:
+    """Answer every item, streaming JSONL records to `out`; returns the summary."""
+    items = list(items)
+    database = database or settings.glue_database
+    llm_concurrency = llm_concurrency or settings.batch_llm_concurrency
+    athena_concurrency = athena_concurrency or settings.batch_athena_concurrency
+    llm_gate = threading.BoundedSemaphore(llm_concurrency)
+    athena_gate = threading.BoundedSemaphore(athena_concurrency)
+    # Enough workers to keep both stages busy: one stage's slots fill while the other's drain.
+    workers = workers or llm_concurrency + athena_concurrency
+
+    catalogs: Dict[str, tuple] = {}
+    catalog_errors: Dict[str, str] = {}
+    for db in {item.get("db") or database for item in items}:
+        try:
+            catalogs[db] = (get_tables_and_columns(db), load_stats(db))
+        except Exception as e:  # fail that database's questions, not the batch
+            catalog_errors[db] = f"catalog load failed: {type(e).__name__}: {e}"
+
+    write_lock = threading.Lock()
+    records: List[Dict] = []
+
+    def one(index: int, item: Dict) -> Dict:
+        db = item.get("db") or database
+        if db in catalog_errors:
+            record = failed_record(item["question"], db, catalog_errors[db])
+        else:
+            tables, stats = catalogs[db]
+            try:
+                record = answer_question(item["question"], db, tables=tables, stats=stats, max_retries=max_retries,
+                                         candidates=candidates, log=None, llm_gate=llm_gate, athena_gate=athena_gate)
+            except Exception as e:  # one bad question must not sink the batch
+                record = failed_record(item["question"], db, f"{type(e).__name__}: {e}")
+        record = {"index": index, **({"id": item["id"]} if "id" in item else {}), **record}
+        with write_lock:
+            out.write(json.dumps(record, default=str) + "\n")
+            out.flush()
+            records.append(record)
+        return record
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for f in as_completed([pool.submit(one, i, item) for i, item in enumerate(items)]):
+            f.result()
+    return summarize(records, time.perf_counter() - t0)
+
+def format_summary(s: Dict) -> str:
+    lat = s["latency_ms"]
+    return (f"{s['questions']} questions: {s['ok']} ok, {s['failed']} failed, {s['semantic_cache_hits']} semantic cache hits\n"
+            f"wall {s['wall_s']} s, {s['questions_per_s']} questions/s\n"
+            f"latency p50 {lat[50]} ms, p95 {lat[95]} ms, p99 {lat[99]} ms, max {lat['max']} ms\n"
+            f"llm {s['llm_calls']} calls ({s['llm_ms_mean']} ms/question), "
+            f"athena {s['athena_calls']} calls ({s['athena_ms_mean']} ms/question), "
+            f"{s['attempts_mean']} attempts/question\n"
+            f"prompt tokens mean {s['prompt_tokens_mean']}, max {s['prompt_tokens_max']}")
@@ -0,0 +1,166 @@
+"""Parallel multi-candidate SQL generation with cheapest-valid selection.
+
+N candidates are generated concurrently at different temperatures, checked
+locally against the cached catalog (sql_validator), then validated with Athena EXPLAIN (TYPE IO, FORMAT JSON) in parallel.
+The valid candidate with the smallest estimated input size is the only one
+executed. When EXPLAIN has no estimate (tables without statistics report NaN),
+the cost falls back to column statistics, then to candidate order (coolest
+temperature first).
+"""
+import json
+import math
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from .column_stats import TableStats
+from .config import settings
+from .sql_utils import fingerprint, referenced_tables
+from .sql_validator import validate_sql
+
+DEFAULT_TEMPERATURES = [0.0, 0.4, 0.7, 0.9, 1.0]  # the greedy one matches single-candidate runs
+_IDENT = re.compile(r'"([^"]+)"|\b([A-Za-z_][A-Za-z0-9_]*)\b')
+
+@dataclass
+class Candidate:
+    temperature: float
+    sql: str = ""
+    error: Optional[str] = None
+    cost: float = math.inf  # estimated bytes read
+    cost_source: str = ""  # "explain" | "stats" | ""
+    gen_ms: float = 0.0
+    explain_ms: float = 0.0
+
+    @property
+    def valid(self) -> bool:
+        return bool(self.sql) and self.error is None
+
+@dataclass
+class CandidateRun:
+    candidates: List[Candidate] = field(default_factory=list)
+    chosen: Optional[Candidate] = None
+    gen_wall_ms: float = 0.0
+    validate_wall_ms: float = 0.0
+
+    @property
+    def wall_ms(self) -> float:
+        return self.gen_wall_ms + self.validate_wall_ms
+
+    def summary(self) -> str:
+        valid = sum(c.valid for c in self.candidates)
+        chosen = (f"chose T={self.chosen.temperature} cost={_fmt_bytes(self.chosen.cost)} ({self.chosen.cost_source or 'order'})"
+                  if self.chosen else "none valid")
+        return (f"{valid}/{len(self.candidates)} valid, {chosen} | generate {self.gen_wall_ms:.0f} ms, "
+                f"validate {self.validate_wall_ms:.0f} ms, wall {self.wall_ms:.0f} ms")
+
+def _fmt_bytes(n: float) -> str:
+    if not math.isfinite(n):
+        return "?"
+    for unit, div in (("GB", 1e9), ("MB", 1e6), ("KB", 1e3)):
+        if n >= div:
+            return f"{n / div:.1f}{unit}"
+    return f"{n:.0f}B"
+
+def local_check(sql: str, tables: List[Dict]) -> Optional[str]:
+    """Catalog-aware pre-validation; returns an error message or None."""
+    if not settings.sql_validation:
+        return None
+    check = validate_sql(sql, tables)
+    return None if check.ok else check.feedback()
+
+def explain_cost(result: Dict) -> Optional[float]:
+    """Sum of estimated input bytes from an EXPLAIN (TYPE IO, FORMAT JSON) result."""
+    text = "\n".join(str(v) for row in result.get("rows", []) for v in row.values() if v)
+    try:
+        plan = json.loads(text)
+    except ValueError:
+        return None
+    total = 0.0
+    for info in plan.get("inputTableColumnInfos", []):
+        size = info.get("estimate", {}).get("outputSizeInBytes")
+        try:
+            size = float(size)
+        except (TypeError, ValueError):
+            return None
+        if not math.isfinite(size):
+            return None
+        total += size
+    return total
+
+def stats_cost(sql: str, stats: Dict[str, TableStats]) -> Optional[float]:
+    """rows x width of the columns the statement mentions, per referenced table."""
+    idents = {(a or b).lower() for a, b in _IDENT.findall(sql)}
+    total = 0.0
+    for t in referenced_tables(sql):
+        ts = stats.get(t)
+        if ts is None or ts.row_count is None:
+            return None
+        width = sum(cs.avg_width or 8 for name, cs in ts.columns.items() if name.lower() in idents)
+        total += ts.row_count * (width or 8)
+    return total
+
+def select_candidate(n: int, generate: Callable[[float], str], explain: Callable[[str], Dict],
+                     tables: List[Dict], stats: Optional[Dict[str, TableStats]] = None,
+                     temperatures: Optional[List[float]] = None, concurrency: Optional[int] = None) -> CandidateRun:
+    """Generate n candidates concurrently and pick the cheapest one that passes validation.
+
+    generate(temperature) returns cleaned SQL; explain(sql) runs EXPLAIN and returns
+    the Query API result dict ({"error": ...} on failure). Nothing is executed here.
+    """
+    temps = (temperatures or DEFAULT_TEMPERATURES)[:n]
+    temps += [temps[-1]] * (n - len(temps))
+    run = CandidateRun(candidates=[Candidate(temperature=t) for t in temps])
+    workers = max(1, min(concurrency or settings.candidate_concurrency, n))
+
+    def _gen(c: Candidate) -> None:
+        t0 = time.perf_counter()
+        try:
+            c.sql = generate(c.temperature)
+            c.error = local_check(c.sql, tables)
+        except Exception as e:
+            c.error = f"generation failed: {e}"
+        c.gen_ms = (time.perf_counter() - t0) * 1000
+
+    def _explain(c: Candidate) -> None:
+        t0 = time.perf_counter()
+        result = explain(f"EXPLAIN (TYPE IO, FORMAT JSON) {c.sql.strip().rstrip(';')}")
+        c.explain_ms = (time.perf_counter() - t0) * 1000
+        if "error" in result:
+            c.error = str(result["error"])
+            return
+        cost = explain_cost(result)
+        if cost is not None:
+            c.cost, c.cost_source = cost, "explain"
+        elif stats:
+            cost = stats_cost(c.sql, stats)
+            if cost is not None:
+                c.cost, c.cost_source = cost, "stats"
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        t0 = time.perf_counter()
+        list(pool.map(_gen, run.candidates))
+        run.gen_wall_ms = (time.perf_counter() - t0) * 1000
+
+        # Identical statements are explained once and share the outcome.
+        unique: Dict[str, Candidate] = {}
+        dups: List[Candidate] = []
+        for c in run.candidates:
+            if c.valid:
+                key = fingerprint(c.sql)
+                if key in unique:
+                    dups.append(c)
+                else:
+                    unique[key] = c
+        t0 = time.perf_counter()
+        list(pool.map(_explain, unique.values()))
+        run.validate_wall_ms = (time.perf_counter() - t0) * 1000
+        for c in dups:
+            first = unique[fingerprint(c.sql)]
+            c.error, c.cost, c.cost_source = first.error, first.cost, first.cost_source
+
+    valid = [c for c in run.candidates if c.valid]
+    # min() keeps the first of equal costs, i.e. the coolest temperature.
+    run.chosen = min(valid, key=lambda c: c.cost) if valid else None
+    return run
@@ -0,0 +1,267 @@
+"""Catalog change feed.
+
+Polls Glue, diffs table versions, schemas and partition sets against the last
+snapshot (kept in settings.cache_dir) and publishes ChangeEvents to subscribers.
+Caches key their entries by the tables they reference (see TableIndex and
+sql_utils.referenced_tables) so a change only evicts the entries it affects,
+instead of every cache needing a short TTL.
+
+Subscribers are plain callbacks, so a feed only reaches caches in its own
+process. The agent and the Lambda handler call watch_catalog() after each
+catalog load; it runs the process's feed on a background thread, polling when
+tables_version() changes and every CATALOG_POLL_S (which is what catches
+partition changes), never on the request path. Standalone loop (keeps the
+snapshot and the shared SQLite/JSONL cache files current between runs):
+
+    python -m agent_cli.catalog_watch --db nyc_taxi_db --every 60
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from .config import settings
+from .glue_catalog import cache_path, get_partition_values, get_table_metadata
+
+SNAPSHOT_FILE = "catalog_snapshot.json"
+
+@dataclass
+class ChangeEvent:
+    database: str
+    table: str
+    kind: str  # "created" | "dropped" | "schema" | "partitions"
+    detail: str = ""
+
+Subscriber = Callable[[List[ChangeEvent]], None]
+
+def _digest(obj) -> str:
+    return hashlib.sha1(json.dumps(obj, sort_keys=True, default=str).encode()).hexdigest()
+
+def _table_fingerprint(database: str, t: Dict, with_partitions: bool) -> Dict:
+    sd = t.get("StorageDescriptor", {})
+    schema = [[c["Name"], c.get("Type")] for c in sd.get("Columns", [])]
+    parts = [[p["Name"], p.get("Type")] for p in t.get("PartitionKeys", [])]
+    fp = {
+        "version": t.get("VersionId"),
+        "schema": _digest([schema, parts, sd.get("Location"), sd.get("SerdeInfo", {}).get("SerializationLibrary")]),
+    }
+    if with_partitions and parts:
+        values = sorted(get_partition_values(database, t["Name"]))
+        fp["partitions"] = {"count": len(values), "digest": _digest(values)}
+    return fp
+
+def snapshot_catalog(database: str, with_partitions: bool = True) -> Dict[str, Dict]:
+    """{table: {'version', 'schema', ['partitions']}} for every table in the database."""
+    return {t["Name"]: _table_fingerprint(database, t, with_partitions) for t in get_table_metadata(database)}
+
+def schema_version(snapshot: Dict[str, Dict]) -> str:
+    """Short stable id for a catalog state; changes whenever any table's schema does."""
+    return _digest({name: fp["schema"] for name, fp in snapshot.items()})[:16]
+
+def tables_version(tables: List[Dict]) -> str:
+    """Same idea for a get_tables_and_columns() result, when no snapshot is at hand."""
+    return _digest(sorted([t["table"], t["columns"], t["partitions"], t.get("types", {})] for t in tables))[:16]
+
+def diff_snapshots(database: str, old: Dict[str, Dict], new: Dict[str, Dict]) -> List[ChangeEvent]:
+    events: List[ChangeEvent] = []
+    for name in sorted(set(old) | set(new)):
+        before, after = old.get(name), new.get(name)
+        if before is None:
+            events.append(ChangeEvent(database, name, "created"))
+        elif after is None:
+            events.append(ChangeEvent(database, name, "dropped"))
+        elif before["schema"] != after["schema"] or before.get("version") != after.get("version"):
+            events.append(ChangeEvent(database, name, "schema", f"version {before.get('version')} -> {after.get('version')}"))
+        elif before.get("partitions") != after.get("partitions"):
+            b, a = before.get("partitions") or {}, after.get("partitions") or {}
+            events.append(ChangeEvent(database, name, "partitions", f"{b.get('count', 0)} -> {a.get('count', 0)} partitions"))
+    return events
+
+# --- Cache support ---
+class TableIndex:
+    """Reverse index table -> cache keys, so a cache can evict only the entries a change touches."""
+
+    def __init__(self):
+        self._keys: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, key: str, tables: Iterable[str]) -> None:
+        with self._lock:
+            for t in tables:
+                self._keys.setdefault(t.lower(), set()).add(key)
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            for keys in self._keys.values():
+                keys.discard(key)
+
+    def pop(self, tables: Iterable[str]) -> Set[str]:
+        """Remove and return every key that references any of `tables`."""
+        out: Set[str] = set()
+        with self._lock:
+            for t in tables:
+                out |= self._keys.pop(t.lower(), set())
+            for keys in self._keys.values():
+                keys -= out
+        return out
+
+# --- Feed ---
+class ChangeFeed:
+    """Polls one Glue database and publishes the differences since the previous poll."""
+
+    def __init__(self, database: str, with_partitions: bool = True):
+        self.database = database
+        self.with_partitions = with_partitions
+        self._subscribers: List[Subscriber] = []
+        self._path = cache_path(database, SNAPSHOT_FILE)
+        self.snapshot: Optional[Dict[str, Dict]] = self._load()
+
+    def _load(self) -> Optional[Dict[str, Dict]]:
+        if not os.path.exists(self._path):
+            return None
+        try:
+            with open(self._path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self) -> None:
+        tmp = f"{self._path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot, f)
+        os.replace(tmp, self._path)
+
+    @property
+    def schema_version(self) -> Optional[str]:
+        return schema_version(self.snapshot) if self.snapshot is not None else None
+
+    def subscribe(self, fn: Subscriber) -> Subscriber:
+        self._subscribers.append(fn)
+        return fn
+
+    def subscribe_cache(self, cache) -> None:
+        """Wire any object with invalidate_tables(database, tables) to this feed."""
+        self.subscribe(lambda events: cache.invalidate_tables(self.database, {e.table for e in events}))
+
+    def poll(self) -> List[ChangeEvent]:
+        """Snapshot the catalog, publish changes and persist the new baseline.
+
+        The first poll without a stored snapshot only records the baseline.
+        """
+        current = snapshot_catalog(self.database, self.with_partitions)
+        events = diff_snapshots(self.database, self.snapshot, current) if self.snapshot is not None else []
+        self.snapshot = current
+        self._save()
+        if events:
+            for fn in self._subscribers:
+                try:
+                    fn(events)
+                except Exception as e:  # one broken subscriber must not starve the others
+                    print(f"[catalog] subscriber failed: {e}")
+        return events
+
+    def run(self, interval_s: Optional[int] = None, stop: Optional[threading.Event] = None) -> None:
+        interval_s = interval_s or settings.catalog_poll_s
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"[catalog] poll failed: {e}")
+            stop.wait(interval_s)
+
+def subscribe_caches(feed: ChangeFeed) -> ChangeFeed:
+    """Wire this process's column stats, LLM cache and semantic cache (when enabled) to `feed`."""
+    from .column_stats import invalidate_stats
+    from .llm_cache import get_llm_cache
+    from .semantic_cache import get_semantic_cache
+
+    feed.subscribe(lambda events: invalidate_stats(feed.database, [e.table for e in events]))
+    if settings.llm_cache_enabled:
+        feed.subscribe_cache(get_llm_cache())
+    if settings.semantic_cache_enabled:
+        feed.subscribe_cache(get_semantic_cache())
+    return feed
+
+# --- In-process watching ---
+class _Watcher:
+    """Background feed for one database: polls when woken by a new tables_version and every catalog_poll_s."""
+
+    def __init__(self, feed: ChangeFeed):
+        self.feed = feed
+        self.version: Optional[str] = None
+        self.polls = 0
+        self._stopped = False
+        self._wake = threading.Event()
+        self._polled = threading.Condition()
+        threading.Thread(target=self._run, name=f"catalog-feed-{feed.database}", daemon=True).start()
+
+    def notify(self, version: str) -> None:
+        if version != self.version:
+            self.version = version
+            self._wake.set()
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._wake.set()
+
+    def wait(self, polls: int, timeout: float) -> bool:
+        """Block until at least `polls` polls have finished (tests, shutdown hooks)."""
+        with self._polled:
+            return self._polled.wait_for(lambda: self.polls >= polls, timeout)
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(settings.catalog_poll_s or None)
+            self._wake.clear()
+            if self._stopped:
+                return
+            try:
+                self.feed.poll()
+            except Exception as e:
+                print(f"[catalog] poll failed: {e}")
+            with self._polled:
+                self.polls += 1
+                self._polled.notify_all()
+
+_watchers: Dict[str, _Watcher] = {}
+_watchers_lock = threading.Lock()
+
+def watch_catalog(database: str, version: str) -> None:
+    """Keep this process's caches in step with `database` without blocking the caller.
+
+    The first call starts a background feed that polls right away (diffing
+    against the snapshot a previous run persisted, or recording the baseline),
+    whenever `version` (tables_version of a fresh load) changes, and every
+    CATALOG_POLL_S. tables_version only covers schemas and partition keys, so
+    added or dropped partitions are picked up by the periodic poll.
+    """
+    if not settings.catalog_feed:
+        return
+    with _watchers_lock:
+        watcher = _watchers.get(database)
+        if watcher is None:
+            watcher = _watchers[database] = _Watcher(subscribe_caches(ChangeFeed(database)))
+        watcher.notify(version)
+
+# --- Entry point ---
+def main():
+    ap = argparse.ArgumentParser(description="Watch a Glue database for schema and partition changes")
+    ap.add_argument("--db", default=settings.glue_database)
+    ap.add_argument("--every", type=int, default=0, help="poll every N seconds (0 = poll once)")
+    ap.add_argument("--no-partitions", action="store_true", help="skip partition listing (schema changes only)")
+    args = ap.parse_args()
+
+    feed = subscribe_caches(ChangeFeed(args.db, with_partitions=not args.no_partitions))
+    feed.subscribe(lambda events: [print(f"[catalog] {e.table}: {e.kind} {e.detail}".rstrip()) for e in events])
+    if args.every:
+        feed.run(args.every)
+    else:
+        feed.poll()
+        print(f"[catalog] {len(feed.snapshot or {})} tables, schema version {feed.schema_version}")
+
+if __name__ == "__main__":
+    main()
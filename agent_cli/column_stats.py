@@ -0,0 +1,234 @@
+"""Column statistics (null fraction, NDV, min/max, average width) per table.
+
+Glue column statistics are used when they have been computed for a table;
+otherwise a cheap sampled Athena aggregation (TABLESAMPLE + approx_distinct)
+fills the gap. Results are stored next to the other per-database caches in
+settings.cache_dir and read back through get_table_stats / get_column_stats,
+which is what the schema renderer (and anything estimating cost or previewing
+results) should call. Collection is run on a schedule via:
+
+    python -m agent_cli.column_stats --db nyc_taxi_db [--every 3600]
+"""
+import argparse
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from .config import settings
+from .glue_catalog import cache_path, get_column_statistics, get_table_parameters, get_tables_and_columns
+
+STATS_FILE = "column_stats.json"
+
+# Approximate on-disk width (bytes) for fixed-size types; strings use measured averages.
+_TYPE_WIDTHS = {
+    "boolean": 1, "tinyint": 1, "smallint": 2, "int": 4, "integer": 4, "bigint": 8,
+    "float": 4, "double": 8, "date": 4, "timestamp": 8, "decimal": 16,
+}
+# Complex types can't be min/max'ed or cast to varchar cheaply; they are skipped when sampling.
+_COMPLEX_PREFIXES = ("array", "map", "struct")
+
+@dataclass
+class ColumnStats:
+    column: str
+    null_fraction: Optional[float] = None
+    ndv: Optional[int] = None
+    min_value: Optional[str] = None
+    max_value: Optional[str] = None
+    avg_width: Optional[float] = None
+
+@dataclass
+class TableStats:
+    table: str
+    row_count: Optional[int] = None
+    source: str = "glue"  # "glue" | "sample"
+    collected_at: float = 0.0
+    columns: Dict[str, ColumnStats] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "TableStats":
+        cols = {name: ColumnStats(**c) for name, c in d.get("columns", {}).items()}
+        return cls(table=d["table"], row_count=d.get("row_count"), source=d.get("source", "glue"),
+                   collected_at=d.get("collected_at", 0.0), columns=cols)
+
+# --- Store ---
+def load_stats(database: str) -> Dict[str, TableStats]:
+    """All stored stats for a database, keyed by table name (empty if never collected)."""
+    path = cache_path(database, STATS_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            raw = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {name: TableStats.from_dict(d) for name, d in raw.items()}
+
+def save_stats(database: str, stats: Dict[str, TableStats]) -> None:
+    path = cache_path(database, STATS_FILE)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({name: asdict(s) for name, s in stats.items()}, f)
+    os.replace(tmp, path)  # readers never see a half-written file
+
+def get_table_stats(database: str, table: str) -> Optional[TableStats]:
+    return load_stats(database).get(table)
+
+def get_column_stats(database: str, table: str, column: str) -> Optional[ColumnStats]:
+    ts = get_table_stats(database, table)
+    return ts.columns.get(column) if ts else None
+
+def invalidate_stats(database: str, tables: List[str]) -> None:
+    """Drop stored stats for `tables` so the next refresh re-collects them."""
+    stats = load_stats(database)
+    if any(stats.pop(t, None) for t in tables):
+        save_stats(database, stats)
+
+# --- Collectors ---
+def _type_width(col_type: str) -> Optional[float]:
+    return _TYPE_WIDTHS.get(col_type.split("(")[0].strip().lower())
+
+def _glue_value(v) -> Optional[str]:
+    if v is None:
+        return None
+    if isinstance(v, dict) and "UnscaledValue" in v:  # DecimalNumber
+        unscaled = int.from_bytes(v["UnscaledValue"], "big", signed=True)
+        return str(unscaled / (10 ** v.get("Scale", 0)))
+    if hasattr(v, "isoformat"):
+        return v.isoformat()
+    return str(v)
+
+def _from_glue(database: str, table: Dict) -> Optional[TableStats]:
+    names = table["columns"] + table["partitions"]
+    raw = get_column_statistics(database, table["table"], names) if names else []
+    if not raw:
+        return None
+    params = get_table_parameters(database, table["table"])
+    rows = int(float(params["recordCount"])) if params.get("recordCount") else None
+
+    ts = TableStats(table=table["table"], row_count=rows, source="glue", collected_at=time.time())
+    for cs in raw:
+        data = cs["StatisticsData"]
+        # Exactly one *ColumnStatisticsData member is set, matching data["Type"].
+        d = next((v for k, v in data.items() if k.endswith("ColumnStatisticsData")), {})
+        nulls = d.get("NumberOfNulls")
+        ts.columns[cs["ColumnName"]] = ColumnStats(
+            column=cs["ColumnName"],
+            null_fraction=(nulls / rows) if rows and nulls is not None else None,
+            ndv=d.get("NumberOfDistinctValues"),
+            min_value=_glue_value(d.get("MinimumValue")),
+            max_value=_glue_value(d.get("MaximumValue")),
+            avg_width=d.get("AverageLength") or _type_width(cs.get("ColumnType", "")),
+        )
+    return ts
+
+def _sample_sql(table: str, columns: List[str], percent: float) -> str:
+    exprs = ["count(*) AS n"]
+    for i, c in enumerate(columns):
+        q = f'"{c}"'
+        exprs += [
+            f"count_if({q} IS NULL) AS c{i}_nulls",
+            f"approx_distinct({q}) AS c{i}_ndv",
+            f"CAST(min({q}) AS varchar) AS c{i}_min",
+            f"CAST(max({q}) AS varchar) AS c{i}_max",
+            f"avg(length(CAST({q} AS varchar))) AS c{i}_width",
+        ]
+    return f'SELECT {", ".join(exprs)} FROM "{table}" TABLESAMPLE BERNOULLI ({percent:g})'
+
+def _from_sample(database: str, table: Dict, execute: Callable[[str, str], Dict],
+                 percent: float) -> TableStats:
+    types = table.get("types", {})
+    cols = [c for c in table["columns"] + table["partitions"]
+            if not types.get(c, "string").lower().startswith(_COMPLEX_PREFIXES)]
+    result = execute(_sample_sql(table["table"], cols, percent), database)
+    if "error" in result:
+        raise RuntimeError(f"Sampling {table['table']} failed: {result['error']}")
+    row = (result.get("rows") or [{}])[0]
+    n = int(row.get("n") or 0)
+
+    ts = TableStats(table=table["table"], row_count=round(n * 100 / percent), source="sample",
+                    collected_at=time.time())
+    for i, c in enumerate(cols):
+        nulls = int(row.get(f"c{i}_nulls") or 0)
+        width = row.get(f"c{i}_width")
+        ts.columns[c] = ColumnStats(
+            column=c,
+            null_fraction=(nulls / n) if n else None,
+            ndv=int(row[f"c{i}_ndv"]) if row.get(f"c{i}_ndv") else None,  # lower bound on a sample
+            min_value=row.get(f"c{i}_min"),
+            max_value=row.get(f"c{i}_max"),
+            avg_width=_type_width(types.get(c, "")) or (float(width) if width else None),
+        )
+    return ts
+
+def collect_table_stats(database: str, table: Dict, execute: Optional[Callable[[str, str], Dict]] = None,
+                        percent: Optional[float] = None) -> TableStats:
+    """Glue column statistics if present, otherwise a sampled Athena aggregation."""
+    ts = _from_glue(database, table)
+    if ts is not None:
+        return ts
+    if execute is None:
+        from .agent import run_sql_via_api as execute  # deferred: agent imports this module
+    return _from_sample(database, table, execute, percent or settings.stats_sample_percent)
+
+def refresh_stats(database: str, tables: Optional[List[Dict]] = None, max_age_s: Optional[int] = None,
+                  execute: Optional[Callable[[str, str], Dict]] = None) -> Dict[str, TableStats]:
+    """(Re)collect stats older than max_age_s and persist them. Returns the full store."""
+    max_age_s = settings.stats_max_age_s if max_age_s is None else max_age_s
+    tables = tables if tables is not None else get_tables_and_columns(database)
+    stats = load_stats(database)
+    now = time.time()
+    for t in tables:
+        cur = stats.get(t["table"])
+        if cur and now - cur.collected_at < max_age_s:
+            continue
+        try:
+            stats[t["table"]] = collect_table_stats(database, t, execute=execute)
+            save_stats(database, stats)  # persist per table so a late failure keeps earlier work
+        except Exception as e:
+            print(f"[stats] {t['table']}: {e}")
+    return stats
+
+# --- Rendering ---
+def _fmt_count(n: int) -> str:
+    for unit, div in (("B", 1e9), ("M", 1e6), ("K", 1e3)):
+        if n >= div:
+            return f"{n / div:.1f}{unit}"
+    return str(n)
+
+def render_table_stats(ts: TableStats, columns: Optional[List[str]] = None) -> str:
+    """Compact one-line summary for prompts, e.g. `rows≈7.7M; payment_type ndv=6 [1..5]`."""
+    parts = [f"rows≈{_fmt_count(ts.row_count)}"] if ts.row_count is not None else []
+    for name in columns or list(ts.columns):
+        cs = ts.columns.get(name)
+        if cs is None:
+            continue
+        bits = []
+        if cs.ndv is not None:
+            bits.append(f"ndv={_fmt_count(cs.ndv)}")
+        if cs.null_fraction:
+            bits.append(f"null={cs.null_fraction:.0%}")
+        if cs.min_value is not None and cs.max_value is not None:
+            bits.append(f"[{cs.min_value}..{cs.max_value}]")
+        if bits:
+            parts.append(f"{name} {' '.join(bits)}")
+    return "; ".join(parts)
+
+# --- Entry point (for cron / EventBridge schedules) ---
+def main():
+    ap = argparse.ArgumentParser(description="Collect column statistics for a Glue database")
+    ap.add_argument("--db", default=settings.glue_database)
+    ap.add_argument("--force", action="store_true", help="ignore STATS_MAX_AGE_S and re-collect everything")
+    ap.add_argument("--every", type=int, default=0, help="repeat every N seconds (0 = run once)")
+    args = ap.parse_args()
+    while True:
+        stats = refresh_stats(args.db, max_age_s=0 if args.force else None)
+        for name, ts in stats.items():
+            print(f"{name} ({ts.source}): {render_table_stats(ts)}")
+        if not args.every:
+            break
+        time.sleep(args.every)
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pydantic import BaseModel
 
 class Settings(BaseModel):
@@ -17,8 +18,103 @@ class Settings(BaseModel):
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "dummy")
     model: str = os.getenv("LLM_MODEL", "deepseek-r1:7b")
 
+    # LLM backend: "bedrock" (Meta Llama via invoke_model) or "openai" (OPENAI_BASE_URL, LLM_MODEL)
+    llm_backend: str = os.getenv("LLM_BACKEND", "bedrock")
+    bedrock_model_id: str = os.getenv("BEDROCK_MODEL_ID", "meta.llama3-8b-instruct-v1:0")
+    llm_timeout_s: float = float(os.getenv("LLM_TIMEOUT_S", "60"))  # read timeout per call
+    llm_connect_timeout_s: float = float(os.getenv("LLM_CONNECT_TIMEOUT_S", "5"))
+    llm_max_retries: int = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    llm_retry_budget: float = float(os.getenv("LLM_RETRY_BUDGET", "0.2"))  # retries per call, sustained
+    llm_pool_size: int = int(os.getenv("LLM_POOL_SIZE", "10"))  # keep-alive connections
+
     # Optional execution via Chunk 2 API
     query_api_base: str | None = os.getenv("QUERY_API_BASE", "http://127.0.0.1:8000")  # e.g., http://127.0.0.1:8000
+    query_api_timeout_s: float = float(os.getenv("QUERY_API_TIMEOUT_S", "120"))
+    result_url_ttl_s: int = int(os.getenv("RESULT_URL_TTL_S", "900"))  # presigned links to oversized Lambda results
+    # "http" (POST QUERY_API_BASE/sql) or "inprocess" (query_api.athena.run_query, when deployed together)
+    sql_executor: str = os.getenv("SQL_EXECUTOR", "http")
+
+    # Local caches (catalog snapshots, column statistics); /tmp is the only writable path on Lambda
+    cache_dir: str = os.getenv("COPILOT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "athena-copilot"))
+
+    # Decoding for the agent's own calls; greedy by default so repeated prompts are reproducible and cacheable
+    llm_temperature: float = float(os.getenv("LLM_TEMPERATURE", "0"))
+    llm_top_p: float = float(os.getenv("LLM_TOP_P", "1"))
+    llm_max_tokens: int = int(os.getenv("LLM_MAX_TOKENS", "500"))
+
+    # Bedrock streaming (stop reading once the SQL statement is complete)
+    llm_streaming: bool = os.getenv("LLM_STREAMING", "1") not in ("0", "false", "False")
+
+    # Local SQL pre-validation against the cached catalog (skip Athena for statements that can't run)
+    sql_validation: bool = os.getenv("SQL_VALIDATION", "1") not in ("0", "false", "False")
+
+    # Row cap added to generated row-returning queries without a LIMIT (aggregates are never capped);
+    # 0 = off. A cap changes what "all trips over $100" means, so it is opt-in.
+    sql_row_limit: int = int(os.getenv("SQL_ROW_LIMIT", "0"))
+
+    # Multi-candidate generation (1 = off)
+    candidates: int = int(os.getenv("SQL_CANDIDATES", "1"))
+    candidate_concurrency: int = int(os.getenv("SQL_CANDIDATE_CONCURRENCY", "4"))
+
+    # LLM response cache (memory LRU + SQLite file in cache_dir)
+    llm_cache_enabled: bool = os.getenv("LLM_CACHE", "1") not in ("0", "false", "False")
+    llm_cache_max_entries: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "256"))  # in-memory tier
+    llm_cache_max_mb: int = int(os.getenv("LLM_CACHE_MAX_MB", "64"))  # SQLite tier
+    # Only calls at or below this temperature and with top_p 1 are cached, i.e. greedy decoding by
+    # default, which is also the agent's default (LLM_TEMPERATURE / LLM_TOP_P below). Raising the
+    # agent's temperature or lowering top_p turns the cache off for its calls.
+    llm_cache_max_temperature: float = float(os.getenv("LLM_CACHE_MAX_TEMPERATURE", "0"))
+
+    # Semantic question cache (hashed n-gram embeddings, NumPy cosine search)
+    semantic_cache_enabled: bool = os.getenv("SEMANTIC_CACHE", "1") not in ("0", "false", "False")
+    # Tuned on PAIRS in tests/test_semantic_cache.py (paraphrases >= 0.87, different questions with the same
+    # literal_signature up to 0.84). On the HELD_OUT pairs, which were never used for tuning, it reuses no
+    # wrong SQL (different questions score <= 0.79), and 5 of 8 paraphrases hit.
+    semantic_cache_threshold: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.85"))
+    semantic_cache_max_entries: int = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "100000"))
+    # Entries per (database, version, literal_signature) shard; a lookup scans one shard, LRU within it.
+    # Lookup p99 at 100k inserts on a single vCPU (benchmarks/bench_semantic_cache.py --shape ...):
+    # 0.19 ms segments, 1.83 ms shared, 2.96 ms single (every question in one shard, capped here).
+    semantic_cache_shard_max: int = int(os.getenv("SEMANTIC_CACHE_SHARD_MAX", "50000"))
+    embedding_dim: int = int(os.getenv("EMBEDDING_DIM", "128"))
+
+    # Schema linking (prune the prompt schema to relevant tables/columns)
+    schema_linking: bool = os.getenv("SCHEMA_LINKING", "1") not in ("0", "false", "False")
+    schema_max_tables: int = int(os.getenv("SCHEMA_MAX_TABLES", "8"))
+    schema_token_budget: int = int(os.getenv("SCHEMA_TOKEN_BUDGET", "1500"))
+
+    # Few-shot retrieval (library of validated question -> SQL pairs per database)
+    fewshot_retrieval: bool = os.getenv("FEWSHOT_RETRIEVAL", "1") not in ("0", "false", "False")
+    fewshot_k: int = int(os.getenv("FEWSHOT_K", "3"))
+    fewshot_token_budget: int = int(os.getenv("FEWSHOT_TOKEN_BUDGET", "600"))
+    fewshot_max_examples: int = int(os.getenv("FEWSHOT_MAX_EXAMPLES", "2000"))
+
+    # Whole-prompt hard cap (schema and few-shot budgets above apply first); per-attempt JSONL log
+    prompt_token_budget: int = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+    prompt_log: str = os.getenv("PROMPT_LOG", "")
+
+    # Lambda warm-container caches (catalog + stats per database, rendered schema strings)
+    warm_catalog_ttl_s: int = int(os.getenv("WARM_CATALOG_TTL_S", "300"))
+    warm_max_databases: int = int(os.getenv("WARM_MAX_DATABASES", "4"))
+    warm_schema_entries: int = int(os.getenv("WARM_SCHEMA_ENTRIES", "256"))
+
+    # SQS-triggered Lambda: result sink (log | s3://bucket/prefix | queue URL); don't start a
+    # message with less than this much of the invocation left
+    sqs_result_sink: str = os.getenv("SQS_RESULT_SINK", "log")
+    sqs_min_remaining_ms: int = int(os.getenv("SQS_MIN_REMAINING_MS", "30000"))
+
+    # Batch mode (--questions-file and SQS batches): separate limits for model calls and Athena executions
+    batch_llm_concurrency: int = int(os.getenv("BATCH_LLM_CONCURRENCY", "4"))
+    batch_athena_concurrency: int = int(os.getenv("BATCH_ATHENA_CONCURRENCY", "4"))
+
+    # Catalog change feed: poll interval for the standalone loop and for the agent's and Lambda handler's
+    # background feed (which also polls on a new tables_version; 0 = only then). CATALOG_FEED=0 turns that off.
+    catalog_poll_s: int = int(os.getenv("CATALOG_POLL_S", "60"))
+    catalog_feed: bool = os.getenv("CATALOG_FEED", "1") not in ("0", "false", "False")
+
+    # Column statistics
+    stats_max_age_s: int = int(os.getenv("STATS_MAX_AGE_S", "86400"))  # re-collect after a day
+    stats_sample_percent: float = float(os.getenv("STATS_SAMPLE_PERCENT", "1"))  # TABLESAMPLE BERNOULLI (%)
 
 
 settings = Settings()
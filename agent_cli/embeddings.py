@@ -0,0 +1,54 @@
+"""Dependency-light text embeddings: signed feature hashing of words and character n-grams.
+
+No model download and no per-process warm-up; vectors are L2-normalised float32,
+so cosine similarity is a plain dot product.
+"""
+import re
+import zlib
+from typing import Iterable, List
+
+import numpy as np
+
+from .config import settings
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_STOPWORDS = {"a", "an", "the", "of", "for", "by", "per", "in", "on", "to", "me", "i", "we", "you", "can", "please",
+              "show", "give", "list", "what", "is", "are", "each", "all"}
+_PHRASES = (("how many", "count"), ("number of", "count"), ("total number", "count"), ("payment method", "payment type"))
+_SYNONYMS = {"ride": "trip", "journey": "trip", "mean": "average", "avg": "average", "maximum": "max",
+             "minimum": "min"}
+
+def _stem(w: str) -> str:
+    # Plural folding only; good enough for "trips"/"trip", "rows"/"row".
+    return w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w
+
+def normalize_text(text: str) -> List[str]:
+    text = _NON_WORD.sub(" ", text.lower())
+    for phrase, repl in _PHRASES:
+        text = text.replace(phrase, repl)
+    words = (_stem(w) for w in text.split() if w not in _STOPWORDS)
+    return [_SYNONYMS.get(w, w) for w in words]
+
+def _features(words: List[str]) -> Iterable[tuple]:
+    for w in words:
+        yield w, 1.0
+        padded = f" {w} "
+        for n in (3, 4):
+            for i in range(len(padded) - n + 1):
+                yield padded[i:i + n], 0.5
+    for a, b in zip(words, words[1:]):
+        yield f"{a}_{b}", 0.7
+
+def embed(text: str, dim: int | None = None) -> np.ndarray:
+    dim = dim or settings.embedding_dim
+    vec = np.zeros(dim, dtype=np.float32)
+    for feat, weight in _features(normalize_text(text)):
+        h = zlib.crc32(feat.encode())  # stable across processes, unlike hash()
+        vec[h % dim] += weight if h & 0x80000000 else -weight
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm else vec
+
+def embed_many(texts: Iterable[str], dim: int | None = None) -> np.ndarray:
+    dim = dim or settings.embedding_dim
+    rows = [embed(t, dim) for t in texts]
+    return np.vstack(rows) if rows else np.zeros((0, dim), dtype=np.float32)
@@ -0,0 +1,120 @@
+"""SQL executors: the Query API over HTTP, or its engine called in-process.
+
+Both expose run(sql, database) -> result dict ({"columns", "rows", "row_count",
+"bytes_scanned", ...}) or {"error": text} — the contract run_sql_via_api always
+had, so validation, repair and stats collection don't care which one runs.
+
+    SQL_EXECUTOR=http       POST {QUERY_API_BASE}/sql (default)
+    SQL_EXECUTOR=inprocess  query_api.athena.run_query in this process
+
+In-process skips API Gateway, a second Lambda invocation and two rounds of
+JSON encoding, and shares the engine's boto3 clients with anything else in the
+process. It needs the query_api package deployed alongside agent_cli.
+"""
+import threading
+from typing import TYPE_CHECKING, Callable, Dict, Optional
+
+from .config import settings
+
+if TYPE_CHECKING:
+    import requests
+
+class Executor:
+    name = "base"
+
+    def run(self, sql: str, database: str) -> Dict:
+        raise NotImplementedError
+
+    def warm(self) -> None:
+        """Open connections / create clients ahead of the first query; never raises."""
+
+class HttpExecutor(Executor):
+    """POST /sql on the Query API over a pooled keep-alive session."""
+    name = "http"
+
+    def __init__(self, base_url: Optional[str] = None, session: Optional["requests.Session"] = None,
+                 timeout_s: Optional[float] = None):
+        import requests  # deferred until the first execution
+        from requests.adapters import HTTPAdapter
+        self.base_url = base_url if base_url is not None else settings.query_api_base
+        self.timeout = timeout_s or settings.query_api_timeout_s
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.llm_pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def warm(self) -> None:
+        if not self.base_url:
+            return
+        try:  # leaves a keep-alive connection in the pool
+            self.session.get(f"{self.base_url.rstrip('/')}/health", timeout=self.timeout).close()
+        except Exception:
+            pass
+
+    def run(self, sql: str, database: str) -> Dict:
+        if not self.base_url:
+            return {"error": "QUERY_API_BASE not set in .env"}
+        try:
+            r = self.session.post(f"{self.base_url.rstrip('/')}/sql", json={"query": sql, "database": database},
+                                  timeout=self.timeout)
+        except Exception as e:
+            return {"error": f"HTTP error: {e}"}
+        if r.status_code != 200:
+            return {"error": r.text}
+        return r.json()
+
+class InProcessExecutor(Executor):
+    """query_api.athena.run_query called directly, with the Query API's own settings."""
+    name = "inprocess"
+
+    def __init__(self, run_query: Optional[Callable] = None):
+        self._run_query = run_query
+
+    def _engine(self):
+        if self._run_query is None:
+            # deferred: pulls in boto3 and creates the engine's clients on first use
+            from query_api.athena import run_query
+            from query_api.config import settings as api_settings
+            self._run_query = lambda sql, database: run_query(
+                sql, database=database, workgroup=api_settings.athena_workgroup,
+                output_s3=api_settings.athena_output_s3,
+            )
+        return self._run_query
+
+    def warm(self) -> None:
+        try:
+            self._engine()
+            from query_api.athena import client
+            client("athena")
+        except Exception:
+            pass
+
+    def run(self, sql: str, database: str) -> Dict:
+        try:
+            return self._engine()(sql, database)
+        except ImportError as e:
+            return {"error": f"SQL_EXECUTOR=inprocess but query_api is not importable: {e}"}
+        except Exception as e:
+            # same text the HTTP path would carry in its 400 detail
+            return {"error": str(e)}
+
+EXECUTORS = {"http": HttpExecutor, "inprocess": InProcessExecutor}
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+
+def get_executor() -> Executor:
+    """Process-wide executor chosen by SQL_EXECUTOR (http | inprocess)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            if settings.sql_executor not in EXECUTORS:
+                raise ValueError(f"Unknown SQL_EXECUTOR '{settings.sql_executor}' (expected one of {', '.join(EXECUTORS)})")
+            _executor = EXECUTORS[settings.sql_executor]()
+        return _executor
+
+def set_executor(executor: Optional[Executor]) -> None:
+    """Swap the process-wide executor (None resets to the configured one)."""
+    global _executor
+    with _executor_lock:
+        _executor = executor
@@ -0,0 +1,144 @@
+"""Retrieval-based few-shot examples.
+
+Each database has a library of validated question -> SQL pairs (JSONL under
+settings.cache_dir), seeded from prompts.SEED_FEWSHOTS and grown by
+record_success() after every successful execution. select_examples() embeds
+the question, ranks the library by cosine similarity, skips examples whose
+tables are not in the current catalog, and fills a token budget.
+"""
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .config import settings
+from .embeddings import embed, embed_many, normalize_text
+from .glue_catalog import cache_path
+from .prompts import SEED_FEWSHOTS
+from .sql_utils import referenced_tables
+from .tokens import estimate_tokens
+
+LIBRARY_FILE = "fewshots.jsonl"
+
+@dataclass
+class Example:
+    question: str
+    sql: str
+    source: str = "execution"  # "seed" | "execution"
+    created: float = 0.0
+
+def render_examples(examples: List[Example]) -> str:
+    return "\n\n".join(f"Q: {e.question}\nSQL:\n{e.sql.strip()}" for e in examples)
+
+class FewShotLibrary:
+    def __init__(self, database: str, path: Optional[str] = None):
+        self.database = database
+        self.path = path or cache_path(database, LIBRARY_FILE)
+        self.examples: List[Example] = [Example(e["question"], e["sql"], "seed") for e in SEED_FEWSHOTS]
+        self._seen = {" ".join(normalize_text(e.question)) for e in self.examples}
+        self._vecs = embed_many(e.question for e in self.examples)
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        loaded = []
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    loaded.append(Example(**json.loads(line)))
+                except (ValueError, TypeError):
+                    continue
+        self._add(loaded)
+
+    def _add(self, examples: Iterable[Example]) -> List[Example]:
+        fresh = []
+        for e in examples:
+            key = " ".join(normalize_text(e.question))
+            if key and key not in self._seen:
+                self._seen.add(key)
+                fresh.append(e)
+        if fresh:
+            self.examples.extend(fresh)
+            self._vecs = np.vstack([self._vecs, embed_many(e.question for e in fresh)])
+        return fresh
+
+    def record_success(self, question: str, sql: str) -> bool:
+        """Add a validated pair (no-op for questions already in the library). Returns True if added."""
+        with self._lock:
+            added = self._add([Example(question, sql, "execution", time.time())])
+            if added:
+                with open(self.path, "a") as f:
+                    f.write(json.dumps(asdict(added[0])) + "\n")
+                if len(self.examples) > settings.fewshot_max_examples:
+                    self._trim()
+        return bool(added)
+
+    def _trim(self) -> None:
+        # Keep seeds, drop the oldest learned examples, and rewrite the file.
+        keep = len(self.examples) - settings.fewshot_max_examples
+        drop = {i for i, e in enumerate(self.examples) if e.source != "seed"}
+        drop = set(sorted(drop, key=lambda i: self.examples[i].created)[:keep])
+        rows = [i for i in range(len(self.examples)) if i not in drop]
+        self.examples = [self.examples[i] for i in rows]
+        self._vecs = self._vecs[rows]
+        self._seen = {" ".join(normalize_text(e.question)) for e in self.examples}
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            for e in self.examples:
+                if e.source != "seed":
+                    f.write(json.dumps(asdict(e)) + "\n")
+        os.replace(tmp, self.path)
+
+    def select(self, question: str, table_names: Iterable[str], k: Optional[int] = None,
+               token_budget: Optional[int] = None) -> List[Example]:
+        """Up to k most similar examples whose tables all exist, within token_budget."""
+        k = k or settings.fewshot_k
+        token_budget = token_budget or settings.fewshot_token_budget
+        available = {t.lower() for t in table_names}
+        with self._lock:
+            if not self.examples:
+                return []
+            scores = self._vecs @ embed(question)
+            order = np.argsort(-scores)
+            examples, vecs = self.examples, self._vecs
+        picked: List[int] = []
+        used = 0
+        for i in order:
+            e = examples[i]
+            if e.question.strip().lower() == question.strip().lower():
+                continue  # the question itself (e.g. a retry) teaches nothing
+            tables = referenced_tables(e.sql)
+            if not tables or not tables <= available:
+                continue
+            if any(float(vecs[i] @ vecs[j]) > 0.95 for j in picked):
+                continue  # near-duplicate of an example already chosen
+            cost = estimate_tokens(render_examples([e])) + 2
+            if used + cost > token_budget:
+                continue
+            picked.append(int(i))
+            used += cost
+            if len(picked) == k:
+                break
+        return [examples[i] for i in picked]
+
+_libraries: Dict[str, FewShotLibrary] = {}
+_libraries_lock = threading.Lock()
+
+def get_library(database: str) -> FewShotLibrary:
+    with _libraries_lock:
+        if database not in _libraries:
+            _libraries[database] = FewShotLibrary(database)
+        return _libraries[database]
+
+def select_examples(question: str, database: str, table_names: Iterable[str]) -> str:
+    """Rendered few-shot block for the prompt ('' when nothing relevant is in the library)."""
+    return render_examples(get_library(database).select(question, table_names))
+
+def record_success(question: str, sql: str, database: str) -> bool:
+    return get_library(database).record_success(question, sql)
@@ -1,25 +1,99 @@
-from typing import Dict, List
-import boto3
-from botocore.exceptions import ProfileNotFound
+import os
+import threading
+from typing import Dict, List, Optional
 from .config import settings
 
 def _make_session():
+    import boto3  # deferred: boto3/botocore are ~half of a cold import
+    from botocore.exceptions import ProfileNotFound
     try:
         return boto3.Session(profile_name=settings.aws_profile, region_name=settings.aws_region) if settings.aws_profile else boto3.Session(region_name=settings.aws_region)
     except ProfileNotFound:
         return boto3.Session(region_name=settings.aws_region)
 
-_session = _make_session()
-_glue = _session.client("glue")
+_glue = None
+_glue_lock = threading.Lock()
 
-def get_tables_and_columns(database: str) -> List[Dict]:
-    """Return [{'table': str, 'columns': [str], 'partitions': [str]}...]"""
+def glue_client():
+    """Process-wide Glue client, created (and credentials resolved) on first use."""
+    global _glue
+    if _glue is None:
+        with _glue_lock:
+            if _glue is None:
+                _glue = _make_session().client("glue")
+    return _glue
+
+_s3 = None
+
+def s3_client():
+    """Process-wide S3 client (SigV4, which presigned URLs need), created on first use."""
+    global _s3
+    if _s3 is None:
+        with _glue_lock:
+            if _s3 is None:
+                from botocore.config import Config
+                _s3 = _make_session().client("s3", config=Config(signature_version="s3v4"))
+    return _s3
+
+def result_location(result: Dict) -> Optional[Dict]:
+    """Presigned GET for Athena's own CSV of `result` (its OutputLocation), same shape as query_api's offload."""
+    uri = result.get("output")
+    if not uri or not uri.startswith("s3://"):
+        return None
+    bucket, _, key = uri[len("s3://"):].partition("/")
+    try:
+        url = s3_client().generate_presigned_url("get_object", Params={"Bucket": bucket, "Key": key},
+                                                 ExpiresIn=settings.result_url_ttl_s)
+    except Exception as e:
+        print(f"[result] could not presign {uri}: {e}")
+        return None
+    return {"uri": uri, "url": url, "format": "csv", "bytes": None, "expires_in": settings.result_url_ttl_s}
+
+def cache_path(database: str, name: str) -> str:
+    """Path of a per-database cache file under settings.cache_dir (directory is created)."""
+    d = os.path.join(settings.cache_dir, database)
+    os.makedirs(d, exist_ok=True)
+    return os.path.join(d, name)
+
+def get_table_metadata(database: str) -> List[Dict]:
+    """Raw Glue TableList entries for every table in the database."""
     out: List[Dict] = []
-    paginator = _glue.get_paginator("get_tables")
+    paginator = glue_client().get_paginator("get_tables")
     for page in paginator.paginate(DatabaseName=database):
-        for t in page.get("TableList", []):
-            name = t["Name"]
-            cols = [c["Name"] for c in t.get("StorageDescriptor", {}).get("Columns", [])]
-            parts = [p["Name"] for p in t.get("PartitionKeys", [])]
-            out.append({"table": name, "columns": cols, "partitions": parts})
+        out.extend(page.get("TableList", []))
+    return out
+
+def get_tables_and_columns(database: str) -> List[Dict]:
+    """Return [{'table': str, 'columns': [str], 'partitions': [str], 'types': {col: type}}...]"""
+    out: List[Dict] = []
+    for t in get_table_metadata(database):
+        name = t["Name"]
+        col_defs = t.get("StorageDescriptor", {}).get("Columns", [])
+        part_defs = t.get("PartitionKeys", [])
+        cols = [c["Name"] for c in col_defs]
+        parts = [p["Name"] for p in part_defs]
+        types = {c["Name"]: c.get("Type", "string") for c in col_defs + part_defs}
+        out.append({"table": name, "columns": cols, "partitions": parts, "types": types})
+    return out
+
+def get_partition_values(database: str, table: str) -> List[List[str]]:
+    """Values of every partition of a table (column schemas are not fetched)."""
+    out: List[List[str]] = []
+    paginator = glue_client().get_paginator("get_partitions")
+    for page in paginator.paginate(DatabaseName=database, TableName=table, ExcludeColumnSchema=True):
+        out.extend(p["Values"] for p in page.get("Partitions", []))
+    return out
+
+def get_table_parameters(database: str, table: str) -> Dict[str, str]:
+    """Glue table parameters (crawler sets e.g. 'recordCount', 'averageRecordSize')."""
+    return glue_client().get_table(DatabaseName=database, Name=table)["Table"].get("Parameters", {})
+
+def get_column_statistics(database: str, table: str, columns: List[str]) -> List[Dict]:
+    """Raw Glue ColumnStatistics for `columns` (empty list when none were computed)."""
+    out: List[Dict] = []
+    for i in range(0, len(columns), 100):  # API limit: 100 columns per call
+        resp = glue_client().get_column_statistics_for_table(
+            DatabaseName=database, TableName=table, ColumnNames=columns[i:i + 100]
+        )
+        out.extend(resp.get("ColumnStatisticsList", []))
     return out
@@ -1,26 +1,207 @@
 import json
-from .agent import (
-    clean_llm_output,
-    auto_quote_numeric_table_names,
-    run_sql_via_api,
-    schema_string,
-    ask_bedrock,
-)
-from .glue_catalog import get_tables_and_columns
-from .prompts import SYSTEM, FEWSHOTS
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Tuple
+from .agent import answer_question, schema_string, last_generation_metrics
+from .catalog_watch import watch_catalog, tables_version
+from .glue_catalog import get_tables_and_columns, result_location
+from .column_stats import TableStats, load_stats
+from .executor import get_executor
+from .fewshot import get_library
+from .llm import get_backend
+from .llm_cache import get_llm_cache
+from .semantic_cache import get_semantic_cache
+from .sinks import SinkRecordTooLarge, get_sink
 from .config import settings
 
-def _build_prompt(schema_info: str, question: str) -> str:
-    return (
-        SYSTEM + "\n\n"
-        "Here are some examples:\n"
-        f"{FEWSHOTS}\n\n"
-        f"Schema:\n{schema_info}\n\n"
-        f"Q: {question}\n"
-        "SQL:"
-    )
+# --- Warm-container state ---
+# Module scope lives as long as the execution environment. LLM responses (llm_cache),
+# validated SQL (semantic_cache) and few-shot libraries are already process-wide and
+# bounded by their own settings; the catalog, its stats and rendered schema strings
+# are kept here, bounded by WARM_MAX_DATABASES / WARM_SCHEMA_ENTRIES and refreshed
+# after WARM_CATALOG_TTL_S.
+@dataclass
+class WarmCatalog:
+    tables: List[Dict]
+    table_names: List[str]
+    version: str
+    stats: Dict[str, TableStats]
+    loaded_at: float
+
+_catalogs: "OrderedDict[str, WarmCatalog]" = OrderedDict()
+_schemas: "OrderedDict[Tuple, str]" = OrderedDict()
+_warm_lock = threading.Lock()
+_invocations = 0
+
+def warm_catalog(database: str) -> Tuple[WarmCatalog, bool]:
+    """(catalog, hit) for `database`, loading from Glue when absent or older than the TTL."""
+    with _warm_lock:
+        cat = _catalogs.get(database)
+        if cat is not None and time.time() - cat.loaded_at < settings.warm_catalog_ttl_s:
+            _catalogs.move_to_end(database)
+            return cat, True
+    tables = get_tables_and_columns(database)
+    cat = WarmCatalog(tables=tables, table_names=[t["table"] for t in tables], version=tables_version(tables),
+                      stats=load_stats(database), loaded_at=time.time())
+    if not tables:
+        return cat, False  # don't pin a missing/empty database for the whole TTL
+    watch_catalog(database, cat.version)
+    with _warm_lock:
+        _catalogs[database] = cat
+        _catalogs.move_to_end(database)
+        while len(_catalogs) > settings.warm_max_databases:
+            _catalogs.popitem(last=False)
+    return cat, False
+
+def render_schema(database: str, cat: WarmCatalog, tables: List[Dict]) -> str:
+    """schema_string() memoized per catalog version and table/column selection (LRU)."""
+    key = (database, cat.version, tuple((t["table"], tuple(t["columns"]), tuple(t["partitions"])) for t in tables))
+    with _warm_lock:
+        hit = _schemas.get(key)
+        if hit is not None:
+            _schemas.move_to_end(key)
+            return hit
+    rendered = schema_string(tables, cat.stats)
+    with _warm_lock:
+        _schemas[key] = rendered
+        while len(_schemas) > settings.warm_schema_entries:
+            _schemas.popitem(last=False)
+    return rendered
+
+def warmup(database: str) -> Dict:
+    """Load everything a question needs except the model call; returns per-step milliseconds."""
+    timings: Dict[str, float] = {}
+
+    def step(name, fn):
+        t0 = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            timings[name] = round((time.perf_counter() - t0) * 1000, 1)
+
+    cat, _ = step("catalog", lambda: warm_catalog(database))
+    step("schema", lambda: render_schema(database, cat, cat.tables))
+    if settings.semantic_cache_enabled:
+        step("semantic_cache", get_semantic_cache)
+    if settings.llm_cache_enabled:
+        step("llm_cache", get_llm_cache)
+    if settings.fewshot_retrieval:
+        step("fewshot", lambda: get_library(database))
+    step("llm_client", lambda: get_backend().warm())
+    step("executor", lambda: get_executor().warm())
+    return {"warmed": True, "database": database, "tables": len(cat.tables), "ms": timings}
+
+# Lambda rejects synchronous responses over 6 MB; results from the Query API are already offloaded
+# to S3 above INLINE_RESULT_MAX_BYTES, this catches anything that still isn't (older API, wide rows).
+MAX_RESPONSE_BYTES = 5_500_000
+PREVIEW_ROWS = 100
+
+def _response_body(response: Dict) -> str:
+    body = json.dumps(response)
+    result = response.get("result")
+    if len(body) <= MAX_RESPONSE_BYTES or not isinstance(result, dict) or not result.get("rows"):
+        return body
+    rows = result["rows"]
+    trimmed = dict(result, rows=rows[:PREVIEW_ROWS], truncated=True, row_count=result.get("row_count", len(rows)))
+    if "result_location" not in trimmed:
+        location = result_location(result)
+        if location is not None:
+            trimmed["result_location"] = location
+    return json.dumps(dict(response, result=trimmed))
+
+# --- SQS batches ---
+# Errors worth a redelivery: the model or warehouse was unreachable or throttled, not "no working SQL".
+_TRANSIENT = re.compile(r"HTTP error|throttl|too ?many ?requests|rate exceeded|timed? ?out|service ?unavailable|slow ?down",
+                        re.IGNORECASE)
+
+def _parse_message(body: str) -> Dict:
+    item = json.loads(body)
+    if isinstance(item, str):
+        item = {"question": item}
+    if not isinstance(item, dict) or not item.get("question"):
+        raise ValueError("message has no 'question'")
+    return item
+
+def handle_sqs(event: Dict, context) -> Dict:
+    """Answer every SQS record concurrently; returns {"batchItemFailures": [...]} (ReportBatchItemFailures).
+
+    Model calls and Athena executions are bounded by BATCH_LLM_CONCURRENCY and
+    BATCH_ATHENA_CONCURRENCY. Each answer, successful or not, goes to the sink;
+    a message is reported as failed (and redelivered) only when processing raised,
+    the error looks transient, the sink write failed, or too little of the
+    invocation was left to start it. A record too large for the sink is replaced
+    by an error record, not retried.
+    """
+    records = event["Records"]
+    llm_gate = threading.BoundedSemaphore(settings.batch_llm_concurrency)
+    athena_gate = threading.BoundedSemaphore(settings.batch_athena_concurrency)
+    sink = get_sink()
+
+    def deliver(msg_id: str, index: int, record: Dict) -> bool:
+        try:
+            sink.write(msg_id, record)
+        except SinkRecordTooLarge as e:
+            # the same answer would be too large again: record that and let the message go
+            print(f"[sqs] {msg_id}: record too large for the sink: {e}")
+            return deliver(msg_id, index, {"message_id": msg_id, "index": index, "ok": False,
+                                           "error": f"record too large for the sink: {e}"})
+        except Exception as e:
+            print(f"[sqs] {msg_id}: sink write failed: {type(e).__name__}: {e}")
+            return False
+        return True
+
+    def one(index: int, rec: Dict) -> bool:
+        msg_id = rec["messageId"]
+        if context is not None and context.get_remaining_time_in_millis() < settings.sqs_min_remaining_ms:
+            return False  # hand it back rather than be killed mid-batch (which redelivers everything)
+        try:
+            item = _parse_message(rec["body"])
+        except ValueError as e:
+            # malformed: retrying can't help, so record it and let the message go
+            record = {"message_id": msg_id, "index": index, "ok": False, "error": f"bad message: {e}"}
+        else:
+            record = None
+        if record is not None:
+            return deliver(msg_id, index, record)
+        database = item.get("db") or settings.glue_database
+        try:
+            cat, _ = warm_catalog(database)
+            record = answer_question(item["question"], database, tables=cat.tables, stats=cat.stats,
+                                     log=None, llm_gate=llm_gate, athena_gate=athena_gate)
+        except Exception as e:
+            print(f"[sqs] {msg_id}: {type(e).__name__}: {e}")
+            return False
+        if not record["ok"] and _TRANSIENT.search(record["error"] or ""):
+            print(f"[sqs] {msg_id}: transient failure, will retry: {record['error']}")
+            return False
+        record = {"message_id": msg_id, "index": index, **({"id": item["id"]} if "id" in item else {}), **record}
+        return deliver(msg_id, index, record)
+
+    workers = settings.batch_llm_concurrency + settings.batch_athena_concurrency
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        done = list(pool.map(one, range(len(records)), records))
+    failures = [{"itemIdentifier": rec["messageId"]} for rec, ok in zip(records, done) if not ok]
+    print(f"[sqs] {len(records)} messages, {len(records) - len(failures)} done, {len(failures)} to retry")
+    return {"batchItemFailures": failures}
+
+def _is_sqs(event) -> bool:
+    records = event.get("Records") if isinstance(event, dict) else None
+    return bool(records) and records[0].get("eventSource") == "aws:sqs"
 
 def handler(event, context):
+    global _invocations
+    _invocations += 1
+    if _is_sqs(event):
+        try:
+            return handle_sqs(event, context)
+        except Exception as e:
+            # whole batch goes back to the queue
+            print(f"[sqs] batch failed: {type(e).__name__}: {e}")
+            return {"batchItemFailures": [{"itemIdentifier": r["messageId"]} for r in event["Records"]]}
     try:
         # Parse JSON body from API Gateway
         if "body" in event and isinstance(event["body"], str):
@@ -33,37 +214,49 @@ def handler(event, context):
         question = body.get("question")
         database = body.get("db", settings.glue_database)
 
+        # Scheduled ping ({"warmup": true}): pre-load caches and clients, no LLM call
+        if body.get("warmup"):
+            return {
+                "statusCode": 200,
+                "headers": {"Content-Type": "application/json"},
+                "body": json.dumps(dict(warmup(database), invocations=_invocations))
+            }
+
         if not question:
             return {
                 "statusCode": 400,
                 "body": json.dumps({"error": "Missing 'question' in request body."})
             }
 
-        # Discover schema
-        tables = get_tables_and_columns(database)
-        if not tables:
+        # Discover schema (cached per container)
+        cat, catalog_hit = warm_catalog(database)
+        if not cat.tables:
             return {
                 "statusCode": 400,
                 "body": json.dumps({"error": f"No tables found in Glue database '{database}'."})
             }
-        table_names = [t["table"] for t in tables]
-        schema_info = schema_string(tables)
-
-        # Ask Bedrock → SQL
-        prompt = _build_prompt(schema_info, question)
-        raw_reply = ask_bedrock(prompt)
-        sql = clean_llm_output(raw_reply)
-        sql = auto_quote_numeric_table_names(sql, table_names)
+        warm = {"invocations": _invocations, "catalog_cached": catalog_hit}
 
-        # Run SQL via Query API
-        result = run_sql_via_api(sql, database)
+        # Same pipeline as the CLI and batch runs (semantic cache, retries, candidates, repairs),
+        # on the warm catalog, its stats and the memoized schema rendering
+        record = answer_question(question, database, tables=cat.tables, stats=cat.stats, log=None,
+                                 render=lambda ts: render_schema(database, cat, ts))
+        sql, result = record["sql"], record["result"]
+        if not record["ok"]:
+            # the last attempt's classified errors (Athena's or the validator's)
+            result = {"error": record["error"], "errors": record["errors"]}
 
-        response = {"sql": sql, "result": result}
+        response = {"sql": sql, "result": result, "warm": warm, "attempts": record["attempts"]}
+        if record["semantic_cache"]:
+            response["cached"] = True
+        metrics = last_generation_metrics()
+        if metrics and not record["semantic_cache"]:
+            response["llm"] = asdict(metrics)
 
         return {
             "statusCode": 200,
             "headers": {"Content-Type": "application/json"},
-            "body": json.dumps(response)
+            "body": _response_body(response)
         }
 
     except Exception as e:
@@ -0,0 +1,297 @@
+"""LLM backends: Bedrock and OpenAI-compatible (Ollama, vLLM, OpenAI).
+
+Both expose generate(prompt, params, stream) -> (text, GenerationMetrics) with
+the same generic params (max_tokens, temperature, top_p). Each backend keeps
+one pooled client for the process (keep-alive connections, sized for the
+candidate fan-out), applies connect/read timeouts to every call, and retries
+throttling, 5xx and connection failures with jittered backoff. Retries are
+paid from a shared RetryBudget, so an outage adds a bounded amount of load
+rather than multiplying it.
+
+Streaming stops reading as soon as the first SQL statement is complete.
+"""
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, Optional, Tuple
+
+from .config import settings
+from .sql_utils import SqlStreamDetector
+
+if TYPE_CHECKING:
+    import requests
+
+@dataclass
+class GenerationMetrics:
+    total_ms: float
+    ttft_ms: Optional[float] = None  # time to first generated token
+    sql_ms: Optional[float] = None  # time until a complete SQL statement was seen
+    streamed: bool = False
+    early_stop: bool = False
+    cached: bool = False
+    retries: int = 0
+
+class RetryableError(Exception):
+    """Transient failure (throttling, 5xx, timeout, dropped connection)."""
+
+class RetryBudget:
+    """Token bucket for retries: every call deposits `ratio` tokens, every retry spends one.
+
+    With ratio=0.2, sustained retries are capped at 20% of calls; `reserve` lets a
+    quiet process still retry its first few failures.
+    """
+
+    def __init__(self, ratio: float, reserve: float = 5.0):
+        self.ratio = ratio
+        self.reserve = reserve
+        self.tokens = reserve
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self.tokens = min(self.tokens + self.ratio, self.reserve + 100 * self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+class LLMBackend:
+    name = "base"
+    model_id = ""
+
+    def __init__(self, max_retries: Optional[int] = None, budget: Optional[RetryBudget] = None):
+        self.max_retries = settings.llm_max_retries if max_retries is None else max_retries
+        self.budget = budget or RetryBudget(settings.llm_retry_budget)
+
+    def generate(self, prompt: str, params: Dict, stream: bool = False) -> Tuple[str, GenerationMetrics]:
+        """Generate with retries. Streaming falls back to a plain call if the backend can't stream."""
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                if stream and self.can_stream():
+                    text, metrics = self._stream(prompt, params)
+                else:
+                    text, metrics = self._complete(prompt, params)
+                metrics.retries = attempt
+                return text, metrics
+            except RetryableError:
+                if attempt >= self.max_retries or not self.budget.withdraw():
+                    raise
+                attempt += 1
+                time.sleep(min(0.25 * 2 ** attempt, 4.0) * random.uniform(0.5, 1.0))
+
+    def can_stream(self) -> bool:
+        return True
+
+    def warm(self) -> None:
+        """Create the client (and open a connection where that's free) without generating."""
+
+    def _complete(self, prompt: str, params: Dict) -> Tuple[str, GenerationMetrics]:
+        raise NotImplementedError
+
+    def _stream(self, prompt: str, params: Dict) -> Tuple[str, GenerationMetrics]:
+        raise NotImplementedError
+
+def _read_until_sql(chunks: Iterator[str], close: Callable[[], None], t0: float) -> Tuple[str, GenerationMetrics]:
+    """Consume streamed text until the first statement is complete, then close the stream.
+
+    t0 is when the request was sent, so ttft includes queueing and prompt processing.
+    """
+    detector = SqlStreamDetector()
+    ttft = sql_at = None
+    try:
+        for text in chunks:
+            if ttft is None and text:
+                ttft = time.perf_counter()
+            if detector.feed(text) is not None:
+                sql_at = time.perf_counter()
+                break
+    finally:
+        close()  # on early stop this drops the connection instead of draining the rest
+    end = time.perf_counter()
+    ms = lambda t: (t - t0) * 1000 if t is not None else None
+    return detector.text, GenerationMetrics(
+        total_ms=ms(end), ttft_ms=ms(ttft), sql_ms=ms(sql_at), streamed=True, early_stop=sql_at is not None
+    )
+
+class BedrockBackend(LLMBackend):
+    """Meta Llama models on Bedrock (prompt/generation body format)."""
+    name = "bedrock"
+    _RETRYABLE = {"ThrottlingException", "ServiceUnavailableException", "ModelTimeoutException",
+                  "InternalServerException", "ModelNotReadyException", "ModelStreamErrorException"}
+
+    def __init__(self, model_id: Optional[str] = None, client=None, **kwargs):
+        super().__init__(**kwargs)
+        self.model_id = model_id or settings.bedrock_model_id
+        self._client = client
+        self._client_lock = threading.Lock()
+        self._streaming_denied = False
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    import boto3
+                    from botocore.config import Config
+                    self._client = boto3.client("bedrock-runtime", region_name=settings.aws_region, config=Config(
+                        connect_timeout=settings.llm_connect_timeout_s, read_timeout=settings.llm_timeout_s,
+                        max_pool_connections=settings.llm_pool_size, tcp_keepalive=True,
+                        retries={"max_attempts": 1},  # retries are ours (budgeted), not botocore's
+                    ))
+        return self._client
+
+    def _body(self, prompt: str, params: Dict) -> str:
+        return json.dumps({"prompt": prompt, "max_gen_len": params.get("max_tokens", 500),
+                           "temperature": params.get("temperature", 0.1), "top_p": params.get("top_p", 0.9)})
+
+    def _call(self, fn: Callable, body: str):
+        from botocore.exceptions import ClientError, ConnectionError as BotoConnectionError, ReadTimeoutError
+        try:
+            return fn(modelId=self.model_id, body=body)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in self._RETRYABLE:
+                raise RetryableError(str(e)) from e
+            raise
+        except (BotoConnectionError, ReadTimeoutError) as e:
+            raise RetryableError(str(e)) from e
+
+    def can_stream(self) -> bool:
+        return not self._streaming_denied
+
+    def warm(self) -> None:
+        self.client  # loads the service model and resolves credentials; bedrock-runtime has no free call
+
+    def _complete(self, prompt: str, params: Dict) -> Tuple[str, GenerationMetrics]:
+        t0 = time.perf_counter()
+        response = self._call(self.client.invoke_model, self._body(prompt, params))
+        body = json.loads(response["body"].read())
+        ms = (time.perf_counter() - t0) * 1000
+        return body["generation"], GenerationMetrics(total_ms=ms, ttft_ms=ms, sql_ms=ms)
+
+    def _stream(self, prompt: str, params: Dict) -> Tuple[str, GenerationMetrics]:
+        from botocore.exceptions import ClientError
+        t0 = time.perf_counter()
+        try:
+            response = self._call(self.client.invoke_model_with_response_stream, self._body(prompt, params))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") != "AccessDeniedException":
+                raise
+            # Role lacks bedrock:InvokeModelWithResponseStream; use invoke_model from now on.
+            print(f"[llm] streaming not permitted, falling back to invoke_model: {e}")
+            self._streaming_denied = True
+            return self._complete(prompt, params)
+        stream = response["body"]
+
+        def chunks():
+            from botocore.exceptions import ConnectionError as BotoConnectionError, ReadTimeoutError
+            try:
+                for event in stream:
+                    chunk = event.get("chunk")
+                    if chunk:
+                        yield json.loads(chunk["bytes"]).get("generation", "")
+                        continue
+                    for code, err in event.items():  # error event, e.g. {"throttlingException": {"message": ...}}
+                        raise self._stream_error(code, (err or {}).get("message", ""))
+            except ClientError as e:  # botocore raises EventStreamError for exception events
+                raise self._stream_error(e.response.get("Error", {}).get("Code", ""), str(e)) from e
+            except (BotoConnectionError, ReadTimeoutError) as e:
+                raise RetryableError(str(e)) from e
+        return _read_until_sql(chunks(), stream.close, t0)
+
+    def _stream_error(self, code: str, message: str) -> Exception:
+        """Exception for an error event in a response stream (codes arrive as throttlingException etc.)."""
+        code = code[:1].upper() + code[1:]
+        return (RetryableError if code in self._RETRYABLE else RuntimeError)(f"Bedrock stream {code}: {message}")
+
+class OpenAIBackend(LLMBackend):
+    """OpenAI-compatible /chat/completions (Ollama, vLLM, OpenAI) over a pooled keep-alive session."""
+    name = "openai"
+
+    def __init__(self, base_url: Optional[str] = None, api_key: Optional[str] = None, model: Optional[str] = None,
+                 session: Optional["requests.Session"] = None, **kwargs):
+        import requests  # deferred: only this backend speaks plain HTTP
+        from requests.adapters import HTTPAdapter
+        super().__init__(**kwargs)
+        self.base_url = (base_url or settings.openai_base_url).rstrip("/")
+        self.model_id = model or settings.model
+        self.timeout = (settings.llm_connect_timeout_s, settings.llm_timeout_s)
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.llm_pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Authorization": f"Bearer {api_key or settings.openai_api_key}"})
+
+    def _post(self, payload: Dict, stream: bool) -> "requests.Response":
+        import requests
+        try:
+            r = self.session.post(f"{self.base_url}/chat/completions", json=payload, timeout=self.timeout, stream=stream)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise RetryableError(str(e)) from e
+        if r.status_code != 200:
+            text = r.text  # read before close() hands the connection back to the pool
+            r.close()
+            if r.status_code == 429 or r.status_code >= 500:
+                raise RetryableError(f"HTTP {r.status_code}: {text[:200]}")
+            raise RuntimeError(f"LLM HTTP {r.status_code}: {text[:500]}")
+        return r
+
+    def warm(self) -> None:
+        try:  # opens a pooled keep-alive connection (TLS included) for the first real call
+            self.session.get(f"{self.base_url}/models", timeout=self.timeout).close()
+        except Exception:
+            pass
+
+    def _payload(self, prompt: str, params: Dict, stream: bool) -> Dict:
+        return {"model": self.model_id, "messages": [{"role": "user", "content": prompt}], "stream": stream,
+                "max_tokens": params.get("max_tokens", 500), "temperature": params.get("temperature", 0.1),
+                "top_p": params.get("top_p", 0.9)}
+
+    def _complete(self, prompt: str, params: Dict) -> Tuple[str, GenerationMetrics]:
+        t0 = time.perf_counter()
+        r = self._post(self._payload(prompt, params, False), stream=False)
+        text = r.json()["choices"][0]["message"]["content"] or ""
+        ms = (time.perf_counter() - t0) * 1000
+        return text, GenerationMetrics(total_ms=ms, ttft_ms=ms, sql_ms=ms)
+
+    def _stream(self, prompt: str, params: Dict) -> Tuple[str, GenerationMetrics]:
+        t0 = time.perf_counter()
+        r = self._post(self._payload(prompt, params, True), stream=True)
+
+        def chunks():
+            for line in r.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    return
+                choices = json.loads(data).get("choices") or [{}]
+                yield choices[0].get("delta", {}).get("content") or ""
+        return _read_until_sql(chunks(), r.close, t0)
+
+BACKENDS = {"bedrock": BedrockBackend, "openai": OpenAIBackend}
+
+_backend: Optional[LLMBackend] = None
+_backend_lock = threading.Lock()
+
+def get_backend() -> LLMBackend:
+    """Process-wide backend chosen by LLM_BACKEND (bedrock | openai)."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if settings.llm_backend not in BACKENDS:
+                raise ValueError(f"Unknown LLM_BACKEND '{settings.llm_backend}' (expected one of {', '.join(BACKENDS)})")
+            _backend = BACKENDS[settings.llm_backend]()
+        return _backend
+
+def set_backend(backend: Optional[LLMBackend]) -> None:
+    """Swap the process-wide backend (None resets to the configured one)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
@@ -0,0 +1,145 @@
+"""Content-addressed cache for LLM completions.
+
+Keyed by model id, generation parameters and a hash of the prompt, so only
+byte-identical requests hit. Two tiers: an in-memory LRU for the running
+process and a size-bounded SQLite file in settings.cache_dir shared between
+runs. Only calls at or below settings.llm_cache_max_temperature (default 0)
+with top_p 1 are cached; anything sampled is expected to vary and always goes
+to the model. The agent decodes greedily by default (LLM_TEMPERATURE=0,
+LLM_TOP_P=1), so its retries and repeated questions hit. Callers discard() a completion whose SQL then fails validation or
+execution, so a bad reply is not replayed.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from .catalog_watch import TableIndex
+from .config import settings
+
+def cache_key(model_id: str, params: Dict, prompt: str) -> str:
+    prompt_hash = hashlib.sha256(prompt.encode()).hexdigest()
+    material = json.dumps({"model": model_id, "params": params, "prompt": prompt_hash}, sort_keys=True)
+    return hashlib.sha256(material.encode()).hexdigest()
+
+def is_cacheable(params: Dict) -> bool:
+    """Sampling policy: only greedy generations (no nucleus truncation) are reused."""
+    return (float(params.get("temperature", 1.0)) <= settings.llm_cache_max_temperature
+            and float(params.get("top_p", 1.0)) >= 1.0)
+
+class LLMCache:
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries or settings.llm_cache_max_entries
+        self.max_bytes = max_bytes or settings.llm_cache_max_mb * 1024 * 1024
+        self._mem: "OrderedDict[str, str]" = OrderedDict()
+        self._index = TableIndex()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+        if path is None:
+            os.makedirs(settings.cache_dir, exist_ok=True)
+            path = os.path.join(settings.cache_dir, "llm_cache.sqlite")
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, response TEXT NOT NULL, tables TEXT NOT NULL,"
+            " size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries(last_used)")
+        self._db.commit()
+
+    def _remember(self, key: str, response: str) -> None:
+        self._mem[key] = response
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            old, _ = self._mem.popitem(last=False)
+            self._index.discard(old)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._mem:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return self._mem[key]
+            row = self._db.execute("SELECT response, tables FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            self._remember(key, row[0])
+            self._index.add(key, [t for t in row[1].split(",") if t])
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str, tables: Iterable[str] = ()) -> None:
+        tables = sorted({t.lower() for t in tables})
+        size = len(key) + len(response.encode())
+        with self._lock:
+            self._remember(key, response)
+            self._index.add(key, tables)
+            # Leading/trailing commas make `instr(tables, ',name,')` an exact table match.
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries(key, response, tables, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, response, f",{','.join(tables)},", size, time.time()),
+            )
+            self._evict()
+            self._db.commit()
+
+    def discard(self, key: str) -> bool:
+        """Drop one entry, e.g. a completion whose SQL failed."""
+        with self._lock:
+            self._mem.pop(key, None)
+            self._index.discard(key)
+            cur = self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._db.commit()
+        return cur.rowcount > 0
+
+    def _evict(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used rows until we are back under ~90% of the budget.
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        for key, size in self._db.execute("SELECT key, size FROM entries ORDER BY last_used").fetchall():
+            if freed >= target:
+                break
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._mem.pop(key, None)
+            self._index.discard(key)
+            freed += size
+
+    def invalidate_tables(self, database: str, tables: Iterable[str]) -> int:
+        """Drop entries whose reply referenced any of `tables` (catalog change feed hook)."""
+        tables = [t.lower() for t in tables]
+        with self._lock:
+            for key in self._index.pop(tables):
+                self._mem.pop(key, None)
+            cur = self._db.execute(
+                "DELETE FROM entries WHERE " + " OR ".join("instr(tables, ?) > 0" for _ in tables),
+                [f",{t}," for t in tables],
+            ) if tables else None
+            self._db.commit()
+        return cur.rowcount if cur else 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            self._index = TableIndex()
+            self._db.execute("DELETE FROM entries")
+            self._db.commit()
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+def get_llm_cache() -> LLMCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache()
+        return _cache
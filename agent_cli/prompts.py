@@ -6,29 +6,31 @@ SYSTEM = (
     "If partitions exist (year, month), filter them when appropriate."
 )
 
-FEWSHOTS = """
-Tables:
-- lookup(columns=[locationid, borough, zone, service_zone])
-- "2019"(columns=[tpep_pickup_datetime, tpep_dropoff_datetime, passenger_count, trip_distance, payment_type, pulocationid, dolocationid, fare_amount, total_amount])
+# Validated examples for the NYC taxi tables. They seed every database's few-shot
+# library (see fewshot.py) and are only retrieved when their tables exist.
+SEED_FEWSHOTS = [
+    {
+        "question": "Show 5 rows from lookup.",
+        "sql": "SELECT locationid, borough, zone, service_zone\nFROM lookup\nLIMIT 5;",
+    },
+    {
+        "question": "Count trips per payment type.",
+        "sql": 'SELECT payment_type, COUNT(*) AS trips\nFROM "2019"\nGROUP BY payment_type\nORDER BY trips DESC;',
+    },
+    {
+        "question": "Daily trips for January 2019 (first 10 days), ordered by day.",
+        "sql": (
+            'SELECT date(tpep_pickup_datetime) AS day, COUNT(*) AS trips\nFROM "2019"\n'
+            "WHERE date(tpep_pickup_datetime) BETWEEN DATE '2019-01-01' AND DATE '2019-01-10'\n"
+            "GROUP BY day\nORDER BY day;"
+        ),
+    },
+]
 
-Q: Show 5 rows from lookup.
-SQL:
-SELECT locationid, borough, zone, service_zone
-FROM lookup
-LIMIT 5;
-
-Q: Count trips per payment type.
-SQL:
-SELECT payment_type, COUNT(*) AS trips
-FROM "2019"
-GROUP BY payment_type
-ORDER BY trips DESC;
-
-Q: Daily trips for January 2019 (first 10 days), ordered by day.
-SQL:
-SELECT date(tpep_pickup_datetime) AS day, COUNT(*) AS trips
-FROM "2019"
-WHERE date(tpep_pickup_datetime) BETWEEN DATE '2019-01-01' AND DATE '2019-01-10'
-GROUP BY day
-ORDER BY day;
-""".strip()
+# Static block used when few-shot retrieval is disabled (FEWSHOT_RETRIEVAL=0).
+FEWSHOTS = (
+    "Tables:\n"
+    "- lookup(columns=[locationid, borough, zone, service_zone])\n"
+    '- "2019"(columns=[tpep_pickup_datetime, tpep_dropoff_datetime, passenger_count, trip_distance, payment_type, pulocationid, dolocationid, fare_amount, total_amount])\n\n'
+    + "\n\n".join(f"Q: {e['question']}\nSQL:\n{e['sql']}" for e in SEED_FEWSHOTS)
+)
@@ -0,0 +1,330 @@
+"""Deterministic repairs for common Athena failures.
+
+Athena (and sql_validator) errors are classified into a small set of codes;
+for the frequent, mechanical ones a rule rewrites the statement without
+another model call:
+
+    COLUMN_NOT_FOUND  fuzzy-match the name against the referenced tables' columns
+    TABLE_NOT_FOUND   fuzzy-match the table name against the catalog
+    SYNTAX_ERROR      double-quote numeric table names and reserved-word columns
+    TYPE_MISMATCH     retype literals to the column type, CAST varchar columns
+                      used as timestamps
+
+Only when no rule applies does the caller go back to the LLM, with the
+compact retry_feedback() block rather than an ever-growing question.
+"""
+import difflib
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .config import settings
+from .sql_utils import quote_table_names, referenced_tables
+from .sql_lexer import apply_edits, tokenize
+from .sql_validator import ValidationError, validate_sql
+
+MAX_REPAIRS = 2
+
+_CODES = ("COLUMN_NOT_FOUND", "TABLE_NOT_FOUND", "TYPE_MISMATCH", "SYNTAX_ERROR", "FUNCTION_NOT_FOUND")
+_CODE = re.compile(r"\b(" + "|".join(_CODES) + r")\b")
+_POS = re.compile(r"line (\d+):(\d+)")
+# (code, pattern, what the groups hold: the offending name, two operand types, or a call's argument types)
+_NAMES = [
+    ("COLUMN_NOT_FOUND", re.compile(r"[Cc]olumn '([^']+)' cannot be resolved"), "name"),
+    ("TABLE_NOT_FOUND", re.compile(r"[Tt]able '([^']+)' does not exist"), "name"),
+    ("FUNCTION_NOT_FOUND", re.compile(r"[Ff]unction '([^']+)' not registered"), "name"),
+    ("SYNTAX_ERROR", re.compile(r"(?:mismatched|extraneous) input '([^']*)'"), "name"),
+    ("SYNTAX_ERROR", re.compile(r"no viable alternative at input '([^']*)'"), "name"),
+    ("TYPE_MISMATCH", re.compile(r"Cannot apply operator: (\w+(?:\(\d+\))?) \S+ (\w+(?:\(\d+\))?)"), "operands"),
+    ("TYPE_MISMATCH", re.compile(r"'[^']+' cannot be applied to (\w+(?:\(\d+\))?), (\w+(?:\(\d+\))?)"), "operands"),
+    ("TYPE_MISMATCH", re.compile(r"Unexpected parameters \((.*?)\) for function (\w+)"), "call"),
+]
+
+# Trino reserved words that have to be double-quoted when used as column names.
+RESERVED = set("""
+alter and as between by case cast constraint create cross cube current_date current_time current_timestamp
+current_user deallocate delete describe distinct drop else end escape except execute exists extract false for
+from full group grouping having in inner insert intersect into is join left like localtime localtimestamp
+natural normalize not null on or order outer prepare recursive right rollup select table then true uescape
+union unnest using values when where with
+""".split())
+
+_COMPARE = {"=", "<>", "!=", "<", ">", "<=", ">="}
+_DATE_FUNCS = {"date_trunc", "date_format", "date_add", "date_diff", "day", "day_of_week", "dow", "hour", "minute",
+               "month", "year", "quarter", "week", "day_of_year", "doy", "to_unixtime", "format_datetime"}
+_DATE_LITERAL = re.compile(r"^'\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?'$")
+_BARE_IDENT = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+@dataclass
+class ClassifiedError:
+    code: str  # one of _CODES, or "UNKNOWN"
+    message: str
+    name: Optional[str] = None  # offending column/table/function/token, lowercased
+    line: Optional[int] = None
+    column: Optional[int] = None
+    suggestion: Optional[str] = None
+    types: Tuple[str, ...] = ()  # TYPE_MISMATCH operand types, when reported
+
+    def compact(self) -> str:
+        parts = [self.code]
+        if self.name:
+            parts.append(f"'{self.name}'")
+        if self.types:
+            parts.append("types " + "/".join(self.types))
+        if self.line is not None:
+            parts.append(f"at {self.line}:{self.column}")
+        text = " ".join(parts)
+        if self.suggestion:
+            text += f" (did you mean {self.suggestion}?)"
+        elif self.code == "UNKNOWN":
+            text += f": {self.message[:200]}"
+        return text
+
+@dataclass
+class Repair:
+    sql: str
+    rules: List[str] = field(default_factory=list)
+
+def classify_error(text: str) -> ClassifiedError:
+    """Classify an Athena/Query API error message."""
+    text = str(text)
+    m = _CODE.search(text)
+    code = m.group(1) if m else None
+    err = ClassifiedError(code=code or "UNKNOWN", message=text)
+    pos = _POS.search(text)
+    if pos:
+        err.line, err.column = int(pos.group(1)), int(pos.group(2))
+    for name_code, pattern, groups in _NAMES:
+        m = pattern.search(text)
+        # Engine versions disagree on the code for type errors (SYNTAX_ERROR, FUNCTION_NOT_FOUND);
+        # the message decides.
+        if not m or (code and code != name_code and name_code != "TYPE_MISMATCH"):
+            continue
+        err.code = name_code
+        if groups == "operands":
+            err.types = (m.group(1), m.group(2))
+        elif groups == "call":
+            err.types = tuple(t.strip() for t in re.split(r",\s*(?![^()]*\))", m.group(1)))
+            err.name = m.group(2).lower()
+        else:
+            err.name = m.group(1).lower()
+        break
+    return err
+
+def from_validation(errors: List[ValidationError]) -> List[ClassifiedError]:
+    out = []
+    for e in errors:
+        name = e.token[1:-1] if e.token.startswith('"') else e.token
+        out.append(ClassifiedError(code=e.code, message=e.message, name=name.lower() or None, suggestion=e.suggestion))
+    return out
+
+def retry_feedback(sql: str, errors: List[ClassifiedError]) -> str:
+    """Compact block for the next prompt: the failed statement and its errors (never accumulated)."""
+    lines = "\n".join(f"- {e.compact()}" for e in errors)
+    return f"Previous SQL (failed):\n{sql.strip()}\nErrors:\n{lines}\nReturn a corrected statement."
+
+# --- helpers ---
+def _catalog(tables: List[Dict]) -> Dict[str, Dict]:
+    return {t["table"].lower(): t for t in tables}
+
+def _columns_in_scope(sql: str, tables: List[Dict]) -> Dict[str, str]:
+    """column -> Glue type for the tables the statement references (all tables if none resolve)."""
+    catalog = _catalog(tables)
+    scope = [catalog[t] for t in referenced_tables(sql) if t in catalog] or tables
+    types: Dict[str, str] = {}
+    for t in scope:
+        for c in t["columns"] + t["partitions"]:
+            types.setdefault(c.lower(), t.get("types", {}).get(c, "string").lower())
+    return types
+
+def _ident(name: str) -> str:
+    return name if _BARE_IDENT.match(name) and name not in RESERVED else '"' + name.replace('"', '""') + '"'
+
+def _offset(sql: str, line: Optional[int], column: Optional[int]) -> Optional[int]:
+    if line is None or column is None:
+        return None
+    lines = sql.split("\n")
+    if line > len(lines):
+        return None
+    return sum(len(l) + 1 for l in lines[:line - 1]) + column - 1
+
+def _type_class(t: str) -> str:
+    t = t.lower()
+    if t.startswith(("varchar", "string", "char")):
+        return "string"
+    if t.startswith(("tinyint", "smallint", "int", "bigint", "double", "float", "real", "decimal")):
+        return "number"
+    if t.startswith("timestamp"):
+        return "timestamp"
+    return "date" if t == "date" else "other"
+
+# --- rules ---
+def fix_column(sql: str, err: ClassifiedError, tables: List[Dict]) -> Optional[str]:
+    if not err.name:
+        return None
+    wrong = err.name.split(".")[-1]
+    columns = _columns_in_scope(sql, tables)
+    match = err.suggestion if err.suggestion in columns else None
+    if match is None:
+        close = difflib.get_close_matches(wrong, list(columns), n=1, cutoff=0.75)
+        match = close[0] if close else None
+    if match is None or match == wrong:
+        return None
+    toks = tokenize(sql)
+    edits = [(t.pos, t.end, _ident(match)) for i, t in enumerate(toks)
+             if t.kind in ("ident", "qident") and t.lower == wrong
+             and not (i + 1 < len(toks) and toks[i + 1].text in ("(", "."))]
+    return apply_edits(sql, edits) if edits else None
+
+def fix_table(sql: str, err: ClassifiedError, tables: List[Dict]) -> Optional[str]:
+    if not err.name:
+        return None
+    wrong = err.name.split(".")[-1].strip('"')
+    names = list(_catalog(tables))
+    match = err.suggestion.strip('"') if err.suggestion and err.suggestion.strip('"') in names else None
+    if match is None:
+        close = difflib.get_close_matches(wrong, names, n=1, cutoff=0.75)
+        match = close[0] if close else None
+    if match is None or match == wrong:
+        return None
+    toks = tokenize(sql)
+    edits = [(t.pos, t.end, _ident(match)) for i, t in enumerate(toks)
+             if t.kind in ("ident", "qident") and t.lower == wrong
+             and i > 0 and (toks[i - 1].lower in ("from", "join") or toks[i - 1].text in (".", ","))]
+    return apply_edits(sql, edits) if edits else None
+
+def fix_quoting(sql: str, err: ClassifiedError, tables: List[Dict]) -> Optional[str]:
+    """Quote numeric table names (2019 -> "2019") and reserved-word column names."""
+    columns = _columns_in_scope(sql, tables)
+    at = _offset(sql, err.line, err.column)  # Athena's position refers to the statement as submitted
+    edits = [(t.pos, t.end, _ident(t.lower)) for t in tokenize(sql)
+             if t.kind == "ident" and t.lower in RESERVED and t.lower in columns and (at is None or t.pos == at)]
+    return quote_table_names(apply_edits(sql, edits), [t["table"] for t in tables])
+
+def fix_types(sql: str, err: ClassifiedError, tables: List[Dict]) -> Optional[str]:
+    """Retype literals compared against typed columns; CAST varchar columns used as timestamps."""
+    toks = tokenize(sql)
+    classes = {c: _type_class(t) for c, t in _columns_in_scope(sql, tables).items()}
+    edits: Dict[int, Tuple[int, int, str]] = {}
+
+    def col_at(i: int) -> Optional[str]:
+        t = toks[i] if 0 <= i < len(toks) else None
+        if t is None or t.kind not in ("ident", "qident") or t.lower not in classes:
+            return None
+        if i + 1 < len(toks) and toks[i + 1].text in ("(", "."):
+            return None
+        return t.lower
+
+    def literal(i: int, klass: str) -> None:
+        if not 0 <= i < len(toks):
+            return
+        t = toks[i]
+        typed = i > 0 and toks[i - 1].lower in ("date", "timestamp", "interval")
+        if klass == "string" and t.kind == "number":
+            edits[t.pos] = (t.pos, t.end, f"'{t.text}'")
+        elif klass == "number" and t.kind == "string" and re.match(r"^'-?\d+(\.\d+)?'$", t.text):
+            edits[t.pos] = (t.pos, t.end, t.text[1:-1])
+        elif klass in ("date", "timestamp") and t.kind == "string" and not typed and _DATE_LITERAL.match(t.text):
+            edits[t.pos] = (t.pos, t.end, f"{klass.upper()} {t.text}")
+
+    def typed_literal_after(i: int) -> bool:
+        return i + 1 < len(toks) and toks[i].lower in ("date", "timestamp") and toks[i + 1].kind == "string"
+
+    stack: List[Optional[str]] = []
+    for i, t in enumerate(toks):
+        if t.text == "(":
+            stack.append(toks[i - 1].lower if i > 0 and toks[i - 1].kind == "ident" else None)
+            continue
+        if t.text == ")":
+            if stack:
+                stack.pop()
+            continue
+        col = col_at(i)
+        if col is None:
+            continue
+        klass = classes[col]
+        nxt = toks[i + 1] if i + 1 < len(toks) else None
+        prev = toks[i - 1] if i > 0 else None
+        # varchar holding timestamps: passed to a date function or compared with a DATE/TIMESTAMP literal
+        wrap = klass == "string" and (
+            (stack and stack[-1] in _DATE_FUNCS)
+            or (nxt is not None and nxt.text in _COMPARE and typed_literal_after(i + 2))
+            or (nxt is not None and nxt.lower == "between" and typed_literal_after(i + 2))
+            or (prev is not None and prev.text in _COMPARE and i >= 3 and typed_literal_after(i - 3)))
+        if wrap:
+            if prev is not None and prev.text == ".":
+                start = toks[i - 2].pos
+            else:
+                start = t.pos
+            edits[start] = (start, t.end, f"CAST({sql[start:t.end]} AS timestamp)")
+            continue
+        if nxt is None:
+            continue
+        if nxt.text in _COMPARE:
+            literal(i + 2, klass)
+        elif nxt.lower == "between":
+            literal(i + 2, klass)
+            literal(i + 4, klass)
+        elif nxt.lower in ("in", "not") and i + 2 < len(toks):
+            j = i + 2 if nxt.lower == "in" else i + 3
+            if j < len(toks) and toks[j].text == "(":
+                j += 1
+                while j < len(toks) and toks[j].text != ")":
+                    literal(j, klass)
+                    j += 1
+        if prev is not None and prev.text in _COMPARE:
+            literal(i - 2, klass)
+    return apply_edits(sql, list(edits.values())) if edits else None
+
+RULES: Dict[str, List[Callable[[str, ClassifiedError, List[Dict]], Optional[str]]]] = {
+    "COLUMN_NOT_FOUND": [fix_quoting, fix_column],
+    "TABLE_NOT_FOUND": [fix_quoting, fix_table],
+    "SYNTAX_ERROR": [fix_quoting],
+    "TYPE_MISMATCH": [fix_types],
+}
+
+def repair(sql: str, errors: List[ClassifiedError], tables: List[Dict]) -> Optional[Repair]:
+    """Apply every rule that changes the statement; None when nothing applies."""
+    out = Repair(sql=sql)
+    for err in errors:
+        for rule in RULES.get(err.code, []):
+            fixed = rule(out.sql, err, tables)
+            if fixed and fixed != out.sql:
+                out.sql = fixed
+                out.rules.append(f"{rule.__name__}({err.name or err.code})")
+                break
+    return out if out.rules else None
+
+def check_and_execute(sql: str, tables: List[Dict], execute: Callable[[str], Dict],
+                      errors: Optional[List[ClassifiedError]] = None, max_repairs: int = MAX_REPAIRS,
+                      log: Optional[Callable[[str], None]] = None) -> Tuple[str, Optional[Dict], List[ClassifiedError]]:
+    """Validate, execute and repair until it runs, no rule applies, or max_repairs is spent.
+
+    `errors` seeds the loop with a known failure (e.g. from a rejected candidate) so the
+    statement is repaired before anything is executed. Returns (sql, result, errors); the
+    result is None when the statement was never executed.
+    """
+    log = log or (lambda msg: None)
+    result: Optional[Dict] = None
+    repairs = 0
+    while True:
+        if errors is None:
+            check = validate_sql(sql, tables) if settings.sql_validation else None
+            if check is not None and not check.ok:
+                log(f"[validate] {len(check.errors)} error(s) in {check.elapsed_ms:.2f} ms, not executed\n{check.feedback()}")
+                errors = from_validation(check.errors)
+            else:
+                if check is not None and check.warnings:
+                    log("[validate] " + "; ".join(str(w) for w in check.warnings))
+                result = execute(sql)
+                errors = [classify_error(result["error"])] if "error" in result else []
+                if errors:
+                    log(f"[exec error] {result['error']}")
+        if not errors or repairs >= max_repairs:
+            return sql, result, errors
+        fix = repair(sql, errors, tables)
+        if fix is None:
+            return sql, result, errors
+        repairs += 1
+        log(f"[repair] {', '.join(fix.rules)}\n[Repaired SQL]: {fix.sql}")
+        sql, result, errors = fix.sql, None, None
@@ -0,0 +1,150 @@
+"""Schema linking: keep only the tables and columns a question is likely to need.
+
+Tables and columns are scored against the question with lexical overlap (stemmed
+words, snake_case parts and substrings such as "location" in "pulocationid") and
+embedding similarity. Foreign-key-like column pairs ("pulocationid" -> "locationid")
+pull join partners in. The top tables are then rendered within a token budget:
+whole tables first, then a reduced version (matched, key and partition columns),
+then nothing. Partition columns of every kept table are always kept.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .config import settings
+from .embeddings import embed, normalize_text
+from .tokens import estimate_tokens
+
+_PARTS = re.compile(r"[a-z]+|\d+")
+# Aggregation words still match a column part exactly ("total" -> total_amount) but never as a
+# substring, otherwise "count" would link every table with an "account_*" column.
+_INTENT_WORDS = {"count", "total", "average", "avg", "sum", "max", "min", "number", "top", "daily", "monthly"}
+
+@dataclass
+class LinkedSchema:
+    tables: List[Dict]
+    rendered: str
+    tokens_before: int
+    tokens_after: int
+    total_tables: int
+    total_columns: int
+    scores: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def kept_columns(self) -> int:
+        return sum(len(t["columns"]) + len(t["partitions"]) for t in self.tables)
+
+    @property
+    def cut_ratio(self) -> float:
+        return 1 - self.tokens_after / self.tokens_before if self.tokens_before else 0.0
+
+    def summary(self) -> str:
+        return (f"kept {len(self.tables)}/{self.total_tables} tables, {self.kept_columns}/{self.total_columns} columns, "
+                f"{self.tokens_before} -> {self.tokens_after} tokens (-{self.cut_ratio:.0%})")
+
+def _name_words(name: str) -> Set[str]:
+    return set(normalize_text(" ".join(_PARTS.findall(name.lower()))))
+
+def _lexical(words: Set[str], name: str) -> float:
+    """1 per question word equal to a name part, 0.5 per word (>= 4 chars) buried inside the name."""
+    parts = _name_words(name)
+    flat = name.lower().replace("_", "")
+    score = 0.0
+    for w in words:
+        if len(w) < 2:  # "5 rows" must not link a table named *_5
+            continue
+        if w in parts:
+            score += 1.0
+        elif len(w) >= 4 and w not in _INTENT_WORDS and w in flat:
+            score += 0.5
+    return score
+
+def foreign_keys(tables: List[Dict]) -> List[Tuple[str, str, str, str]]:
+    """(table, column, ref_table, ref_column) for columns named like `<prefix><other table's key>`.
+
+    Keys are `id`-suffixed columns (`locationid`, `vendor_id`); a column in another table
+    that equals or ends with one (`pulocationid`, `dolocationid`) is treated as referencing it.
+    """
+    keys = [(t["table"], c) for t in tables for c in t["columns"] if c.lower().endswith("id") and len(c) > 3]
+    out = []
+    for t in tables:
+        for c in t["columns"]:
+            for ref_table, ref_col in keys:
+                if ref_table != t["table"] and c.lower().endswith(ref_col.lower()):
+                    out.append((t["table"], c, ref_table, ref_col))
+    return out
+
+def _score(question: str, tables: List[Dict]) -> Tuple[Dict[str, float], Dict[str, Dict[str, float]]]:
+    words = set(normalize_text(question))
+    q_vec = embed(question)
+    table_scores: Dict[str, float] = {}
+    col_scores: Dict[str, Dict[str, float]] = {}
+    for t in tables:
+        cols = {c: _lexical(words, c) for c in t["columns"] + t["partitions"]}
+        col_scores[t["table"]] = cols
+        top = sorted(cols.values(), reverse=True)[:3]
+        lexical = 2.0 * _lexical(words, t["table"]) + sum(top)
+        doc = f'{t["table"]} {" ".join(_PARTS.findall(" ".join(t["columns"]).lower()))}'
+        vector = float(np.dot(q_vec, embed(doc)))
+        # Vector similarity only ranks tables that have some lexical evidence, plus a small floor
+        # so that semantically close names still surface when nothing matches literally.
+        table_scores[t["table"]] = lexical + max(vector, 0.0) if lexical else max(vector - 0.2, 0.0)
+    return table_scores, col_scores
+
+def _reduced(t: Dict, cols: Dict[str, float], keep: Set[str]) -> Dict:
+    picked = [c for c in t["columns"] if cols.get(c, 0) > 0 or c in keep]
+    if not picked and t["columns"]:
+        picked = [t["columns"][0]]
+    return {**t, "columns": picked}
+
+def link_schema(question: str, tables: List[Dict], render: Callable[[List[Dict]], str],
+                max_tables: Optional[int] = None, token_budget: Optional[int] = None) -> LinkedSchema:
+    """Prune `tables` (get_tables_and_columns() shape) for `question` and render the result."""
+    max_tables = max_tables or settings.schema_max_tables
+    token_budget = token_budget or settings.schema_token_budget
+    full = render(tables)
+    tokens_before = estimate_tokens(full)
+    total_columns = sum(len(t["columns"]) + len(t["partitions"]) for t in tables)
+
+    table_scores, col_scores = _score(question, tables)
+    fks = foreign_keys(tables)
+    # Join partners: a table the question touches lends part of its score to tables it references
+    # (and vice versa), but only when the partner has some evidence of its own.
+    partners: Dict[str, Set[str]] = {}
+    for a, _, b, _ in fks:
+        if table_scores[a] > 0 and table_scores[b] > 0:
+            partners.setdefault(a, set()).add(b)
+            partners.setdefault(b, set()).add(a)
+    boosted = {name: score + 0.5 * max((table_scores[p] for p in partners.get(name, ())), default=0.0)
+               for name, score in table_scores.items()}
+
+    by_name = {t["table"]: t for t in tables}
+    ranked = sorted(tables, key=lambda t: boosted[t["table"]], reverse=True)
+    # Drop the long tail: anything scoring under a fifth of the best table is noise, not evidence.
+    floor = 0.2 * boosted[ranked[0]["table"]] if ranked else 0.0
+    candidates = [t for t in ranked if boosted[t["table"]] > max(floor, 0.0)][:max_tables] or ranked[:max_tables]
+    chosen_names = {t["table"] for t in candidates}
+    join_cols: Dict[str, Set[str]] = {}
+    for a, ca, b, cb in fks:
+        if a in chosen_names and b in chosen_names:
+            join_cols.setdefault(a, set()).add(ca)
+            join_cols.setdefault(b, set()).add(cb)
+
+    kept: List[Dict] = []
+    for t in candidates:
+        for variant in (t, _reduced(t, col_scores[t["table"]], join_cols.get(t["table"], set()))):
+            if estimate_tokens(render(kept + [variant])) <= token_budget:
+                kept.append(variant)
+                break
+    if not kept and candidates:  # never return an empty schema; the best table, reduced
+        t = candidates[0]
+        kept.append(_reduced(t, col_scores[t["table"]], join_cols.get(t["table"], set())))
+    kept.sort(key=lambda t: tables.index(by_name[t["table"]]))  # stable, catalog order
+
+    rendered = render(kept)
+    return LinkedSchema(
+        tables=kept, rendered=rendered, tokens_before=tokens_before, tokens_after=estimate_tokens(rendered),
+        total_tables=len(tables), total_columns=total_columns, scores=boosted,
+    )
@@ -0,0 +1,298 @@
+"""Semantic question cache: paraphrases of an answered question reuse its validated SQL.
+
+Questions are embedded (see embeddings.embed) into the columns of a
+preallocated NumPy matrix, one matrix per (database, schema version,
+literal_signature). A hit needs an identical signature, so a lookup is one
+column-major vector-matrix product over that shard only. Inserts fill free
+columns (a matrix doubles when full); the least recently used entry is evicted
+across all namespaces beyond settings.semantic_cache_max_entries, and within a
+shard beyond settings.semantic_cache_shard_max, which bounds the lookup cost.
+Entries are appended to a JSONL log in settings.cache_dir and replayed on
+start-up.
+"""
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .catalog_watch import TableIndex
+from .config import settings
+from .embeddings import embed
+from .sql_utils import referenced_tables
+
+_LITERALS = re.compile(
+    r"'[^']*'|\"[^\"]*\"|\d+(?:\.\d+)?|\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\b",
+    re.IGNORECASE,
+)
+# Aggregations, rankings, comparisons and negation, as a canonical word. Applied in
+# order, each match removed before the next, so "at least" is >= rather than min.
+_QUALIFIERS = [(name, re.compile(pattern)) for name, pattern in [
+    (">=", r"\bat least\b|\bno (?:less|fewer) than\b"),
+    ("<=", r"\bat most\b|\bno more than\b|\bup to\b"),
+    ("count", r"\bhow many\b|\b(?:total )?number of\b|\bcount\w*\b"),
+    ("distinct", r"\b(?:distinct|unique|different)\b"),
+    ("max", r"\b(?:max\w*|highest|largest|biggest|longest|most|top|busiest|peak)\b"),
+    ("min", r"\b(?:min\w*|lowest|smallest|shortest|least|fewest|cheapest|bottom)\b"),
+    ("avg", r"\b(?:avg|average|mean)\b"),
+    ("median", r"\b(?:median|percentile|quantile)s?\b"),
+    ("sum", r"\b(?:sum|total)\b"),
+    (">", r"\b(?:more|greater|higher|larger|bigger|longer|above|over|exceed\w*)\b"),
+    ("<", r"\b(?:less|fewer|lower|smaller|shorter|cheaper|below|under)\b"),
+    ("not", r"\b(?:not|no|without|except|excluding)\b"),
+]]
+
+def literal_signature(question: str) -> Tuple[str, ...]:
+    """What paraphrases must agree on exactly, beyond the embedding score.
+
+    Numbers, quoted values and month names ("trips in January" and "trips in
+    February" embed almost identically but need different SQL), plus the
+    aggregation and comparison words ("max fare" is not "average fare").
+    """
+    literals = [m.group(0).lower()[:3] if m.group(0)[0].isalpha() else m.group(0).lower()
+                for m in _LITERALS.finditer(question)]
+    text = _LITERALS.sub(" ", question.lower())
+    qualifiers = set()
+    for name, pattern in _QUALIFIERS:
+        text, n = pattern.subn(" ", text)
+        if n:
+            qualifiers.add(name)
+    return tuple(sorted(literals) + sorted(qualifiers))
+
+@dataclass
+class CacheEntry:
+    question: str
+    sql: str
+    database: str
+    schema_version: str
+    created: float = 0.0
+    last_used: float = 0.0
+    hits: int = 0
+
+@dataclass
+class CacheMatch:
+    entry: CacheEntry
+    score: float
+
+class _Shard:
+    """Entries of one (database, schema version, literal_signature); column i of vecs is entries[i]'s embedding."""
+
+    def __init__(self, dim: int, capacity: int):
+        self.vecs = np.zeros((dim, capacity), dtype=np.float32)  # column-major scan: ~1.5x faster than rows
+        self.used = np.zeros(capacity, dtype=bool)
+        self.entries: List[Optional[CacheEntry]] = [None] * capacity
+        self.free: List[int] = list(range(capacity - 1, -1, -1))  # pop() hands out the lowest column
+        self.high = 0  # columns past this were never used, so scans stop here
+        self.lru: "OrderedDict[int, None]" = OrderedDict()  # columns, least recently used first
+
+    def __len__(self) -> int:
+        return len(self.entries) - len(self.free)
+
+    def take(self) -> int:
+        slot = self.free.pop()
+        self.used[slot] = True
+        self.high = max(self.high, slot + 1)
+        self.lru[slot] = None
+        return slot
+
+    def drop(self, slot: int) -> None:
+        self.vecs[:, slot] = 0  # a zero column scores 0, below any positive threshold
+        self.used[slot] = False
+        self.entries[slot] = None
+        self.free.append(slot)
+        self.lru.pop(slot, None)
+
+    def grow(self, capacity: int) -> None:
+        old = len(self.entries)
+        self.vecs = np.hstack([self.vecs, np.zeros((len(self.vecs), capacity - old), dtype=np.float32)])
+        self.used = np.concatenate([self.used, np.zeros(capacity - old, dtype=bool)])
+        self.entries.extend([None] * (capacity - old))
+        self.free = list(range(capacity - 1, old - 1, -1)) + self.free
+
+Key = Tuple[str, str, str]  # (database, schema version, lowercased question)
+
+class SemanticCache:
+    def __init__(self, dim: Optional[int] = None, threshold: Optional[float] = None,
+                 max_entries: Optional[int] = None, capacity: int = 4, path: Optional[str] = None,
+                 shard_max: Optional[int] = None):
+        self.dim = dim or settings.embedding_dim
+        self.threshold = settings.semantic_cache_threshold if threshold is None else threshold
+        self.max_entries = max_entries or settings.semantic_cache_max_entries
+        # A lookup scans one shard, so this bounds its cost however questions spread over signatures.
+        self.shard_max = min(shard_max or settings.semantic_cache_shard_max, self.max_entries)
+        self.capacity = min(capacity, self.shard_max)  # initial columns per shard
+        self.path = path
+        # A hit needs an identical literal_signature, so each (database, version) is split by
+        # signature and a lookup scans only the one shard that can contain a hit.
+        self._shards: Dict[Tuple[str, str, Tuple[str, ...]], _Shard] = {}
+        self._signatures: Dict[Tuple[str, str], Set[Tuple[str, ...]]] = {}  # namespace -> its shards
+        self._slots: Dict[Key, Tuple[Tuple[str, ...], int]] = {}  # key -> (signature, column in its shard)
+        self._lru: "OrderedDict[Key, None]" = OrderedDict()  # least recently used first, across namespaces
+        self._index = TableIndex()  # keys are "\0".join(key)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _release(self, key: Key) -> None:
+        found = self._slots.pop(key, None)
+        if found is None:
+            return
+        sig, slot = found
+        shard_key = key[:2] + (sig,)
+        shard = self._shards[shard_key]
+        self._lru.pop(key, None)
+        self._index.discard("\0".join(key))
+        shard.drop(slot)
+        if not len(shard):  # e.g. the last entry of a superseded schema version
+            del self._shards[shard_key]
+            sigs = self._signatures[key[:2]]
+            sigs.discard(sig)
+            if not sigs:
+                del self._signatures[key[:2]]
+
+    def insert(self, question: str, sql: str, database: str, schema_version: str, _log: bool = True) -> int:
+        """Add (or refresh) a validated question -> SQL pair; returns its column in its shard."""
+        now = time.time()
+        sig = literal_signature(question)
+        with self._lock:
+            key = (database, schema_version, question.lower())
+            self._release(key)  # a refresh may change the signature (e.g. different casing of a literal)
+            if len(self._slots) >= self.max_entries:
+                self._release(next(iter(self._lru)))
+            shard_key = (database, schema_version, sig)
+            shard = self._shards.get(shard_key)
+            if shard is None:
+                shard = self._shards[shard_key] = _Shard(self.dim, self.capacity)
+                self._signatures.setdefault(key[:2], set()).add(sig)
+            elif len(shard) >= self.shard_max:
+                old = shard.entries[next(iter(shard.lru))]
+                self._release((database, schema_version, old.question.lower()))
+            if not shard.free:
+                shard.grow(min(len(shard.entries) * 2, self.shard_max))
+            slot = shard.take()
+            entry = CacheEntry(question, sql, database, schema_version, created=now, last_used=now)
+            shard.vecs[:, slot] = embed(question, self.dim)
+            shard.entries[slot] = entry
+            self._slots[key] = (sig, slot)
+            self._lru[key] = None
+            self._index.add("\0".join(key), referenced_tables(sql))
+        if _log:
+            self._append(asdict(entry))
+        return slot
+
+    def _append(self, record: Dict) -> None:
+        if self.path:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+    def _search(self, shard: _Shard, q: np.ndarray, k: int, floor: Optional[float] = None) -> List[Tuple[int, float]]:
+        """Top-k (column, score) in one shard, best first, optionally only scores >= floor. Caller holds the lock."""
+        scores = q @ shard.vecs[:, :shard.high]
+        if floor is None or floor <= 0:
+            scores[~shard.used[:shard.high]] = -np.inf
+        if floor is not None:  # usually a handful of columns: cheaper than argpartition over all of them
+            top = np.flatnonzero(scores >= floor)
+            top = top[np.argsort(scores[top])[::-1][:k]]
+        else:
+            k = min(k, len(scores))
+            top = np.argpartition(scores, len(scores) - k)[-k:]
+            top = top[np.argsort(scores[top])[::-1]]
+        return [(int(i), float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+    def search(self, question: str, database: str, schema_version: str, k: int = 5) -> List[CacheMatch]:
+        """Top-k cached entries for the same database + schema version, best first, whatever their signature."""
+        q = embed(question, self.dim)
+        with self._lock:
+            matches = []
+            for sig in self._signatures.get((database, schema_version), ()):
+                shard = self._shards[(database, schema_version, sig)]
+                matches += [CacheMatch(shard.entries[i], score) for i, score in self._search(shard, q, k)]
+        return sorted(matches, key=lambda m: -m.score)[:k]
+
+    def lookup(self, question: str, database: str, schema_version: str) -> Optional[CacheMatch]:
+        """Best match above the threshold whose signature (literals, aggregations, comparisons) agrees."""
+        q = embed(question, self.dim)
+        sig = literal_signature(question)
+        with self._lock:
+            shard = self._shards.get((database, schema_version, sig))
+            if shard is None:
+                return None
+            for slot, score in self._search(shard, q, k=1, floor=self.threshold):
+                entry = shard.entries[slot]
+                entry.hits += 1
+                entry.last_used = time.time()
+                self._lru.move_to_end((database, schema_version, entry.question.lower()))
+                shard.lru.move_to_end(slot)
+                return CacheMatch(entry, score)
+        return None
+
+    def evict(self, question: str, database: str, schema_version: str, _log: bool = True) -> bool:
+        with self._lock:
+            key = (database, schema_version, question.lower())
+            if key not in self._slots:
+                return False
+            self._release(key)
+        if _log:
+            self._append({"evict": question, "database": database, "schema_version": schema_version})
+        return True
+
+    def invalidate_tables(self, database: str, tables: Iterable[str]) -> int:
+        """Catalog change feed hook: drop entries whose SQL reads any of `tables`."""
+        with self._lock:
+            gone = []
+            for k in self._index.pop(tables):
+                key = tuple(k.split("\0", 2))
+                found = self._slots.get(key)
+                if found is None:
+                    continue
+                e = self._shards[key[:2] + (found[0],)].entries[found[1]]
+                if e.database == database:
+                    gone.append(e)
+                    self._release(key)
+                else:  # same table name in another database: keep the entry indexed
+                    self._index.add(k, referenced_tables(e.sql))
+        for e in gone:  # tombstones, so a reload doesn't resurrect them
+            self._append({"evict": e.question, "database": e.database, "schema_version": e.schema_version})
+        return len(gone)
+
+    def load(self) -> None:
+        """Replay the JSONL log (inserts and eviction tombstones) and compact it."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            lines = f.readlines()
+        for line in lines:
+            try:
+                d = json.loads(line)
+            except ValueError:
+                continue
+            if "evict" in d:
+                self.evict(d["evict"], d["database"], d["schema_version"], _log=False)
+            else:
+                self.insert(d["question"], d["sql"], d["database"], d["schema_version"], _log=False)
+        if len(lines) > len(self):
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w") as f:
+                for shard in self._shards.values():
+                    for e in shard.entries:
+                        if e is not None:
+                            f.write(json.dumps(asdict(e)) + "\n")
+            os.replace(tmp, self.path)
+
+_cache: Optional[SemanticCache] = None
+_cache_lock = threading.Lock()
+
+def get_semantic_cache() -> SemanticCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            os.makedirs(settings.cache_dir, exist_ok=True)
+            _cache = SemanticCache(path=os.path.join(settings.cache_dir, "semantic_cache.jsonl"))
+            _cache.load()
+        return _cache
@@ -0,0 +1,133 @@
+"""Where queued (SQS) answers go: SQS_RESULT_SINK.
+
+    log                              one JSON line per result on stdout (CloudWatch Logs)
+    s3://bucket/prefix               one object per result: prefix/<message id>.json
+    https://sqs.<region>.amazonaws.com/<account>/<queue>   one message per result
+
+Sinks raise on failure; the handler then reports the message in
+batchItemFailures so SQS redelivers it, except for SinkRecordTooLarge, which
+no retry can fix.
+"""
+import json
+import threading
+from typing import Dict, Optional
+
+from .config import settings
+from .glue_catalog import result_location
+
+# SQS rejects messages over 256 KB; above this a record's rows are replaced by a link to the full result.
+MAX_SQS_RECORD_BYTES = 200_000
+
+class SinkRecordTooLarge(ValueError):
+    """The record can't be delivered at any size the sink accepts: a permanent failure."""
+
+class Sink:
+    name = "base"
+
+    def write(self, key: str, record: Dict) -> None:
+        raise NotImplementedError
+
+class LogSink(Sink):
+    name = "log"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def write(self, key: str, record: Dict) -> None:
+        line = json.dumps(record, default=str)
+        with self._lock:  # one result per line, even from worker threads
+            print(line, flush=True)
+
+class _AwsSink(Sink):
+    def __init__(self):
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._make_client()
+        return self._client
+
+    def _make_client(self):
+        # Each subclass names its service literally: trim_layer.py keeps only the botocore
+        # models it finds as client("<service>") in the source.
+        raise NotImplementedError
+
+class S3Sink(_AwsSink):
+    name = "s3"
+
+    def __init__(self, uri: str):
+        super().__init__()
+        bucket, _, prefix = uri[len("s3://"):].partition("/")
+        self.bucket, self.prefix = bucket, prefix.strip("/")
+
+    def _make_client(self):
+        import boto3
+        return boto3.client("s3", region_name=settings.aws_region)
+
+    def write(self, key: str, record: Dict) -> None:
+        name = f"{self.prefix}/{key}.json" if self.prefix else f"{key}.json"
+        self.client.put_object(Bucket=self.bucket, Key=name, Body=json.dumps(record, default=str).encode(),
+                               ContentType="application/json")
+
+class SqsSink(_AwsSink):
+    name = "sqs"
+
+    def __init__(self, queue_url: str):
+        super().__init__()
+        self.queue_url = queue_url
+
+    def _make_client(self):
+        import boto3
+        return boto3.client("sqs", region_name=settings.aws_region)
+
+    def write(self, key: str, record: Dict) -> None:
+        body = json.dumps(record, default=str)
+        if len(body.encode()) > MAX_SQS_RECORD_BYTES:
+            body = json.dumps(without_rows(record), default=str)
+            size = len(body.encode())
+            if size > MAX_SQS_RECORD_BYTES:
+                raise SinkRecordTooLarge(f"{size} bytes without rows (limit {MAX_SQS_RECORD_BYTES})")
+        self.client.send_message(QueueUrl=self.queue_url, MessageBody=body)
+
+def without_rows(record: Dict) -> Dict:
+    """`record` with its result rows replaced by row_count and a result_location to fetch them from."""
+    result = record.get("result")
+    if not isinstance(result, dict) or "rows" not in result:
+        return record
+    trimmed = {k: v for k, v in result.items() if k != "rows"}
+    trimmed.update(truncated=True, row_count=result.get("row_count", len(result["rows"])))
+    if "result_location" not in trimmed:
+        location = result_location(result)
+        if location is not None:
+            trimmed["result_location"] = location
+    return dict(record, result=trimmed)
+
+def make_sink(spec: Optional[str] = None) -> Sink:
+    spec = spec or settings.sqs_result_sink
+    if spec == "log":
+        return LogSink()
+    if spec.startswith("s3://"):
+        return S3Sink(spec)
+    if spec.startswith("https://sqs.") or spec.startswith("https://queue."):
+        return SqsSink(spec)
+    raise ValueError(f"Unknown SQS_RESULT_SINK '{spec}' (expected log, s3://bucket/prefix or an SQS queue URL)")
+
+_sink: Optional[Sink] = None
+_sink_lock = threading.Lock()
+
+def get_sink() -> Sink:
+    """Process-wide sink for SQS_RESULT_SINK (kept across warm invocations)."""
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            _sink = make_sink()
+        return _sink
+
+def set_sink(sink: Optional[Sink]) -> None:
+    global _sink
+    with _sink_lock:
+        _sink = sink
@@ -0,0 +1,183 @@
+"""Single-pass SQL lexer shared by the post-processing, validation and repair code.
+
+One compiled alternation walks the text once: string literals, quoted
+identifiers and comments are recognised as whole tokens, so nothing inside
+them is ever mistaken for a table name, keyword or statement terminator.
+Whitespace and comments are dropped; every token keeps its source span, so
+rewrites are done as (start, end, replacement) edits against the original text.
+"""
+import re
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+_TOKEN = re.compile(r"""
+ (?P<ws>\s+)
+|(?P<comment>--[^\n]*|/\*.*?\*/)
+|(?P<string>'(?:[^']|'')*')
+|(?P<qident>"(?:[^"]|"")*")
+|(?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?)
+|(?P<ident>[A-Za-z_][A-Za-z0-9_]*)
+|(?P<op>->|<>|!=|<=|>=|\|\||=>|[(),.;*+\-/%<>=\[\]{}?:|])
+|(?P<bad>.)
+""", re.VERBOSE | re.DOTALL)
+
+# Words after which a relation name follows, and words that end a FROM list.
+_RELATION_START = {"from", "join"}
+_FROM_END = {
+    "where", "group", "order", "having", "limit", "offset", "fetch", "union", "except", "intersect", "window",
+    "on", "using", "inner", "left", "right", "full", "cross", "natural", "select", "tablesample",
+}
+_NOT_TABLES = {"lateral", "unnest", "table", "select", "values"}
+_UNIT_FUNCS = {"extract", "trim", "substring", "position"}  # FROM inside these is not a clause
+
+@dataclass
+class Token:
+    kind: str  # string | qident | number | ident | op | bad
+    text: str
+    pos: int
+    end: int
+
+    @property
+    def lower(self) -> str:
+        """Identifier value as Athena resolves it: unquoted and lowercased."""
+        if self.kind == "qident":
+            return self.text[1:-1].replace('""', '"').lower()
+        return self.text.lower()
+
+    def is_word(self, *words: str) -> bool:
+        return self.kind == "ident" and self.text.lower() in words
+
+    def is_op(self, *ops: str) -> bool:
+        return self.kind == "op" and self.text in ops
+
+def tokenize(sql: str) -> List[Token]:
+    return [Token(m.lastgroup, m.group(), m.start(), m.end())
+            for m in _TOKEN.finditer(sql) if m.lastgroup not in ("ws", "comment")]
+
+def statement_end(text: str, start: int = 0) -> Optional[int]:
+    """Offset just past the first `;` at paren depth 0 (not inside literals or comments), lexing lazily."""
+    depth = 0
+    for m in _TOKEN.finditer(text, start):
+        if m.lastgroup != "op":
+            continue
+        c = m.group()
+        if c == "(":
+            depth += 1
+        elif c == ")":
+            depth = max(depth - 1, 0)
+        elif c == ";" and depth == 0:
+            return m.end()
+    return None
+
+def apply_edits(sql: str, edits: List[Tuple[int, int, str]]) -> str:
+    """Apply non-overlapping (start, end, replacement) edits in one pass."""
+    out, last = [], 0
+    for start, end, text in sorted(edits):
+        out.append(sql[last:start])
+        out.append(text)
+        last = end
+    out.append(sql[last:])
+    return "".join(out)
+
+def skip_parens(toks: List[Token], i: int) -> int:
+    """toks[i] is '('; returns the index just after the matching ')'."""
+    depth = 0
+    for j in range(i, len(toks)):
+        if toks[j].is_op("("):
+            depth += 1
+        elif toks[j].is_op(")"):
+            depth -= 1
+            if depth == 0:
+                return j + 1
+    return len(toks)
+
+def name_run(toks: List[Token], i: int) -> int:
+    """Index of the last token glued to toks[i] without whitespace (`2019_trips` lexes as 2019 + _trips)."""
+    j = i
+    while j + 1 < len(toks) and toks[j + 1].pos == toks[j].end and toks[j + 1].kind in ("ident", "number"):
+        j += 1
+    return j
+
+def is_distinct_from(toks: List[Token], i: int) -> bool:
+    """toks[i] is the FROM of `x IS [NOT] DISTINCT FROM y`, an operator rather than a clause."""
+    if i < 2 or not toks[i - 1].is_word("distinct"):
+        return False
+    return toks[i - 2].is_word("is") or (i >= 3 and toks[i - 2].is_word("not") and toks[i - 3].is_word("is"))
+
+def cte_names(toks: List[Token]) -> List[str]:
+    """Names defined by WITH clauses, at any nesting level."""
+    out = []
+    for i, t in enumerate(toks):
+        if not t.is_word("with"):
+            continue
+        j = i + 2 if i + 1 < len(toks) and toks[i + 1].is_word("recursive") else i + 1
+        while j < len(toks) and toks[j].kind in ("ident", "qident"):
+            name = toks[j].lower
+            j += 1
+            if j < len(toks) and toks[j].is_op("("):
+                j = skip_parens(toks, j)
+            if not (j + 1 < len(toks) and toks[j].is_word("as") and toks[j + 1].is_op("(")):
+                break
+            out.append(name)
+            j = skip_parens(toks, j + 1)
+            if not (j < len(toks) and toks[j].is_op(",")):
+                break
+            j += 1
+    return out
+
+def relations(toks: List[Token]) -> Iterator[Tuple[int, int]]:
+    """(first, last) token index of each qualified relation name after FROM/JOIN.
+
+    Covers comma-separated FROM lists and skips subqueries, table functions
+    (UNNEST(...)) and FROM inside EXTRACT/TRIM/SUBSTRING/POSITION.
+    """
+    stack: List[Tuple[Optional[str], bool]] = []  # (owner function, enclosing in_from) per open paren
+    in_from = False
+    expect = False  # next token starts a relation
+    i, n = 0, len(toks)
+    while i < n:
+        t = toks[i]
+        if t.is_op("("):
+            stack.append((toks[i - 1].lower if i and toks[i - 1].kind == "ident" else None, in_from))
+            in_from = expect = False
+            i += 1
+            continue
+        if t.is_op(")"):
+            if stack:
+                in_from = stack.pop()[1]
+            i += 1
+            continue
+        if t.kind == "ident" and t.lower in _RELATION_START and not (stack and stack[-1][0] in _UNIT_FUNCS) \
+                and not is_distinct_from(toks, i):
+            in_from, expect = t.lower == "from", True
+            i += 1
+            continue
+        if t.kind == "ident" and t.lower in _FROM_END:
+            in_from = expect = False
+        elif in_from and t.is_op(","):
+            expect = True
+            i += 1
+            continue
+        if expect and t.kind in ("ident", "qident", "number") and t.lower not in _NOT_TABLES:
+            first = i
+            last = name_run(toks, i)
+            while last + 2 < n and toks[last + 1].is_op(".") and toks[last + 2].kind in ("ident", "qident", "number"):
+                last = name_run(toks, last + 2)
+            if not (last + 1 < n and toks[last + 1].is_op("(")):
+                yield first, last
+            i = last + 1
+            expect = False
+            continue
+        expect = False
+        i += 1
+
+def relation_name(sql: str, toks: List[Token], first: int, last: int) -> str:
+    """Bare table name (last part, unquoted, lowercased) of a relations() span."""
+    start = first
+    for k in range(last, first - 1, -1):
+        if toks[k].is_op("."):
+            start = k + 1
+            break
+    if toks[start].kind == "qident":
+        return toks[start].lower
+    return sql[toks[start].pos:toks[last].end].lower()
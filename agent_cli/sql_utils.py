@@ -0,0 +1,247 @@
+import hashlib
+import re
+from typing import Iterable, List, Optional, Set
+
+from .sql_lexer import apply_edits, cte_names, relation_name, relations, skip_parens, tokenize
+
+_BARE_IDENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+# Aggregate functions: without OVER they fold a query block into one row per group.
+_AGGREGATES = set("""
+approx_distinct approx_most_frequent approx_percentile approx_set any_value arbitrary array_agg avg bitwise_and_agg
+bitwise_or_agg bool_and bool_or checksum corr count count_if covar_pop covar_samp every geometric_mean histogram
+kurtosis listagg map_agg map_union max max_by min min_by multimap_agg numeric_histogram reduce_agg regr_intercept
+regr_slope skewness stddev stddev_pop stddev_samp sum var_pop var_samp variance
+""".split())
+
+def referenced_tables(sql: str) -> Set[str]:
+    """Unqualified names of the tables a statement reads from, CTE names excluded.
+
+    `"db"."2019"`, `db.lookup` and `lookup l` all resolve to the bare table name,
+    which is how Glue change events (and the caches keyed on them) identify tables.
+    """
+    toks = tokenize(sql)
+    ctes = set(cte_names(toks))
+    out = {relation_name(sql, toks, first, last) for first, last in relations(toks)}
+    return out - ctes
+
+def quote_table_names(sql: str, table_names: Iterable[str]) -> str:
+    """Double-quote table names that are not valid bare identifiers (`FROM 2019` -> `FROM "2019"`).
+
+    Only relation positions are rewritten, so `WHERE year = 2019`, string literals
+    and comments are left alone even when a table is literally named 2019.
+    """
+    needs_quotes = {t.lower(): t for t in table_names if not _BARE_IDENT.match(t)}
+    if not needs_quotes:
+        return sql
+    toks = tokenize(sql)
+    edits = []
+    for first, last in relations(toks):
+        name = relation_name(sql, toks, first, last)
+        start = next((k + 1 for k in range(last, first - 1, -1) if toks[k].is_op(".")), first)
+        if name in needs_quotes and toks[start].kind != "qident":
+            edits.append((toks[start].pos, toks[last].end, f'"{needs_quotes[name]}"'))
+    return apply_edits(sql, edits) if edits else sql
+
+def normalize_sql(sql: str, literals: bool = True) -> str:
+    """Canonical token text: no comments or layout, unquoted identifiers and keywords
+    lowercased, trailing `;` dropped. With literals=False, strings and numbers become `?`."""
+    parts = []
+    for t in tokenize(sql):
+        if t.kind == "ident":
+            parts.append(t.text.lower())
+        elif not literals and t.kind in ("string", "number"):
+            parts.append("?")
+        else:
+            parts.append(t.text)
+    while parts and parts[-1] == ";":
+        parts.pop()
+    return " ".join(parts)
+
+def fingerprint(sql: str, literals: bool = True) -> str:
+    """Stable digest of normalize_sql(); equal for statements that differ only in layout/case."""
+    return hashlib.sha1(normalize_sql(sql, literals).encode()).hexdigest()[:16]
+
+def _aggregates_rows(toks, end: int) -> bool:
+    """The outermost query block returns one row per group (or one row): GROUP BY, an aggregate
+    call outside OVER (...), or no FROM at all."""
+    has_select = has_from = False
+    i = 0
+    while i < end:
+        t = toks[i]
+        if t.is_op("("):
+            j = skip_parens(toks, i)
+            prev = toks[i - 1] if i else None
+            if prev is not None and prev.kind == "ident" and prev.lower in _AGGREGATES \
+                    and not (j < end and toks[j].is_word("over")):
+                return True
+            i = j
+            continue
+        if t.is_word("group") and i + 1 < end and toks[i + 1].is_word("by"):
+            return True
+        has_select = has_select or t.is_word("select")
+        has_from = has_from or t.is_word("from")
+        i += 1
+    return has_select and not has_from
+
+def ensure_limit(sql: str, limit: int) -> str:
+    """Cap the rows a SELECT returns: add `LIMIT n` when the outermost query has none, lower a larger one.
+
+    Statements with a top-level FETCH, aggregates (GROUP BY or an aggregate call in the
+    outermost block, where a cap would silently change the answer), single-row SELECTs
+    without FROM, and anything that isn't a query are returned unchanged.
+    """
+    toks = tokenize(sql)
+    if not toks or not (toks[0].is_word("select", "with") or toks[0].is_op("(")):
+        return sql
+    end = len(toks)
+    while end and toks[end - 1].is_op(";"):
+        end -= 1
+    if not end or _aggregates_rows(toks, end):
+        return sql
+    i = 0
+    while i < end:
+        t = toks[i]
+        if t.is_op("("):
+            i = skip_parens(toks, i)
+            continue
+        if t.is_word("fetch"):
+            return sql
+        if t.is_word("limit") and i + 1 < end:
+            value = toks[i + 1]
+            if value.is_word("all") or (value.kind == "number" and value.text.isdigit() and int(value.text) > limit):
+                return apply_edits(sql, [(value.pos, value.end, str(limit))])
+            return sql
+        i += 1
+    pos = toks[end - 1].end
+    return f"{sql[:pos]}\nLIMIT {limit}{sql[pos:]}"
+
+_STMT_START = re.compile(r"\b(select|with|create|describe|show|explain)\b", re.IGNORECASE)
+_THINK_OPEN, _THINK_CLOSE = "<think>", "</think>"
+
+class SqlStreamDetector:
+    """Incrementally finds the end of the first SQL statement in streamed LLM output.
+
+    feed() scans only newly arrived text plus a few characters of overlap, and
+    the full output is joined only when `text`/`sql` is read, so a long <think>
+    block or preamble costs linear time, not quadratic. <think> blocks are
+    skipped, then the statement starts at the first SQL keyword and ends at a `;`
+    outside strings, quoted identifiers, comments and parentheses, or at a
+    closing code fence. `text` is the output consumed so far, cut at the end of
+    the statement once complete, so clean_llm_output() treats it as before.
+    """
+
+    def __init__(self):
+        self._parts: List[str] = []  # everything fed so far, joined only when text/sql is read
+        self._work = ""  # the not yet scanned remainder (plus one character of context), from offset _off
+        self._off = 0
+        self.pos = 0
+        self.start: Optional[int] = None
+        self.end: Optional[int] = None
+        self.in_think = False
+        self.depth = 0
+        self.quote: Optional[str] = None
+        self.comment: Optional[str] = None
+
+    @property
+    def buf(self) -> str:
+        if len(self._parts) > 1:
+            self._parts[:] = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    @property
+    def done(self) -> bool:
+        return self.end is not None
+
+    @property
+    def text(self) -> str:
+        return self.buf[:self.end] if self.end is not None else self.buf
+
+    @property
+    def sql(self) -> Optional[str]:
+        return self.buf[self.start:self.end].strip() if self.end is not None else None
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """Append streamed text; returns the statement once it is complete."""
+        if self.done:
+            return self.sql
+        self._parts.append(chunk)
+        self._work += chunk
+        if self.start is not None or self._find_start():
+            self._scan()
+        if self.end is None:
+            # Drop what has been scanned, keeping the character before pos for the keyword's \b.
+            cut = max(self.pos - self._off - 1, 0)
+            self._work, self._off = self._work[cut:], self._off + cut
+        return self.sql
+
+    def _find_start(self) -> bool:
+        work, off = self._work, self._off
+        lower, i = work.lower(), self.pos - off
+        while True:
+            if self.in_think:
+                idx = lower.find(_THINK_CLOSE, i)
+                if idx < 0:
+                    self.pos = off + max(i, len(work) - len(_THINK_CLOSE))
+                    return False
+                self.in_think = False
+                i = idx + len(_THINK_CLOSE)
+            think = lower.find(_THINK_OPEN, i)
+            m = _STMT_START.search(work, i)
+            if think >= 0 and (m is None or think < m.start()):
+                self.in_think = True
+                i = think + len(_THINK_OPEN)
+                continue
+            if m is None:
+                # Keep a margin so a keyword or tag split across chunks is still found.
+                self.pos = off + max(i, len(work) - len(_THINK_CLOSE))
+                return False
+            if m.end() == len(work):
+                self.pos = off + i
+                return False  # "select" may still grow into "selection"
+            self.start = self.pos = off + m.start()
+            return True
+
+    def _scan(self) -> None:
+        buf, off = self._work, self._off
+        i, n = self.pos - off, len(buf)
+        while i < n:
+            c = buf[i]
+            nxt = buf[i + 1] if i + 1 < n else None
+            if self.comment == "--":
+                if c == "\n":
+                    self.comment = None
+            elif self.comment == "/*":
+                if c == "*":
+                    if nxt is None:
+                        break
+                    if nxt == "/":
+                        self.comment = None
+                        i += 1
+            elif self.quote:
+                if c == self.quote:
+                    if nxt is None:
+                        break  # '' (escaped quote) or end of the literal: need one more char
+                    if nxt == self.quote:
+                        i += 1
+                    else:
+                        self.quote = None
+            elif c in "'\"":
+                self.quote = c
+            elif c in "-/`" and (nxt is None or (c == "`" and i + 2 >= n)):
+                break  # possible comment opener / fence; wait for the next chunk
+            elif c == "-" and nxt == "-":
+                self.comment = "--"
+            elif c == "/" and nxt == "*":
+                self.comment = "/*"
+            elif c == "`" and buf.startswith("```", i):
+                self.end = off + i
+                return
+            elif c == "(":
+                self.depth += 1
+            elif c == ")":
+                self.depth = max(self.depth - 1, 0)
+            elif c == ";" and self.depth == 0:
+                self.end = off + i + 1
+                return
+            i += 1
+        self.pos = off + i
@@ -0,0 +1,379 @@
+"""In-process SQL pre-validation against the cached catalog.
+
+Catches the failures that dominate the retry loop (unknown columns and tables,
+unquoted numeric table names, unbalanced syntax) in well under a millisecond,
+before paying for an Athena submit-poll-fail cycle. Errors carry the same codes
+Athena uses (COLUMN_NOT_FOUND, TABLE_NOT_FOUND, SYNTAX_ERROR) plus a suggestion
+where one is obvious.
+
+Calls to functions missing from TRINO_FUNCTIONS are reported as
+FUNCTION_NOT_FOUND warnings only: the list can't keep up with every engine
+version, and Athena's own error still reaches the repair loop if the name is
+really wrong.
+
+The checks are deliberately conservative: whenever a name could come from
+somewhere the validator can't see (a CTE, a derived table, UNNEST), column
+checks for unqualified names are skipped rather than risk a false positive.
+"""
+import difflib
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from .sql_lexer import Token, is_distinct_from, name_run, skip_parens, tokenize
+
+KEYWORDS = set("""
+select from where group by having order limit offset fetch first next rows row only with recursive as on using
+join inner left right full outer cross natural lateral union all distinct except intersect and or not in is null
+like ilike escape between case when then else end exists any some true false asc desc nulls last values window
+partition over range unbounded preceding following current filter within tablesample bernoulli system
+interval date time timestamp zone at year quarter month week day hour minute second millisecond
+current_date current_time current_timestamp localtime localtimestamp current_user ties
+show describe explain analyze tables columns schemas databases format type io json text graphviz
+cast try_cast array map row extract trim substring position for leading trailing both
+decimal varchar char integer int bigint smallint tinyint double real boolean varbinary json ipaddress uuid
+grouping sets cube rollup unnest ordinality
+""".split())
+
+# Words that behave like functions syntactically but are not in the function registry.
+_CALLABLE_KEYWORDS = {
+    "in", "exists", "values", "over", "filter", "cast", "try_cast", "row", "array", "map", "extract", "trim",
+    "substring", "position", "unnest", "lateral", "grouping", "sets", "cube", "rollup", "decimal", "varchar",
+    "char", "timestamp", "time", "interval", "using", "on", "and", "or", "not", "when", "then", "else", "as",
+    "select", "from", "join", "any", "some", "all", "with", "where", "by", "date", "window", "tablesample",
+    "bernoulli", "system", "between", "like", "is", "case", "within", "explain", "values", "partition",
+}
+
+TRINO_FUNCTIONS = set("""
+abs acos all_match any_match any_value approx_distinct approx_most_frequent approx_percentile approx_set arbitrary
+array_agg array_distinct array_except array_intersect array_join array_max array_min array_position
+array_remove array_sort array_union arrays_overlap asin at_timezone atan atan2 avg bar beta_cdf bing_tile bit_count
+bitwise_and bitwise_and_agg bitwise_not bitwise_or bitwise_or_agg bitwise_xor bool_and bool_or
+cardinality cbrt ceil ceiling char2hexint checksum chr codepoint coalesce combinations concat concat_ws
+contains contains_sequence corr cos cosh cosine_similarity count count_if covar_pop covar_samp crc32
+cume_dist current_timezone date date_add date_diff date_format date_parse date_trunc day day_of_month
+day_of_week day_of_year degrees dense_rank dow doy e element_at empty_approx_set ends_with every exp
+first_value flatten floor format format_datetime format_number from_base from_base64 from_base64url
+from_big_endian_32 from_big_endian_64 from_hex from_iso8601_date from_iso8601_timestamp
+from_iso8601_timestamp_nanos from_unixtime from_unixtime_nanos from_utf8 geometric_mean greatest
+hamming_distance histogram hmac_md5 hmac_sha1 hmac_sha256 hmac_sha512 hour human_readable_seconds if
+index infinity inverse_beta_cdf inverse_normal_cdf is_finite is_infinite is_json_scalar is_nan
+json_array_contains json_array_get json_array_length json_extract json_extract_scalar json_format
+json_parse json_query json_size json_value kurtosis lag last_day_of_month last_value lead least length
+levenshtein_distance line_locate_point listagg ln localtimestamp log log10 log2 lower lpad ltrim
+luhn_check map_agg map_concat map_entries map_filter map_from_entries map_keys map_union map_values
+map_zip_with max max_by md5 merge millisecond min min_by minute mod month multimap_agg murmur3 nan
+none_match normal_cdf normalize now nth_value ntile nullif numeric_histogram parse_datetime parse_duration
+parse_presto_data_size percent_rank pi pow power quarter radians rand random rank reduce reduce_agg
+regexp_count regexp_extract regexp_extract_all regexp_like regexp_position regexp_replace regexp_split
+regr_intercept regr_slope repeat replace reverse round row_number rpad rtrim second sequence sha1
+sha256 sha512 shuffle sign sin sinh skewness slice soundex split split_part split_to_map
+split_to_multimap spooky_hash_v2_32 spooky_hash_v2_64 sqrt starts_with stddev stddev_pop stddev_samp
+strpos substr sum tan tanh timezone_hour timezone_minute to_base to_base64 to_base64url
+to_big_endian_32 to_big_endian_64 to_char to_date to_hex to_ieee754_32 to_ieee754_64 to_iso8601
+to_milliseconds to_timestamp to_unixtime to_utf8 transform transform_keys transform_values translate
+trim_array truncate try typeof upper url_decode url_encode url_extract_fragment url_extract_host
+url_extract_parameter url_extract_path url_extract_port url_extract_protocol url_extract_query uuid
+value_at_quantile values_at_quantiles var_pop var_samp variance week week_of_year width_bucket
+wilson_interval_lower wilson_interval_upper with_timezone word_stem xxhash64 year year_of_week yow
+zip zip_with st_point st_area st_contains st_distance st_geometryfromtext st_intersects st_x st_y
+""".split())
+
+_CLAUSE_WORDS = {
+    "join", "inner", "left", "right", "full", "outer", "cross", "natural", "on", "using", "where", "group",
+    "order", "having", "limit", "offset", "union", "except", "intersect", "window", "tablesample", "fetch",
+    "lateral",
+}
+_UNIT_FUNCS = {"extract", "trim", "substring", "position"}  # FROM/FOR inside these is not a clause
+
+@dataclass
+class ValidationError:
+    code: str  # COLUMN_NOT_FOUND | TABLE_NOT_FOUND | FUNCTION_NOT_FOUND | SYNTAX_ERROR
+    message: str
+    token: str = ""
+    position: int = -1
+    suggestion: Optional[str] = None
+
+    def __str__(self) -> str:
+        hint = f" (did you mean {self.suggestion}?)" if self.suggestion else ""
+        return f"{self.code}: {self.message}{hint}"
+
+@dataclass
+class ValidationResult:
+    errors: List[ValidationError] = field(default_factory=list)
+    warnings: List[ValidationError] = field(default_factory=list)  # never block execution
+    elapsed_ms: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def feedback(self) -> str:
+        """Compact, one-line-per-error text for the model."""
+        return "\n".join(str(e) for e in self.errors)
+
+def _suggest(name: str, candidates: Set[str]) -> Optional[str]:
+    m = difflib.get_close_matches(name, sorted(candidates), n=1, cutoff=0.6)
+    return m[0] if m else None
+
+class _Validator:
+    def __init__(self, sql: str, tables: List[Dict]):
+        self.sql = sql
+        self.toks = tokenize(sql)
+        self.catalog = {t["table"].lower(): t for t in tables}
+        self.columns = {name: {c.lower() for c in t["columns"] + t["partitions"]} for name, t in self.catalog.items()}
+        self.errors: List[ValidationError] = []
+        self.warnings: List[ValidationError] = []
+        self.consumed: Set[int] = set()  # token indexes already explained (names, aliases)
+        self.ctes: Set[str] = set()
+        self.aliases: Dict[str, Optional[str]] = {}  # alias -> base table (None if derived/opaque)
+        self.column_aliases: Set[str] = set()
+        self.base_tables: Set[str] = set()
+        self.opaque = False  # a relation whose columns we can't know is in scope
+
+    def error(self, code: str, message: str, tok: Optional[Token] = None, suggestion: Optional[str] = None):
+        self.errors.append(ValidationError(code, message, tok.text if tok else "", tok.pos if tok else -1, suggestion))
+
+    def warn(self, code: str, message: str, tok: Token, suggestion: Optional[str] = None):
+        self.warnings.append(ValidationError(code, message, tok.text, tok.pos, suggestion))
+
+    def tok(self, i: int) -> Optional[Token]:
+        return self.toks[i] if 0 <= i < len(self.toks) else None
+
+    def is_word(self, i: int, *words: str) -> bool:
+        t = self.tok(i)
+        return t is not None and t.kind == "ident" and t.lower in words
+
+    def is_op(self, i: int, op: str) -> bool:
+        t = self.tok(i)
+        return t is not None and t.kind == "op" and t.text == op
+
+    def skip_parens(self, i: int) -> int:
+        return skip_parens(self.toks, i)
+
+    # --- structure ---
+    def check_structure(self) -> None:
+        if not self.toks:
+            self.error("SYNTAX_ERROR", "empty statement")
+            return
+        first = self.toks[0]
+        if not (first.kind == "ident" and first.lower in {"select", "with", "show", "describe", "explain", "values"}) \
+                and not self.is_op(0, "("):
+            self.error("SYNTAX_ERROR", f"statement must start with SELECT or WITH, got '{first.text}'", first)
+        depth = 0
+        for i, t in enumerate(self.toks):
+            if t.kind == "bad":
+                kind = {"'": "string literal", '"': "quoted identifier"}.get(t.text, f"character '{t.text}'")
+                msg = f"unterminated {kind}" if t.text in "'\"" else f"unexpected {kind}"
+                self.error("SYNTAX_ERROR", msg, t)
+            elif self.is_op(i, "("):
+                depth += 1
+            elif self.is_op(i, ")"):
+                depth -= 1
+                if depth < 0:
+                    self.error("SYNTAX_ERROR", "unbalanced ')'", t)
+                    depth = 0
+            elif self.is_op(i, ";") and depth == 0 and i < len(self.toks) - 1:
+                self.error("SYNTAX_ERROR", "only one statement is allowed", self.toks[i + 1])
+                break
+        if depth > 0:
+            self.error("SYNTAX_ERROR", f"missing {depth} closing parenthes{'is' if depth == 1 else 'es'}")
+
+    def collect_ctes(self) -> None:
+        if not self.is_word(0, "with"):
+            return
+        i = 2 if self.is_word(1, "recursive") else 1
+        while i < len(self.toks) and self.toks[i].kind in ("ident", "qident"):
+            self.ctes.add(self.toks[i].lower)
+            self.consumed.add(i)
+            i += 1
+            if self.is_op(i, "("):  # column list
+                for j in range(i, self.skip_parens(i)):
+                    self.consumed.add(j)
+                i = self.skip_parens(i)
+            if not self.is_word(i, "as") or not self.is_op(i + 1, "("):
+                return
+            i = self.skip_parens(i + 1)
+            if not self.is_op(i, ","):
+                return
+            i += 1
+
+    # --- relations ---
+    def _relation_name(self, i: int) -> tuple:
+        """Qualified name starting at i -> (last part Token, index after, merged text)."""
+        parts = []
+        while True:
+            t = self.tok(i)
+            if t is None or t.kind not in ("ident", "qident", "number"):
+                break
+            j = name_run(self.toks, i)
+            text = self.sql[t.pos:self.toks[j].end]
+            parts.append((t, text, i, j))
+            i = j + 1
+            if self.is_op(i, ".") and self.tok(i + 1) and self.toks[i + 1].kind in ("ident", "qident", "number"):
+                i += 1
+                continue
+            break
+        return parts, i
+
+    def _alias(self, i: int, table: Optional[str]) -> int:
+        if self.is_word(i, "as"):
+            self.consumed.add(i)
+            i += 1
+        t = self.tok(i)
+        if t and t.kind in ("ident", "qident") and (t.kind == "qident" or (t.lower not in _CLAUSE_WORDS and t.lower not in KEYWORDS)):
+            self.aliases[t.lower] = table
+            self.consumed.add(i)
+            i += 1
+            if self.is_op(i, "("):  # alias column list, e.g. u(v)
+                end = self.skip_parens(i)
+                for j in range(i, end):
+                    if self.toks[j].kind in ("ident", "qident"):
+                        self.column_aliases.add(self.toks[j].lower)
+                    self.consumed.add(j)
+                i = end
+        return i
+
+    def collect_relations(self) -> None:
+        stack: List[Optional[str]] = []  # function name (if any) owning each open paren
+        i = 0
+        while i < len(self.toks):
+            t = self.toks[i]
+            if self.is_op(i, "("):
+                prev = self.tok(i - 1)
+                stack.append(prev.lower if prev and prev.kind == "ident" else None)
+            elif self.is_op(i, ")") and stack:
+                stack.pop()
+            elif t.kind == "ident" and t.lower in ("from", "join") and not (stack and stack[-1] in _UNIT_FUNCS) \
+                    and not is_distinct_from(self.toks, i):
+                i = self._relation_list(i + 1, allow_list=t.lower == "from")
+                continue
+            elif t.kind == "ident" and t.lower == "window" and not self.is_op(i + 1, "("):
+                i = self._window_names(i + 1)
+                continue
+            i += 1
+
+    def _window_names(self, i: int) -> int:
+        """WINDOW w AS (...), v AS (...): the names are valid in OVER w / OVER (w ...)."""
+        while self.tok(i) is not None and self.toks[i].kind in ("ident", "qident") and self.is_word(i + 1, "as") \
+                and self.is_op(i + 2, "("):
+            self.column_aliases.add(self.toks[i].lower)
+            self.consumed.update((i, i + 1))
+            i = self.skip_parens(i + 2)
+            if not self.is_op(i, ","):
+                break
+            i += 1
+        return i
+
+    def _relation_list(self, i: int, allow_list: bool) -> int:
+        while True:
+            if self.is_word(i, "lateral"):
+                i += 1
+            if self.is_op(i, "("):
+                self.opaque = True  # derived table: its tokens are scanned on their own
+                end = self.skip_parens(i)
+                i = self._alias(end, None)
+                # Revisit the subquery body so its own FROM clauses are handled.
+                return i if not allow_list or not self.is_op(i, ",") else self._relation_list(i + 1, True)
+            parts, j = self._relation_name(i)
+            if not parts:
+                return i
+            last_tok, last_text, first_idx, last_idx = parts[-1]
+            if self.is_op(j, "("):  # table function such as UNNEST(...)
+                self.opaque = True
+                i = self._alias(self.skip_parens(j), None)
+            else:
+                for _, _, a, b in parts:
+                    self.consumed.update(range(a, b + 1))
+                self.consumed.update(k for k in range(first_idx, j) if self.is_op(k, "."))
+                name = last_text[1:-1].replace('""', '"').lower() if last_tok.kind == "qident" else last_text.lower()
+                if name in self.ctes:
+                    self.opaque = True
+                    self.aliases[name] = None
+                elif name in self.catalog:
+                    if last_tok.kind != "qident" and not re.match(r"^[A-Za-z_][A-Za-z0-9_]*$", last_text):
+                        self.error("SYNTAX_ERROR", f"table name {last_text} must be double-quoted", last_tok, f'"{last_text}"')
+                    self.base_tables.add(name)
+                    self.aliases[name] = name
+                else:
+                    self.opaque = True  # don't cascade into column errors for a table we can't see
+                    self.error("TABLE_NOT_FOUND", f"table '{name}' does not exist", last_tok,
+                               _suggest(name, set(self.catalog)))
+                i = self._alias(j, name if name in self.catalog else None)
+            if allow_list and self.is_op(i, ","):
+                i += 1
+                continue
+            return i
+
+    # --- expressions ---
+    def collect_aliases(self) -> None:
+        for i, t in enumerate(self.toks):
+            if self.is_op(i, "->") and self.is_op(i - 1, ")"):
+                # (a, b) -> ...: walk back to the opening paren of the parameter list
+                j = i - 2
+                while j >= 0 and not self.is_op(j, "("):
+                    if self.toks[j].kind in ("ident", "qident"):
+                        self.column_aliases.add(self.toks[j].lower)
+                    j -= 1
+            if t.kind not in ("ident", "qident") or i in self.consumed:
+                continue
+            prev = self.tok(i - 1)
+            if prev and prev.kind == "ident" and prev.lower == "as":
+                self.column_aliases.add(t.lower)
+                self.consumed.add(i)
+            elif self.is_op(i + 1, "->"):  # lambda parameter
+                self.column_aliases.add(t.lower)
+            elif (t.kind == "qident" or t.lower not in KEYWORDS) and prev is not None and (
+                    prev.kind in ("qident", "number", "string") or (prev.kind == "op" and prev.text == ")")
+                    or (prev.kind == "ident" and prev.lower not in KEYWORDS)):
+                # implicit alias: `count(*) trips`, `fare_amount fare`, `fare_amount "Fare"`
+                if not self.is_op(i + 1, "(") and not self.is_op(i + 1, "."):
+                    self.column_aliases.add(t.lower)
+                    self.consumed.add(i)
+
+    def check_identifiers(self) -> None:
+        known_columns = set().union(*(self.columns[t] for t in self.base_tables)) if self.base_tables else set()
+        for i, t in enumerate(self.toks):
+            if t.kind not in ("ident", "qident") or i in self.consumed:
+                continue
+            name = t.lower
+            if self.is_op(i + 1, "("):
+                if t.kind == "ident" and name not in TRINO_FUNCTIONS and name not in _CALLABLE_KEYWORDS \
+                        and name not in self.ctes and name not in self.aliases:
+                    self.warn("FUNCTION_NOT_FOUND", f"function '{t.text}' not registered", t,
+                              _suggest(name, TRINO_FUNCTIONS))
+                continue
+            if t.kind == "ident" and name in KEYWORDS:
+                continue
+            if self.is_op(i + 1, "."):  # qualifier; the column after it is checked below
+                continue
+            if self.is_op(i - 1, "."):
+                qual = self.tok(i - 2)
+                base = self.aliases.get(qual.lower) if qual is not None else None
+                if base is not None and name not in self.columns[base]:
+                    self.error("COLUMN_NOT_FOUND", f"column '{qual.text}.{t.text}' cannot be resolved", t,
+                               _suggest(name, self.columns[base]))
+                continue
+            if name in known_columns or name in self.column_aliases or name in self.aliases:
+                continue
+            if self.opaque or not self.base_tables:
+                continue
+            self.error("COLUMN_NOT_FOUND", f"column '{t.text}' cannot be resolved", t, _suggest(name, known_columns))
+
+    def run(self) -> List[ValidationError]:  # warnings are left on self.warnings
+        self.check_structure()
+        if self.errors:  # name resolution on a broken token stream only adds noise
+            return self.errors
+        self.collect_ctes()
+        self.collect_relations()
+        self.collect_aliases()
+        self.check_identifiers()
+        return self.errors
+
+def validate_sql(sql: str, tables: List[Dict]) -> ValidationResult:
+    """Validate one statement against get_tables_and_columns()-shaped catalog data."""
+    t0 = time.perf_counter()
+    v = _Validator(sql.strip(), tables)
+    errors = v.run()
+    return ValidationResult(errors=errors, warnings=v.warnings, elapsed_ms=(time.perf_counter() - t0) * 1000)
@@ -0,0 +1,97 @@
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+_PIECES = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+def estimate_tokens(text: str) -> int:
+    """Rough BPE-style count: ~4 letters per token, 3 digits per token, 1 per symbol.
+
+    Meant for prompt budgets, not billing; needs no tokenizer download or model vocab.
+    """
+    n = 0
+    for piece in _PIECES.findall(text):
+        c = piece[0]
+        if c.isalpha():
+            n += (len(piece) + 3) // 4
+        elif c.isdigit():
+            n += (len(piece) + 2) // 3
+        else:
+            n += 1
+    return n
+
+@dataclass
+class Section:
+    """One block of a prompt. Lower priority numbers are kept first when the budget is tight.
+
+    `split` makes the section trimmable: units (tables, examples) are removed from
+    the end. A required section is never dropped, only trimmed down to its first unit.
+    """
+    name: str
+    body: str
+    priority: int
+    prefix: str = ""
+    suffix: str = ""
+    split: Optional[str] = None
+    required: bool = False
+
+    def render(self, units: Optional[List[str]] = None) -> str:
+        body = self.body if units is None else self.split.join(units)
+        return f"{self.prefix}{body}{self.suffix}" if body else ""
+
+@dataclass
+class PromptBuild:
+    text: str
+    budget: int
+    total_tokens: int
+    tokens: Dict[str, int]  # per section, after fitting
+    dropped: List[str] = field(default_factory=list)
+    trimmed: Dict[str, int] = field(default_factory=dict)  # section -> units removed
+    build_ms: float = 0.0
+
+    @property
+    def over_budget(self) -> bool:
+        return self.total_tokens > self.budget
+
+def fit_sections(sections: List[Section], budget: int) -> PromptBuild:
+    """Join sections in order, trimming then dropping the lowest-priority ones until within budget.
+
+    Whitespace costs no tokens in estimate_tokens, so a section's cost is the sum of
+    its units' (plus separators') costs and trimming never re-estimates the whole text.
+    """
+    t0 = time.perf_counter()
+    units = {s.name: s.body.split(s.split) if s.split and s.body else None for s in sections}
+    costs = {}
+    for s in sections:
+        if units[s.name] is None:
+            costs[s.name] = [estimate_tokens(s.render())]
+        else:
+            sep = estimate_tokens(s.split)
+            costs[s.name] = [estimate_tokens(u) + sep for u in units[s.name]]
+            costs[s.name][0] += estimate_tokens(s.prefix + s.suffix) - sep
+    total = sum(sum(c) for c in costs.values())
+    dropped, trimmed = [], {}
+    for s in sorted(sections, key=lambda s: -s.priority):
+        if total <= budget:
+            break
+        if not s.body:
+            continue
+        c, u = costs[s.name], units[s.name]
+        keep = 1 if s.required else 0
+        if u is not None:
+            while len(c) > max(keep, 1) and total > budget:
+                total -= c.pop()
+                u.pop()
+                trimmed[s.name] = trimmed.get(s.name, 0) + 1
+        if total > budget and not s.required and c:
+            total -= sum(c)
+            costs[s.name] = []
+            dropped.append(s.name)
+            trimmed.pop(s.name, None)
+    parts = [s.render(units[s.name]) for s in sections if s.name not in dropped]
+    return PromptBuild(
+        text="".join(parts), budget=budget, total_tokens=total,
+        tokens={s.name: sum(costs[s.name]) for s in sections}, dropped=dropped, trimmed=trimmed,
+        build_ms=(time.perf_counter() - t0) * 1000,
+    )
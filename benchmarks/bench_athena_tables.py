@@ -0,0 +1,102 @@
+"""Standard query set against Athena tables: engine time and bytes scanned per table layout.
+
+    python -m benchmarks.bench_athena_tables --table 2019 --table yellow_trips_parquet --runs 3
+    python -m benchmarks.bench_athena_tables --table 2019 --output before.json   # seeded with SEED_SPLIT_MB=0
+    python -m benchmarks.bench_athena_tables --table 2019 --output after.json    # re-seeded in parts
+    python -m benchmarks.bench_athena_tables --compare before.json after.json
+
+Runs every query in QUERIES against each --table (same database, same SQL apart
+from the table name) through query_api.athena.run_query, with the Query API's
+workgroup and output location from .env. Reports the median engine time,
+bytes scanned and row count per query, and the totals per table. Needs real AWS
+credentials; each run is billed for the bytes it scans. Athena result reuse is
+off for run_query, so every run scans.
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+# {table} is the only placeholder. Works on the crawled CSV table (timestamps as
+# strings) and on the typed Parquet table alike.
+QUERIES = {
+    "count_by_payment": 'SELECT payment_type, count(*) AS trips FROM "{table}" GROUP BY 1 ORDER BY 1',
+    "fare_by_passengers": 'SELECT passenger_count, avg(fare_amount) AS fare, avg(tip_amount) AS tip '
+                          'FROM "{table}" GROUP BY 1 ORDER BY 1',
+    "daily_revenue": 'SELECT date_trunc(\'day\', CAST(tpep_pickup_datetime AS timestamp)) AS day, '
+                     'sum(total_amount) AS revenue FROM "{table}" GROUP BY 1 ORDER BY 1',
+    "long_trips": 'SELECT count(*) AS trips, avg(total_amount) AS avg_total FROM "{table}" WHERE trip_distance > 20',
+    "top_pickup_zones": 'SELECT z.zone, count(*) AS trips FROM "{table}" t JOIN "lookup" z '
+                        'ON t.pulocationid = z.locationid GROUP BY 1 ORDER BY 2 DESC LIMIT 10',
+    "wide_scan": 'SELECT * FROM "{table}" WHERE tip_amount > 50',
+}
+
+def run(tables, runs, database=None, queries=QUERIES):
+    from query_api.athena import run_query
+    from query_api.config import settings
+    database = database or settings.glue_database
+    rows = []
+    for table in tables:
+        for name, sql in queries.items():
+            samples = []
+            for _ in range(runs):
+                t0 = time.perf_counter()
+                r = run_query(sql.format(table=table), database=database, workgroup=settings.athena_workgroup,
+                              output_s3=settings.athena_output_s3)
+                samples.append({"engine_ms": r.get("engine_ms") or 0, "bytes": r.get("bytes_scanned") or 0,
+                                "wall_ms": (time.perf_counter() - t0) * 1000, "rows": r["row_count"]})
+            rows.append({"table": table, "query": name, "runs": runs,
+                         "engine_ms_p50": round(float(np.median([s["engine_ms"] for s in samples]))),
+                         "wall_ms_p50": round(float(np.median([s["wall_ms"] for s in samples]))),
+                         "mb_scanned": round(samples[-1]["bytes"] / 1e6, 1), "rows": samples[-1]["rows"]})
+    return rows
+
+def compare(old_path: str, new_path: str) -> None:
+    """Per-query engine time and bytes scanned, old -> new, for (table, query) pairs in both files."""
+    with open(old_path) as f:
+        old = {(r["table"], r["query"]): r for r in json.load(f)["rows"]}
+    with open(new_path) as f:
+        new = json.load(f)["rows"]
+    totals = [0, 0]
+    for r in new:
+        a = old.get((r["table"], r["query"]))
+        if a is None:
+            continue
+        totals[0] += a["engine_ms_p50"]
+        totals[1] += r["engine_ms_p50"]
+        print(f"{r['table']:<24} {r['query']:<20} engine {a['engine_ms_p50']:>6} -> {r['engine_ms_p50']:>6} ms  "
+              f"scanned {a['mb_scanned']:>8.1f} -> {r['mb_scanned']:>8.1f} MB")
+    print(f"{'total':<45} engine {totals[0]:>6} -> {totals[1]:>6} ms")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--table", action="append", help="table to run the query set on (repeatable)")
+    ap.add_argument("--database")
+    ap.add_argument("--query", action="append", choices=sorted(QUERIES), help="subset of the query set")
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--output", help="also write the results as JSON (input for --compare)")
+    ap.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    args = ap.parse_args()
+    if args.compare:
+        compare(*args.compare)
+        return
+    if not args.table:
+        ap.error("--table is required")
+    queries = {q: QUERIES[q] for q in args.query} if args.query else QUERIES
+
+    rows = run(args.table, args.runs, args.database, queries)
+    for r in rows:
+        print(json.dumps(r))
+    for table in args.table:
+        mine = [r for r in rows if r["table"] == table]
+        print(f"{table:<28} engine {sum(r['engine_ms_p50'] for r in mine):>7} ms  "
+              f"scanned {sum(r['mb_scanned'] for r in mine):>9.1f} MB  ({len(mine)} queries)")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"), "runs": args.runs,
+                       "rows": rows}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Lambda init-phase cost of the agent: importing the handler in a fresh interpreter.
+
+    python -m benchmarks.bench_cold_start --runs 15
+
+Each run starts a new Python process (like a new execution environment), times
+`import agent_cli.lambda_handler` and records which heavy packages ended up in
+sys.modules. Lazy clients and imports show up as a lower init time and as
+boto3/botocore/requests no longer being loaded before the first event.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from .importtime import ROOT
+
+HEAVY = ("boto3", "botocore", "requests", "numpy", "pydantic")
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+ms = (time.perf_counter() - t0) * 1000
+print(json.dumps({{"ms": ms, "loaded": [m for m in {heavy!r} if m in sys.modules], "modules": len(sys.modules)}}))
+"""
+
+def measure(module: str, runs: int) -> dict:
+    samples = []
+    env = dict(os.environ, AWS_EC2_METADATA_DISABLED="true")  # no IMDS probing outside AWS
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY)], cwd=ROOT, env=env,
+                             capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+    ms = np.array([s["ms"] for s in samples])
+    return {"module": module, "runs": runs, "init_ms_p50": round(float(np.median(ms)), 1),
+            "init_ms_p90": round(float(np.percentile(ms, 90)), 1), "modules": samples[-1]["modules"],
+            "heavy_loaded": samples[-1]["loaded"]}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=15)
+    ap.add_argument("--module", action="append", help="module to import (repeatable)")
+    args = ap.parse_args()
+    for module in args.module or ["agent_cli.lambda_handler"]:
+        print(json.dumps(measure(module, args.runs)))
+
+if __name__ == "__main__":
+    main()
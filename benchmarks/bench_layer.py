@@ -0,0 +1,95 @@
+"""Layer size and init cost: full botocore vs the service-trimmed, precompiled layer.
+
+    python -m benchmarks.bench_layer --layer layer/python --runs 15
+
+Builds three copies of the layer in a temp dir:
+  full, no bytecode     what the checked-in tree gives a read-only /opt
+  full, pip bytecode    timestamp pycs, as `pip install --target` leaves them
+  trimmed               trim_layer.py: used services only, unchecked-hash pycs
+and reports file count, unpacked and zipped size, unzip time, and the init
+duration of a fresh interpreter (-S: only the layer on sys.path) that imports
+boto3 and constructs every client the functions use.
+"""
+import argparse
+import compileall
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+import numpy as np
+
+import trim_layer
+
+_INIT = """
+import sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {site!r})
+import boto3
+s = boto3.Session(region_name="us-east-1", aws_access_key_id="x", aws_secret_access_key="x")
+for name in {services!r}:
+    s.client(name)
+print((time.perf_counter() - t0) * 1000)
+"""
+
+def _files(path):
+    return sum(len(files) for _, _, files in os.walk(path))
+
+def _zip(site, dest):
+    with zipfile.ZipFile(dest, "w", zipfile.ZIP_DEFLATED, compresslevel=9) as z:
+        for base, _, files in os.walk(site):
+            for f in files:
+                full = os.path.join(base, f)
+                z.write(full, os.path.join("python", os.path.relpath(full, site)))
+    return os.path.getsize(dest)
+
+def _unzip_ms(archive, dest):
+    t0 = time.perf_counter()
+    with zipfile.ZipFile(archive) as z:
+        z.extractall(dest)
+    return (time.perf_counter() - t0) * 1000
+
+def _init_ms(site, services, runs):
+    code = _INIT.format(site=site, services=sorted(services))
+    env = dict(os.environ, AWS_EC2_METADATA_DISABLED="true", PYTHONDONTWRITEBYTECODE="1")  # /opt is read-only
+    out = [float(subprocess.run([sys.executable, "-S", "-c", code], env=env, capture_output=True, text=True,
+                                check=True).stdout) for _ in range(runs)]
+    return round(float(np.median(out)), 1), round(float(np.percentile(out, 90)), 1)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--layer", default="layer/python")
+    ap.add_argument("--runs", type=int, default=15)
+    args = ap.parse_args()
+    services = trim_layer.referenced_services() | trim_layer.ALWAYS_KEEP
+
+    with tempfile.TemporaryDirectory() as tmp:
+        variants = {}
+        for name in ("full, no bytecode", "full, pip bytecode", "trimmed"):
+            site = os.path.join(tmp, name.replace(", ", "_").replace(" ", "_"), "python")
+            shutil.copytree(args.layer, site, ignore=shutil.ignore_patterns("__pycache__"))
+            if name == "full, pip bytecode":
+                compileall.compile_dir(site, quiet=1, workers=0)
+            elif name == "trimmed":
+                trim_layer.trim(site, services)
+                trim_layer.precompile(site)
+            variants[name] = site
+
+        rows = []
+        for name, site in variants.items():
+            archive = site + ".zip"
+            zipped = _zip(site, archive)
+            unzip = _unzip_ms(archive, site + "_unzipped")
+            p50, p90 = _init_ms(site, services, args.runs)
+            rows.append({"variant": name, "files": _files(site), "unpacked_mb": round(trim_layer._size(site) / 1e6, 1),
+                         "zip_mb": round(zipped / 1e6, 1), "unzip_ms": round(unzip), "init_ms_p50": p50, "init_ms_p90": p90})
+    print(f"services: {', '.join(sorted(services))}")
+    for r in rows:
+        print(json.dumps(r))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""LLM client latency/throughput against the local mock (no network, no credentials).
+
+    python -m benchmarks.bench_llm --calls 200 --concurrency 8 --handshake-ms 30
+
+Compares the pooled OpenAIBackend with a new connection per call (how the
+Query API client and the old code paths talk HTTP), streaming with early stop
+vs a full completion, and retries against a failing server.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from agent_cli.llm import OpenAIBackend, RetryBudget, RetryableError
+
+from .mock_llm import start
+
+PARAMS = {"max_tokens": 500, "temperature": 0.1, "top_p": 0.9}
+
+def _run(fn, calls, concurrency):
+    lat, errors = [], 0
+
+    def one(_):
+        t = time.perf_counter()
+        try:
+            fn()
+        except RetryableError:
+            return None
+        return (time.perf_counter() - t) * 1e3
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for ms in pool.map(one, range(calls)):
+            if ms is None:
+                errors += 1
+            else:
+                lat.append(ms)
+    wall = time.perf_counter() - t0
+    return lat, errors, wall
+
+def _report(name, lat, errors, wall, calls, extra=""):
+    p = lambda q: np.percentile(lat, q) if lat else float("nan")
+    print(f"{name:<28} {calls / wall:7.1f} calls/s  p50 {p(50):7.1f} ms  p95 {p(95):7.1f} ms  errors {errors}{extra}")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--ttft-ms", type=float, default=20)
+    ap.add_argument("--token-ms", type=float, default=1)
+    ap.add_argument("--handshake-ms", type=float, default=30, help="simulated per-connection setup (TLS)")
+    args = ap.parse_args()
+    prompt = "Count trips per payment type."
+
+    server, url, stats = start(ttft_ms=args.ttft_ms, token_ms=args.token_ms, handshake_ms=args.handshake_ms)
+    backend = OpenAIBackend(base_url=url, api_key="x", model="mock", max_retries=0)
+
+    def unpooled():
+        # one connection per call, as a bare requests.post does
+        with requests.Session() as s:
+            OpenAIBackend(base_url=url, api_key="x", model="mock", session=s, max_retries=0).generate(prompt, PARAMS)
+
+    for name, fn in [
+        ("new connection per call", unpooled),
+        ("pooled, full completion", lambda: backend.generate(prompt, PARAMS, stream=False)),
+        ("pooled, stream + early stop", lambda: backend.generate(prompt, PARAMS, stream=True)),
+    ]:
+        before = stats["connections"]
+        lat, errors, wall = _run(fn, args.calls, args.concurrency)
+        _report(name, lat, errors, wall, args.calls, f"  connections {stats['connections'] - before}")
+    server.shutdown()
+
+    server, url, stats = start(ttft_ms=args.ttft_ms, token_ms=args.token_ms, fail_rate=0.2)
+    for retries in (0, 2):
+        b = OpenAIBackend(base_url=url, api_key="x", model="mock", max_retries=retries, budget=RetryBudget(0.2))
+        before = stats["requests"]
+        lat, errors, wall = _run(lambda: b.generate(prompt, PARAMS), args.calls, args.concurrency)
+        _report(f"20% 503s, max_retries={retries}", lat, errors, wall, args.calls,
+                f"  server requests {stats['requests'] - before}")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
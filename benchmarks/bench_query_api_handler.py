@@ -0,0 +1,84 @@
+"""Per-invocation overhead of the Query API's two Lambda entry points.
+
+    python -m benchmarks.bench_query_api_handler --n 2000
+
+Calls query_api.app.handler (Mangum -> Starlette -> FastAPI -> pydantic) and
+query_api.lambda_handler.handler with the same API Gateway v2 events, in one
+warm process. The engine is replaced by a function that returns a fixed result,
+so the numbers are pure framing cost: event parsing, routing, validation and
+JSON encoding. A second pass runs the real run_query against fake Athena/Glue
+clients. Also reports each module's cold import time in a fresh interpreter.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from .importtime import ROOT
+from .stubs import RESULT, apigw_event, install_fake_aws
+
+SQL = 'SELECT payment_type, count(*) AS trips FROM "2019" GROUP BY 1'
+HANDLERS = ("query_api.app", "query_api.lambda_handler")
+
+class _Context:
+    function_name = "bench"
+    aws_request_id = "bench"
+
+def _time(handler, event, n):
+    ctx = _Context()
+    for _ in range(min(50, n)):  # warm routes, pydantic validators, JSON encoders
+        handler(event, ctx)
+    samples = np.empty(n)
+    for i in range(n):
+        t0 = time.perf_counter()
+        r = handler(event, ctx)
+        samples[i] = (time.perf_counter() - t0) * 1e6
+    assert r["statusCode"] == 200, r
+    return samples
+
+def _summary(samples):
+    return {"p50_us": round(float(np.median(samples)), 1), "p90_us": round(float(np.percentile(samples, 90)), 1),
+            "p99_us": round(float(np.percentile(samples, 99)), 1)}
+
+def _import_ms(module, runs):
+    code = f"import time; t0 = time.perf_counter(); import {module}; print((time.perf_counter() - t0) * 1000)"
+    env = dict(os.environ, AWS_EC2_METADATA_DISABLED="true")
+    out = [float(subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True,
+                                check=True).stdout) for _ in range(runs)]
+    return round(float(np.median(out)), 1)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=2000)
+    ap.add_argument("--import-runs", type=int, default=7)
+    args = ap.parse_args()
+
+    import query_api.app as asgi
+    import query_api.lambda_handler as native
+    modules = dict(zip(HANDLERS, (asgi, native)))
+    events = {"POST /sql": apigw_event("POST", "/sql", {"query": SQL}), "GET /health": apigw_event("GET", "/health")}
+
+    for name in HANDLERS:
+        print(json.dumps({"handler": name, "import_ms_p50": _import_ms(name, args.import_runs)}))
+
+    install_fake_aws()
+    real = {name: m.run_query for name, m in modules.items()}
+    for engine, routes in (("stub", list(events)), ("fake-athena", ["POST /sql"])):
+        for route in routes:
+            event = events[route]
+            base = None
+            for name, m in modules.items():
+                m.run_query = (lambda *a, **k: RESULT) if engine == "stub" else real[name]
+                row = _summary(_time(m.handler, event, args.n))
+                base = base or row["p50_us"]
+                print(json.dumps({"engine": engine, "route": route, "handler": name, **row,
+                                  "speedup_p50": round(base / row["p50_us"], 1)}))
+    for name, m in modules.items():
+        m.run_query = real[name]
+
+if __name__ == "__main__":
+    main()
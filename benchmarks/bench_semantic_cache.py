@@ -0,0 +1,64 @@
+"""Semantic cache lookup latency at catalog-scale entry counts.
+
+    python -m benchmarks.bench_semantic_cache --entries 100000 [--shape segments|shared|single]
+
+A lookup only scans entries with the question's literal_signature, so the cost
+depends on how questions spread over signatures:
+
+    segments  every question carries its own number ("... for segment 42"): tiny shards
+    shared    no literals; signatures come from the verbs only (a handful of large shards)
+    single    no literals or qualifier words: every entry in one shard (worst case)
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from agent_cli.semantic_cache import SemanticCache
+
+_METRICS = ["trips", "fares", "tips", "distance", "passengers", "revenue", "rides"]
+_DIMS = ["payment type", "borough", "zone", "vendor", "hour", "day", "pickup location", "rate code"]
+_VERBS = ["count", "average", "total", "median", "max", "how many"]
+
+def _name(i: int) -> str:
+    out = ""
+    while True:
+        i, r = divmod(i, 26)
+        out += chr(ord("a") + r)
+        if not i:
+            return out
+
+def _question(rng: random.Random, i: int, shape: str = "segments") -> str:
+    if shape == "segments":
+        return f"{rng.choice(_VERBS)} {rng.choice(_METRICS)} by {rng.choice(_DIMS)} for segment {i}"
+    if shape == "shared":
+        return f"{rng.choice(_VERBS)} {rng.choice(_METRICS)} by {rng.choice(_DIMS)} for area {_name(i)}"
+    return f"{rng.choice(_METRICS)} by {rng.choice(_DIMS)} for area {_name(i)}"
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--entries", type=int, default=100_000)
+    ap.add_argument("--lookups", type=int, default=1000)
+    ap.add_argument("--shape", choices=["segments", "shared", "single"], default="segments")
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    cache = SemanticCache(max_entries=args.entries)
+    t0 = time.perf_counter()
+    for i in range(args.entries):
+        cache.insert(_question(rng, i, args.shape), 'SELECT 1 FROM "2019"', "nyc_taxi_db", "v1")
+    insert_s = time.perf_counter() - t0
+
+    lat = []
+    for i in range(args.lookups):
+        q = _question(rng, rng.randrange(args.entries), args.shape)
+        t = time.perf_counter()
+        cache.lookup(q, "nyc_taxi_db", "v1")
+        lat.append((time.perf_counter() - t) * 1e3)
+
+    print(f"shape={args.shape} entries={len(cache)} dim={cache.dim} insert={insert_s / args.entries * 1e6:.1f} us/entry")
+    print(f"lookup p50={np.percentile(lat, 50):.2f} ms p95={np.percentile(lat, 95):.2f} ms p99={np.percentile(lat, 99):.2f} ms")
+
+if __name__ == "__main__":
+    main()
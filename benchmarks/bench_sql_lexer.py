@@ -0,0 +1,75 @@
+"""SQL post-processing cost: per-table regex passes vs the single-pass lexer.
+
+    python -m benchmarks.bench_sql_lexer --tables 5000 --joins 40
+
+The legacy functions are the regex versions agent.py used before sql_lexer.
+"""
+import argparse
+import random
+import re
+import time
+
+from agent_cli.agent import clean_llm_output
+from agent_cli.sql_utils import ensure_limit, fingerprint, quote_table_names, referenced_tables
+
+def _legacy_quote(sql, table_names):
+    patched = sql
+    for t in table_names:
+        if not re.match(r"^[A-Za-z_][A-Za-z0-9_]*$", t):
+            patched = re.sub(rf'(?<!")\b{re.escape(t)}\b(?!")', f'"{t}"', patched)
+    return patched
+
+def _legacy_clean(text):
+    text = re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL | re.IGNORECASE).strip()
+    if "```" in text:
+        for p in text.split("```"):
+            if re.search(r"\b(select|with|create|describe|show)\b", p, flags=re.IGNORECASE):
+                return re.sub(r"^\s*sql", "", p.strip(), flags=re.IGNORECASE)
+    m = re.search(r"(?is)\b(select|with|create|describe|show)\b.*?;", text)
+    return m.group(0).strip() if m else text
+
+def _catalog(n, rng):
+    # A quarter of the names need quoting (year-named tables, dashes), like crawled CSV folders.
+    return [f"{2000 + i % 25}_{i}" if i % 4 == 0 else f"table_{i}" for i in range(n)]
+
+def _reply(tables, joins, rng):
+    picked = rng.sample(tables, joins + 1)
+    sql = f"SELECT t0.c0, count(*) AS n\nFROM {picked[0]} t0\n"
+    for i, t in enumerate(picked[1:], 1):
+        sql += f"JOIN {t} t{i} ON t{i}.id = t{i - 1}.id  -- join {t}\n"
+    sql += "WHERE t0.note <> 'FROM x; SELECT' AND t0.year = 2019\nGROUP BY 1;"
+    think = "<think>" + " ".join(rng.choice(["select", "the", "table", "join", "rows", "filter"]) for _ in range(3000)) + "</think>\n"
+    return think + sql + "\nThis query joins the tables."
+
+def _time(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1e3
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tables", type=int, default=5000)
+    ap.add_argument("--joins", type=int, default=40)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    tables = _catalog(args.tables, rng)
+    reply = _reply(tables, args.joins, rng)
+    sql = clean_llm_output(reply)
+    print(f"tables={len(tables)} reply={len(reply)} chars sql={len(sql)} chars")
+
+    rows = [
+        ("clean_llm_output", lambda: _legacy_clean(reply), lambda: clean_llm_output(reply)),
+        ("quote table names", lambda: _legacy_quote(sql, tables), lambda: quote_table_names(sql, tables)),
+        ("referenced_tables", None, lambda: referenced_tables(sql)),
+        ("fingerprint", None, lambda: fingerprint(sql)),
+        ("ensure_limit", None, lambda: ensure_limit(sql, 1000)),
+    ]
+    for name, legacy, new in rows:
+        before = f"{_time(legacy, args.repeat):8.2f} ms" if legacy else "       -   "
+        print(f"{name:<18} legacy {before}   lexer {_time(new, args.repeat):8.3f} ms")
+
+if __name__ == "__main__":
+    main()
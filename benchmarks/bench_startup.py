@@ -0,0 +1,167 @@
+"""Startup cost of every entry point: cold import, first request served, peak RSS.
+
+    python -m benchmarks.bench_startup --runs 5            # writes benchmarks/results/startup-<commit>.json
+    python -m benchmarks.bench_startup --compare old.json new.json
+
+Each run is a fresh interpreter with an empty COPILOT_CACHE_DIR. It imports the
+entry point (timed), then serves one request against local stand-ins: the mock
+LLM (benchmarks.mock_llm), a stub Query API over HTTP and fake Glue/Athena
+clients (benchmarks.stubs). Nothing leaves the machine.
+
+    query_api.app               POST /sql through the Mangum handler (API Gateway v2 event)
+    query_api.lambda_handler    the same event through the ASGI-free handler
+    agent_cli.agent             answer_question() for one question
+    agent_cli.lambda_handler    handler() with a question event
+    ui/app.py                   first render via streamlit.testing AppTest (lists tables)
+
+Entry points whose dependencies aren't installed are recorded as skipped.
+benchmarks/results/ keeps one reference run, named after the commit it measured
+(a clean checkout of it; a dirty tree is recorded as <commit>-dirty). Re-run the
+harness on your own commit and --compare against it, rather than editing it.
+This module imports only the standard library at top level so it doesn't
+pre-load anything the probes measure.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_POINTS = ["query_api.app", "query_api.lambda_handler", "agent_cli.agent", "agent_cli.lambda_handler", "ui/app.py"]
+QUESTION = "Count trips per payment type."
+SQL = 'SELECT payment_type, count(*) AS trips FROM "2019" GROUP BY 1'
+
+def _rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+def _probe(name: str) -> dict:
+    """Runs inside the fresh interpreter: import, then one request."""
+    t0 = time.perf_counter()
+    try:
+        if name == "ui/app.py":
+            from streamlit.testing.v1 import AppTest
+        else:
+            module = __import__(name, fromlist=["_"])
+    except ImportError as e:
+        return {"status": "skipped", "reason": f"{type(e).__name__}: {e}"}
+    import_ms = (time.perf_counter() - t0) * 1000
+    rss_init = _rss_mb()
+
+    from .stubs import apigw_event, install_fake_aws
+    install_fake_aws()
+    t1 = time.perf_counter()
+    if name in ("query_api.app", "query_api.lambda_handler"):
+        r = module.handler(apigw_event("POST", "/sql", {"query": SQL}), type("Context", (), {})())
+        ok = r["statusCode"] == 200
+    elif name == "agent_cli.agent":
+        ok = module.answer_question(QUESTION, os.environ["GLUE_DATABASE"], log=None)["ok"]
+    elif name == "agent_cli.lambda_handler":
+        r = module.handler({"question": QUESTION}, None)
+        ok = r["statusCode"] == 200 and "error" not in json.loads(r["body"]).get("result", {})
+    else:
+        at = AppTest.from_file(os.path.join(ROOT, "ui", "app.py")).run(timeout=60)
+        ok = not at.exception and not at.error
+    first_ms = (time.perf_counter() - t1) * 1000
+    return {"status": "ok" if ok else "failed", "import_ms": round(import_ms, 1), "first_request_ms": round(first_ms, 1),
+            "ready_ms": round(import_ms + first_ms, 1), "rss_init_mb": round(rss_init, 1),
+            "rss_peak_mb": round(_rss_mb(), 1), "modules": len(sys.modules)}
+
+def _run_probe(name: str, env: dict) -> dict:
+    with tempfile.TemporaryDirectory() as cache:
+        proc = subprocess.run([sys.executable, "-m", "benchmarks.bench_startup", "--probe", name], cwd=ROOT,
+                              env=dict(env, COPILOT_CACHE_DIR=cache), capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"status": "error", "reason": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "exit"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def _median(values):
+    values = sorted(values)
+    mid = len(values) // 2
+    return values[mid] if len(values) % 2 else round((values[mid - 1] + values[mid]) / 2, 1)
+
+def _commit() -> str:
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return f"{sha}-dirty" if dirty else sha or "unknown"
+    except OSError:
+        return "unknown"
+
+def run(entry_points, runs: int) -> dict:
+    from .mock_llm import start
+    from .stubs import start_query_api
+    llm, llm_url, _ = start(ttft_ms=5, token_ms=0)
+    api, api_url = start_query_api()
+    env = dict(os.environ, LLM_BACKEND="openai", OPENAI_BASE_URL=llm_url, OPENAI_API_KEY="bench", LLM_MODEL="mock",
+               QUERY_API_BASE=api_url, SQL_EXECUTOR="http", GLUE_DATABASE="stub", AWS_REGION="us-east-1",
+               AWS_DEFAULT_REGION="us-east-1", AWS_ACCESS_KEY_ID="bench", AWS_SECRET_ACCESS_KEY="bench",
+               AWS_EC2_METADATA_DISABLED="true", PYTHONDONTWRITEBYTECODE="1")
+    env.pop("AWS_PROFILE", None)
+    results = {}
+    try:
+        for name in entry_points:
+            samples = [_run_probe(name, env) for _ in range(runs)]
+            good = [s for s in samples if s["status"] == "ok"]
+            if not good:
+                results[name] = samples[0]
+                continue
+            results[name] = {"status": "ok", "runs": len(good),
+                             **{k: _median([s[k] for s in good]) for k in
+                                ("import_ms", "first_request_ms", "ready_ms", "rss_init_mb", "rss_peak_mb", "modules")}}
+    finally:
+        llm.shutdown()
+        api.shutdown()
+    return {"commit": _commit(), "python": platform.python_version(), "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "runs": runs, "entry_points": results}
+
+def compare(old_path: str, new_path: str) -> None:
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old['commit']} -> {new['commit']}")
+    for name in ENTRY_POINTS:
+        a, b = old["entry_points"].get(name, {}), new["entry_points"].get(name, {})
+        if a.get("status") != "ok" or b.get("status") != "ok":
+            print(f"{name:<26} {a.get('status', '-')} -> {b.get('status', '-')}")
+            continue
+        cells = [f"{k} {a[k]:.0f}->{b[k]:.0f} ({b[k] - a[k]:+.0f})" for k in ("import_ms", "first_request_ms", "rss_peak_mb")]
+        print(f"{name:<26} " + "  ".join(cells))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--entry", action="append", choices=ENTRY_POINTS, help="entry point to measure (repeatable)")
+    ap.add_argument("--output", help="default benchmarks/results/startup-<commit>.json ('-' for stdout only)")
+    ap.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    ap.add_argument("--probe", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.probe:
+        print(json.dumps(_probe(args.probe)))
+        return
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = run(args.entry or ENTRY_POINTS, args.runs)
+    for name, r in report["entry_points"].items():
+        if r["status"] == "ok":
+            print(f"{name:<26} import {r['import_ms']:7.1f} ms  first request {r['first_request_ms']:7.1f} ms  "
+                  f"ready {r['ready_ms']:7.1f} ms  rss {r['rss_init_mb']:.0f} -> {r['rss_peak_mb']:.0f} MB")
+        else:
+            print(f"{name:<26} {r['status']}: {r.get('reason', '')}")
+    if args.output != "-":
+        path = args.output or os.path.join(ROOT, "benchmarks", "results", f"startup-{report['commit']}.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {os.path.relpath(path, ROOT)}")
+
+if __name__ == "__main__":
+    main()
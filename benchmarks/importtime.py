@@ -0,0 +1,70 @@
+"""Import-time report from `python -X importtime`, for cold-start work.
+
+    python -m benchmarks.importtime agent_cli.lambda_handler --top 20
+    python -m benchmarks.importtime agent_cli.lambda_handler --json
+
+Runs the import in a fresh interpreter (so nothing is cached in sys.modules),
+parses the per-module self/cumulative microseconds and prints the slowest
+modules plus a per-package rollup of self time. --json emits the same as one
+object for diffing between commits.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def profile(module: str, python: str = sys.executable) -> List[Dict]:
+    """[{module, self_us, cumulative_us, depth}] in import order, for `import module` in a fresh process."""
+    proc = subprocess.run([python, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            rows.append({"module": m.group(4), "self_us": int(m.group(1)), "cumulative_us": int(m.group(2)),
+                         "depth": (len(m.group(3)) - 1) // 2})
+    return rows
+
+def report(module: str, top: int = 20) -> Dict:
+    rows = profile(module)
+    target = next((r for r in rows if r["module"] == module), None)
+    packages: Dict[str, int] = defaultdict(int)
+    for r in rows:
+        packages[r["module"].split(".")[0]] += r["self_us"]
+    return {
+        "module": module,
+        "total_ms": round(target["cumulative_us"] / 1000, 1) if target else None,
+        "modules": len(rows),
+        "slowest": sorted(rows, key=lambda r: -r["cumulative_us"])[:top],
+        "packages_ms": {k: round(v / 1000, 1) for k, v in sorted(packages.items(), key=lambda kv: -kv[1])[:top]},
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("module")
+    ap.add_argument("--top", type=int, default=20)
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+    r = report(args.module, args.top)
+    if args.json:
+        print(json.dumps(r, indent=2))
+        return
+    print(f"import {r['module']}: {r['total_ms']} ms, {r['modules']} modules")
+    print("\nslowest (cumulative):")
+    for row in r["slowest"]:
+        print(f"  {row['cumulative_us'] / 1000:8.1f} ms  {row['self_us'] / 1000:7.1f} ms self  {'  ' * row['depth']}{row['module']}")
+    print("\nself time by package:")
+    for pkg, ms in r["packages_ms"].items():
+        print(f"  {ms:8.1f} ms  {pkg}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Local OpenAI-compatible mock for offline LLM latency/throughput runs.
+
+    python -m benchmarks.mock_llm --port 8089 --ttft-ms 150 --token-ms 15
+    LLM_BACKEND=openai OPENAI_BASE_URL=http://127.0.0.1:8089/v1 python -m agent_cli.agent --question "..."
+
+POST /v1/chat/completions answers with a fixed SQL statement followed by an
+explanation, streamed (SSE over chunked encoding) or not. HTTP/1.1 keep-alive
+is supported; --handshake-ms charges each new connection once (TLS-like
+setup) and --fail-rate answers a fraction of requests with 503.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SQL = 'SELECT payment_type, COUNT(*) AS trips\nFROM "2019"\nGROUP BY payment_type\nORDER BY trips DESC;'
+EXPLANATION = " This query counts the trips for each payment type and orders them by volume." * 8
+
+def _tokens(text: str):
+    # ~4 characters per token, like the models the agent talks to
+    return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+def make_handler(ttft_ms: float, token_ms: float, handshake_ms: float, fail_rate: float, stats: dict):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # headers and body are separate writes; avoid 40 ms delayed-ACK stalls
+
+        def setup(self):
+            super().setup()
+            stats["connections"] += 1
+            time.sleep(handshake_ms / 1000)
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            stats["requests"] += 1
+            if random.random() < fail_rate:
+                payload = b'{"error": "overloaded"}'
+                self.send_response(503)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+            tokens = _tokens(SQL + EXPLANATION)
+            time.sleep(ttft_ms / 1000)
+            if body.get("stream"):
+                self._stream(tokens)
+            else:
+                time.sleep(token_ms * len(tokens) / 1000)
+                payload = json.dumps({"choices": [{"message": {"role": "assistant", "content": "".join(tokens)}}]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        def _chunk(self, data: bytes):
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+        def _stream(self, tokens):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for tok in tokens:
+                    event = {"choices": [{"delta": {"content": tok}}]}
+                    self._chunk(f"data: {json.dumps(event)}\n\n".encode())
+                    time.sleep(token_ms / 1000)
+                self._chunk(b"data: [DONE]\n\n")
+                self._chunk(b"")
+            except (BrokenPipeError, ConnectionResetError):
+                stats["aborted"] += 1  # client stopped reading early
+                self.close_connection = True
+
+    return Handler
+
+def start(port: int = 0, ttft_ms: float = 150, token_ms: float = 15, handshake_ms: float = 0,
+          fail_rate: float = 0.0):
+    """Start in a background thread; returns (server, base_url, stats)."""
+    stats = {"connections": 0, "requests": 0, "aborted": 0}
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(ttft_ms, token_ms, handshake_ms, fail_rate, stats))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1", stats
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8089)
+    ap.add_argument("--ttft-ms", type=float, default=150)
+    ap.add_argument("--token-ms", type=float, default=15)
+    ap.add_argument("--handshake-ms", type=float, default=0)
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    args = ap.parse_args()
+    server, url, _ = start(args.port, args.ttft_ms, args.token_ms, args.handshake_ms, args.fail_rate)
+    print(f"mock LLM at {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
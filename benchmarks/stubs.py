@@ -0,0 +1,118 @@
+"""Local stand-ins for AWS and the Query API, for benchmarks that must not touch the network.
+
+FakeGlue / FakeAthena mimic the few boto3 calls the code makes and are installed
+into the lazily created client slots (glue_catalog._glue, query_api.athena._clients).
+start_query_api() serves /health, /tables and /sql over HTTP like the real API.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TABLES = [
+    {"Name": "lookup", "StorageDescriptor": {"Columns": [
+        {"Name": "locationid", "Type": "bigint"}, {"Name": "borough", "Type": "string"},
+        {"Name": "zone", "Type": "string"}, {"Name": "service_zone", "Type": "string"}]}, "PartitionKeys": []},
+    {"Name": "2019", "StorageDescriptor": {"Columns": [
+        {"Name": "tpep_pickup_datetime", "Type": "string"}, {"Name": "passenger_count", "Type": "bigint"},
+        {"Name": "trip_distance", "Type": "double"}, {"Name": "payment_type", "Type": "bigint"},
+        {"Name": "pulocationid", "Type": "bigint"}, {"Name": "fare_amount", "Type": "double"},
+        {"Name": "total_amount", "Type": "double"}]}, "PartitionKeys": []},
+]
+COLUMNS = ["payment_type", "trips"]
+ROWS = [["1", "4912345"], ["2", "2213456"], ["3", "31234"], ["4", "12345"]]
+
+RESULT = {
+    "columns": COLUMNS, "schema": [{"name": "payment_type", "type": "bigint"}, {"name": "trips", "type": "bigint"}],
+    "rows": [dict(zip(COLUMNS, r)) for r in ROWS], "row_count": len(ROWS), "truncated": False,
+    "bytes_scanned": 1024, "engine_ms": 300, "output": "s3://stub/results/q.csv", "query_execution_id": "q",
+}
+
+class _Paginator:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def paginate(self, **kwargs):
+        return iter(self.pages)
+
+class FakeGlue:
+    def get_paginator(self, name):
+        if name == "get_tables":
+            return _Paginator([{"TableList": TABLES}])
+        return _Paginator([{"Partitions": []}])
+
+    def get_table(self, DatabaseName, Name):
+        return {"Table": {"Parameters": {}}}
+
+    def get_column_statistics_for_table(self, **kwargs):
+        return {"ColumnStatisticsList": []}
+
+class FakeAthena:
+    def start_query_execution(self, **kwargs):
+        return {"QueryExecutionId": "q"}
+
+    def get_query_execution(self, QueryExecutionId):
+        return {"QueryExecution": {"Status": {"State": "SUCCEEDED"},
+                                   "Statistics": {"DataScannedInBytes": 1024, "EngineExecutionTimeInMillis": 300},
+                                   "ResultConfiguration": {"OutputLocation": "s3://stub/results/q.csv"}}}
+
+    def get_query_results(self, QueryExecutionId, **kwargs):
+        rows = [COLUMNS] + ROWS
+        return {"ResultSet": {"ResultSetMetadata": {"ColumnInfo": [{"Name": "payment_type", "Type": "bigint"},
+                                                                   {"Name": "trips", "Type": "bigint"}]},
+                              "Rows": [{"Data": [{"VarCharValue": v} for v in r]} for r in rows]}}
+
+def apigw_event(method: str, path: str, body: dict | None = None, query: dict | None = None) -> dict:
+    """API Gateway HTTP API (payload v2.0) event, as Lambda delivers it."""
+    return {
+        "version": "2.0", "routeKey": f"{method} {path}", "rawPath": path,
+        "rawQueryString": "&".join(f"{k}={v}" for k, v in (query or {}).items()),
+        "queryStringParameters": query,
+        "headers": {"content-type": "application/json", "host": "localhost"},
+        "requestContext": {"http": {"method": method, "path": path, "sourceIp": "127.0.0.1", "protocol": "HTTP/1.1",
+                                    "userAgent": "bench"}, "stage": "$default", "requestId": "bench",
+                           "routeKey": f"{method} {path}", "accountId": "0", "apiId": "bench",
+                           "domainName": "localhost", "domainPrefix": "localhost", "time": "", "timeEpoch": 0},
+        "body": json.dumps(body) if body is not None else None, "isBase64Encoded": False,
+    }
+
+def install_fake_aws() -> None:
+    """Point the agent's and the Query API's lazy AWS clients at the fakes."""
+    import agent_cli.glue_catalog as glue_catalog
+    glue_catalog._glue = FakeGlue()
+    try:
+        import query_api.athena as athena
+        athena._clients.update(athena=FakeAthena(), glue=FakeGlue())
+    except ImportError:
+        pass
+
+class _QueryApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith("/tables"):
+            self._send({"database": "stub", "tables": [t["Name"] for t in TABLES]})
+        else:
+            self._send({"ok": True})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._send(RESULT)
+
+def start_query_api(port: int = 0):
+    """Stub Query API in a background thread; returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), _QueryApiHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
@@ -4,6 +4,18 @@ set -e
 LAYER_DIR="layer"
 PYTHON_VERSION="3.11"
 DOCKER_IMAGE="public.ecr.aws/lambda/python:${PYTHON_VERSION}"
+# TRIM=1 keeps only the botocore service models the code uses, precompiles
+# bytecode for the runtime's Python and verifies every client still loads
+# (see trim_layer.py). EXTRA_SERVICES="sqs sns" keeps more.
+TRIM="${TRIM:-0}"
+EXTRA_SERVICES="${EXTRA_SERVICES:-}"
+
+TRIM_CMD=""
+if [ "$TRIM" = "1" ]; then
+  TRIM_ARGS="--import fastapi --import mangum --import pydantic"
+  for s in $EXTRA_SERVICES; do TRIM_ARGS="$TRIM_ARGS --service $s"; done
+  TRIM_CMD="&& python /var/task/trim_layer.py /var/task/$LAYER_DIR/python $TRIM_ARGS"
+fi
 
 # Clean old builds
 rm -rf $LAYER_DIR layer.zip
@@ -19,7 +31,8 @@ docker run --rm -v "$PWD":/var/task --entrypoint /bin/bash $DOCKER_IMAGE -c "
     pydantic \
     boto3 \
     requests \
-    --target /var/task/$LAYER_DIR/python --upgrade
+    --target /var/task/$LAYER_DIR/python --upgrade \
+  $TRIM_CMD
 "
 
 # Package into zip
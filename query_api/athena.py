@@ -1,19 +1,100 @@
+import csv
+import io
+import json
+import tempfile
+import threading
 import time
-from typing import Any, Dict, List
-import boto3
-from botocore.exceptions import ClientError, ProfileNotFound
+from typing import Any, Dict, List, Tuple
 from .config import settings
 
 def _make_session():
+    import boto3  # deferred until the first query: keeps boto3/botocore out of init
+    from botocore.exceptions import ProfileNotFound
     try:
         return boto3.Session(profile_name=settings.aws_profile, region_name=settings.aws_region) if settings.aws_profile else boto3.Session(region_name=settings.aws_region)
     except ProfileNotFound:
         # fall back to default provider chain (env vars, SSO, instance role, etc.)
         return boto3.Session(region_name=settings.aws_region)
 
-_session = _make_session()
-_athena = _session.client("athena")
-_glue = _session.client("glue")
+_session = None
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+def client(service: str):
+    """Shared client for `service` ("athena", "glue"), created on first use from one session."""
+    global _session
+    c = _clients.get(service)
+    if c is None:
+        with _clients_lock:
+            c = _clients.get(service)
+            if c is None:
+                if _session is None:
+                    _session = _make_session()
+                kwargs = {}
+                if service == "s3":  # presigned URLs need SigV4 (the default is still V2 in us-east-1)
+                    from botocore.config import Config
+                    kwargs["config"] = Config(signature_version="s3v4")
+                c = _clients[service] = _session.client(service, **kwargs)
+    return c
+
+def _split_s3(uri: str) -> Tuple[str, str]:
+    bucket, _, key = uri[len("s3://"):].partition("/")
+    return bucket, key
+
+def _page_rows(page: Dict, cols: List[str], first: bool) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+    for i, row in enumerate(page["ResultSet"]["Rows"]):
+        cells = [d.get("VarCharValue") for d in row.get("Data", [])]
+        if first and i == 0 and cells == cols:
+            continue  # header row
+        rows.append({c: v for c, v in zip(cols, cells)})
+    return rows
+
+def _json_size(rows: List[Dict[str, Any]], cols: List[str]) -> int:
+    """Approximate json.dumps(rows) length without serializing: quoted names and values plus punctuation."""
+    per_row = sum(len(c) + 8 for c in cols) + 2
+    return sum(per_row + sum(len(v) for v in r.values() if v) for r in rows)
+
+def _to_ndjson(bucket: str, key: str, dest_key: str, cols: List[str]) -> Tuple[int, int]:
+    """Re-encode Athena's CSV result as NDJSON next to it (streamed, spooled to disk); returns (rows, bytes)."""
+    s3 = client("s3")
+    body = s3.get_object(Bucket=bucket, Key=key)["Body"]
+    n = 0
+    with tempfile.SpooledTemporaryFile(max_size=32 * 1024 * 1024) as out:
+        reader = csv.reader(io.TextIOWrapper(body, encoding="utf-8", newline=""))
+        next(reader, None)  # header
+        for cells in reader:
+            out.write(json.dumps(dict(zip(cols, cells))).encode() + b"\n")
+            n += 1
+        size = out.tell()
+        out.seek(0)
+        s3.upload_fileobj(out, bucket, dest_key, ExtraArgs={"ContentType": "application/x-ndjson"})
+    return n, size
+
+def _row_count(qid: str) -> int | None:
+    try:
+        stats = client("athena").get_query_runtime_statistics(QueryExecutionId=qid)["QueryRuntimeStatistics"]
+        return stats.get("Rows", {}).get("OutputRows")
+    except Exception:
+        return None  # older workgroups / missing athena:GetQueryRuntimeStatistics
+
+def offload(qid: str, output_loc: str, cols: List[str], size: int | None = None) -> Dict[str, Any]:
+    """Pointer to the full result: presigned GET URL, format, size and row count."""
+    bucket, key = _split_s3(output_loc)
+    fmt = settings.result_offload_format
+    if fmt == "ndjson":
+        key = key.rsplit(".", 1)[0] + ".ndjson"
+        row_count, size = _to_ndjson(bucket, _split_s3(output_loc)[1], key, cols)
+    else:
+        fmt = "csv"  # Athena's own file: nothing to re-encode
+        row_count = _row_count(qid)
+        if size is None:
+            size = client("s3").head_object(Bucket=bucket, Key=key)["ContentLength"]
+    url = client("s3").generate_presigned_url("get_object", Params={"Bucket": bucket, "Key": key},
+                                               ExpiresIn=settings.result_url_ttl_s)
+    return {"row_count": row_count, "result_location": {
+        "uri": f"s3://{bucket}/{key}", "url": url, "format": fmt, "bytes": size, "expires_in": settings.result_url_ttl_s,
+    }}
 
 def run_query(query: str, database: str | None, workgroup: str | None, output_s3: str | None) -> Dict[str, Any]:
     """Run SQL in Athena and return rows/metadata. Minimal and synchronous."""
@@ -25,12 +106,13 @@ def run_query(query: str, database: str | None, workgroup: str | None, output_s3
     if workgroup:
         params["WorkGroup"] = workgroup
 
-    resp = _athena.start_query_execution(QueryString=query, **params)
+    athena = client("athena")
+    resp = athena.start_query_execution(QueryString=query, **params)
     qid = resp["QueryExecutionId"]
 
     # Poll until done
     while True:
-        info = _athena.get_query_execution(QueryExecutionId=qid)["QueryExecution"]
+        info = athena.get_query_execution(QueryExecutionId=qid)["QueryExecution"]
         state = info["Status"]["State"]
         if state in ("SUCCEEDED", "FAILED", "CANCELLED"):
             break
@@ -39,32 +121,49 @@ def run_query(query: str, database: str | None, workgroup: str | None, output_s3
     if state != "SUCCEEDED":
         raise RuntimeError(f"Athena error: {state}: {info['Status'].get('StateChangeReason', 'Unknown reason')}")
 
-    # Fetch results
-    res = _athena.get_query_results(QueryExecutionId=qid)
-    cols = [c["Name"] for c in res["ResultSet"]["ResultSetMetadata"]["ColumnInfo"]]
-    rows: List[Dict[str, Any]] = []
-    for i, row in enumerate(res["ResultSet"]["Rows"]):
-        if i == 0 and len(row.get("Data", [])) == len(cols):
-            # skip header row
-            continue
-        cells = [d.get("VarCharValue") for d in row.get("Data", [])]
-        rows.append({c: v for c, v in zip(cols, cells)})
-
+    # Fetch results: everything inline when small, otherwise a preview plus a presigned link
     stats = info.get("Statistics", {})
     output_loc = info["ResultConfiguration"]["OutputLocation"]
-    return {
+    page = athena.get_query_results(QueryExecutionId=qid)
+    meta = page["ResultSet"]["ResultSetMetadata"]["ColumnInfo"]
+    cols = [c["Name"] for c in meta]
+    rows = _page_rows(page, cols, first=True)
+    limit = settings.inline_result_max_bytes
+    size = _json_size(rows, cols)
+    csv_bytes = None
+    if size <= limit and page.get("NextToken"):
+        # more pages: Athena's CSV size bounds the rest without fetching it
+        bucket, key = _split_s3(output_loc)
+        csv_bytes = client("s3").head_object(Bucket=bucket, Key=key)["ContentLength"]
+        if csv_bytes + len(rows) * sum(len(c) + 8 for c in cols) <= limit:
+            token = page["NextToken"]
+            while token:
+                page = athena.get_query_results(QueryExecutionId=qid, NextToken=token)
+                rows.extend(_page_rows(page, cols, first=False))
+                token = page.get("NextToken")
+            size = _json_size(rows, cols)
+        else:
+            size = limit + 1
+
+    result = {
         "columns": cols,
+        "schema": [{"name": c["Name"], "type": c.get("Type")} for c in meta],
         "rows": rows,
         "row_count": len(rows),
+        "truncated": False,
         "bytes_scanned": stats.get("DataScannedInBytes"),
         "engine_ms": stats.get("EngineExecutionTimeInMillis"),
         "output": output_loc,
         "query_execution_id": qid,
     }
+    if size > limit:
+        result.update(rows=rows[:settings.result_preview_rows], truncated=True,
+                      **offload(qid, output_loc, cols, csv_bytes))
+    return result
 
 def list_tables(database: str) -> list[str]:
     names: list[str] = []
-    paginator = _glue.get_paginator("get_tables")
+    paginator = client("glue").get_paginator("get_tables")
     for page in paginator.paginate(DatabaseName=database):
         names.extend([t["Name"] for t in page.get("TableList", [])])
     return names
@@ -7,5 +7,11 @@ class Settings(BaseModel):
     glue_database: str = os.getenv("GLUE_DATABASE", "nyc_taxi_db")
     athena_workgroup: str = os.getenv("ATHENA_WORKGROUP", "primary")
     athena_output_s3: str | None = os.getenv("ATHENA_OUTPUT_S3")  # strongly recommended
+    # Results bigger than this (estimated JSON bytes) are returned as a presigned S3 link plus a preview;
+    # Lambda caps synchronous responses at 6 MB
+    inline_result_max_bytes: int = int(os.getenv("INLINE_RESULT_MAX_BYTES", "1000000"))
+    result_preview_rows: int = int(os.getenv("RESULT_PREVIEW_ROWS", "100"))
+    result_url_ttl_s: int = int(os.getenv("RESULT_URL_TTL_S", "900"))
+    result_offload_format: str = os.getenv("RESULT_OFFLOAD_FORMAT", "csv")  # csv (Athena's file) | ndjson
 
 settings = Settings()
@@ -0,0 +1,135 @@
+"""Lambda entry point for the Query API without the ASGI stack.
+
+    Handler: query_api.lambda_handler.handler
+
+Parses API Gateway events (HTTP API payload v2.0 and REST/ALB v1.0) directly
+and serves the same three routes as app.py with the same engine (athena.py), so
+boto3 clients are shared and nothing is duplicated. Responses match FastAPI's:
+the result dict on success, {"detail": ...} with 400/404/405/422 otherwise.
+422 details take the shape of the installed pydantic, as FastAPI's do: 1.x
+loc/msg/type, 2.x type/loc/msg/input (without the url).
+FastAPI + Mangum (query_api.app.handler) stays for uvicorn, containers, and
+anything that needs OpenAPI docs; this module doesn't import either.
+"""
+import base64
+import json
+from functools import lru_cache
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any, Dict, List, Optional, Tuple
+
+from .athena import list_tables, run_query
+from .config import settings
+
+_JSON = {"Content-Type": "application/json"}
+
+def _response(status: int, payload: Any) -> Dict:
+    return {"statusCode": status, "headers": _JSON, "body": json.dumps(payload, default=str), "isBase64Encoded": False}
+
+def _request(event: Dict) -> Tuple[str, str, Dict[str, str], Optional[str]]:
+    """(method, path, query params, body text) from a v2.0 or v1.0 event."""
+    if event.get("version") == "2.0":
+        method = event["requestContext"]["http"]["method"]
+        path = event.get("rawPath") or event["requestContext"]["http"]["path"]
+    else:
+        method, path = event["httpMethod"], event["path"]
+    body = event.get("body")
+    if body is not None and event.get("isBase64Encoded"):
+        body = base64.b64decode(body).decode("utf-8")
+    return method.upper(), path.rstrip("/") or "/", event.get("queryStringParameters") or {}, body
+
+# Error kinds as FastAPI reports them: (pydantic 2 type, msg), (pydantic 1 type, msg).
+_ERRORS = {
+    "missing": (("missing", "Field required"), ("value_error.missing", "field required")),
+    "string": (("string_type", "Input should be a valid string"), ("type_error.str", "str type expected")),
+    "none": (("string_type", "Input should be a valid string"),
+             ("type_error.none.not_allowed", "none is not an allowed value")),
+    "dict": (("model_attributes_type", "Input should be a valid dictionary or object to extract fields from"),
+             ("type_error.dict", "value is not a valid dict")),
+}
+
+@lru_cache(maxsize=None)
+def _pydantic_v1() -> bool:
+    """FastAPI's error shape follows the pydantic deployed with it; requirements.txt pins 1.10.13."""
+    try:
+        return version("pydantic").startswith("1.")
+    except PackageNotFoundError:
+        return True
+
+def _error(loc: str, kind: str, value: Any) -> Dict:
+    (v2_type, v2_msg), (v1_type, v1_msg) = _ERRORS[kind]
+    path = ["body", loc] if loc else ["body"]
+    if _pydantic_v1():
+        return {"loc": path, "msg": v1_msg, "type": v1_type}
+    return {"type": v2_type, "loc": path, "msg": v2_msg, "input": value}
+
+def _json_error(e: json.JSONDecodeError) -> Dict:
+    if _pydantic_v1():
+        return {"loc": ["body", e.pos], "msg": str(e), "type": "value_error.jsondecode",
+                "ctx": {"msg": e.msg, "doc": e.doc, "pos": e.pos, "lineno": e.lineno, "colno": e.colno}}
+    return {"type": "json_invalid", "loc": ["body", e.pos], "msg": "JSON decode error", "input": {},
+            "ctx": {"error": e.msg}}
+
+def _string(data: Dict, name: str, errors: List[Dict]) -> Any:
+    """data[name] validated as a str field; pydantic 1 coerces numbers, pydantic 2 doesn't."""
+    value = data[name]
+    if isinstance(value, str):
+        return value
+    if _pydantic_v1() and isinstance(value, (int, float)):
+        return str(value)
+    errors.append(_error(name, "none" if value is None else "string", value))
+    return None
+
+def parse_sql_request(body: Optional[str]) -> Tuple[Optional[Dict], List[Dict]]:
+    """Validate a /sql body like app.SQLRequest: (fields, []) or (None, FastAPI-style errors)."""
+    try:
+        data = json.loads(body) if body else None
+    except json.JSONDecodeError as e:
+        return None, [_json_error(e)]
+    if data is None:
+        return None, [_error("", "missing", None)]
+    if not isinstance(data, dict):
+        return None, [_error("", "dict", data)]
+    errors: List[Dict] = []
+    fields = {"query": _string(data, "query", errors) if "query" in data else None,
+              "database": settings.glue_database, "workgroup": settings.athena_workgroup}
+    if "query" not in data:
+        errors.append(_error("query", "missing", data))
+    for name in ("database", "workgroup"):  # optional: None is a valid value
+        if name in data:
+            fields[name] = None if data[name] is None else _string(data, name, errors)
+    return (None, errors) if errors else (fields, [])
+
+def _health(params, body):
+    return _response(200, {"ok": True, "region": settings.aws_region, "db": settings.glue_database})
+
+def _tables(params, body):
+    db = params.get("db") or settings.glue_database
+    try:
+        return _response(200, {"database": db, "tables": list_tables(db)})
+    except Exception as e:
+        return _response(400, {"detail": str(e)})
+
+def _sql(params, body):
+    req, errors = parse_sql_request(body)
+    if errors:
+        return _response(422, {"detail": errors})
+    try:
+        return _response(200, run_query(req["query"], database=req["database"], workgroup=req["workgroup"],
+                                        output_s3=settings.athena_output_s3))
+    except Exception as e:
+        return _response(400, {"detail": str(e)})
+
+ROUTES = {"/health": ("GET", _health), "/tables": ("GET", _tables), "/sql": ("POST", _sql)}
+
+def handler(event, context):
+    try:
+        method, path, params, body = _request(event)
+    except (KeyError, TypeError, ValueError) as e:
+        return _response(400, {"detail": f"Unsupported event: {type(e).__name__}: {e}"})
+    route = ROUTES.get(path)
+    if route is None:
+        return _response(404, {"detail": "Not Found"})
+    allowed, fn = route
+    if method != allowed:
+        return _response(405, {"detail": "Method Not Allowed"})
+    return fn(params, body)
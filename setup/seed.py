@@ -1,8 +1,14 @@
 # setup/seed.py
+import io
+import math
 import os
+import threading
 import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 import requests
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
 from dotenv import load_dotenv
 from botocore.exceptions import ProfileNotFound
@@ -18,11 +24,36 @@ S3_BUCKET = os.environ["S3_BUCKET"]           # <-- must exist already
 S3_PREFIX = os.getenv("S3_PREFIX", "athena-copilot")
 GLUE_DB   = os.getenv("GLUE_DATABASE", "nyc_taxi_db")
 
-RAW_PREFIX     = f"{S3_PREFIX}/raw/nyc_taxi/2019/01/"
+RAW_ROOT       = f"{S3_PREFIX}/raw/nyc_taxi/"
 CRAWLER_NAME   = f"{S3_PREFIX}-crawler"
 
-# ~128MB .csv.gz (good size for Glue/Athena)
-CSV_URL = "https://github.com/DataTalksClub/nyc-tlc-data/releases/download/yellow/yellow_tripdata_2019-01.csv.gz"
+# Months to seed: "2019-01", "2019-01,2019-02" or a range "2019-01:2019-12"
+SEED_MONTHS = os.getenv("SEED_MONTHS", "2019-01")
+# Transfer tuning. Each file streams download -> multipart upload; memory is roughly
+# SEED_FILE_CONCURRENCY x SEED_UPLOAD_CONCURRENCY x SEED_PART_SIZE_MB (256 MB by default).
+# Split .csv.gz sources (SEED_SPLIT_MB, below) hold whole gzip parts instead: per file up to
+# SEED_UPLOAD_CONCURRENCY parts in flight, one waiting for a slot and one being compressed, so
+# SEED_FILE_CONCURRENCY x (SEED_UPLOAD_CONCURRENCY + 2) x SEED_SPLIT_MB (4 x 6 x 32 MB = 768 MB by default).
+SEED_PART_SIZE_MB       = int(os.getenv("SEED_PART_SIZE_MB", "16"))
+SEED_UPLOAD_CONCURRENCY = int(os.getenv("SEED_UPLOAD_CONCURRENCY", "4"))  # parts in flight per file
+SEED_FILE_CONCURRENCY   = int(os.getenv("SEED_FILE_CONCURRENCY", "4"))    # files in flight
+SEED_MAX_MBPS           = float(os.getenv("SEED_MAX_MBPS", "0"))          # shared download budget, 0 = unlimited
+# gzip can't be split, so Athena reads each .csv.gz with one worker: recompress .gz sources into
+# roughly equal parts of about this many MB (each with the header row); 0 = keep one object
+SEED_SPLIT_MB           = int(os.getenv("SEED_SPLIT_MB", "32"))
+SEED_SPLIT_LEVEL        = int(os.getenv("SEED_SPLIT_LEVEL", "6"))         # gzip level for the parts
+
+# Parquet copy of the trips, registered next to the raw table (needs pyarrow)
+SEED_PARQUET        = os.getenv("SEED_PARQUET", "1") not in ("0", "false", "False")
+PARQUET_ROOT        = f"{S3_PREFIX}/parquet/nyc_taxi/yellow/"
+PARQUET_TABLE       = os.getenv("PARQUET_TABLE", "yellow_trips_parquet")
+PARQUET_CODEC       = os.getenv("PARQUET_CODEC", "zstd")               # zstd | snappy
+PARQUET_FILE_MB     = int(os.getenv("PARQUET_FILE_MB", "128"))         # roll to a new file past this size
+PARQUET_BATCH_MB    = int(os.getenv("PARQUET_BATCH_MB", "32"))         # CSV per batch = one row group
+PARQUET_CONCURRENCY = int(os.getenv("PARQUET_CONCURRENCY", "2"))       # months converted at once
+
+# ~128MB .csv.gz per month (good size for Glue/Athena)
+CSV_URL = "https://github.com/DataTalksClub/nyc-tlc-data/releases/download/yellow/yellow_tripdata_{month}.csv.gz"
 # Optional small lookup table (handy later)
 ZONES_URL = "https://github.com/DataTalksClub/nyc-tlc-data/releases/download/misc/taxi_zone_lookup.csv"
 
@@ -35,6 +66,16 @@ except ProfileNotFound:
 s3 = _session.client("s3")
 glue = _session.client("glue")
 
+MB = 1024 * 1024
+TRANSFER = TransferConfig(
+    multipart_threshold=SEED_PART_SIZE_MB * MB,
+    multipart_chunksize=SEED_PART_SIZE_MB * MB,
+    max_concurrency=SEED_UPLOAD_CONCURRENCY,
+    use_threads=True,
+)
+# s3transfer option boto3's constructor doesn't take: parts buffered from the non-seekable HTTP stream
+TRANSFER.max_in_memory_upload_chunks = SEED_UPLOAD_CONCURRENCY
+
 # -------- Helpers --------
 def ensure_bucket_exists(bucket: str):
     try:
@@ -43,15 +84,210 @@ def ensure_bucket_exists(bucket: str):
     except ClientError as e:
         raise RuntimeError(f"S3 bucket '{bucket}' not found or not accessible: {e}")
 
-def upload_stream(bucket: str, key: str, url: str):
+def parse_months(spec: str):
+    """"2019-01,2019-03" or "2019-01:2019-12" -> ["2019-01", ...]"""
+    months = []
+    for part in spec.split(","):
+        part = part.strip()
+        if ":" not in part:
+            months.append(part)
+            continue
+        start, end = part.split(":")
+        y, m = map(int, start.split("-"))
+        while f"{y:04d}-{m:02d}" <= end:
+            months.append(f"{y:04d}-{m:02d}")
+            y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return months
+
+class Bandwidth:
+    """Token bucket shared by all concurrent downloads (bytes/s; 0 = unlimited)."""
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.allowance = rate
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, n: int):
+        if not self.rate:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.allowance = min(self.rate, self.allowance + (now - self.last) * self.rate) - n
+            self.last = now
+            wait = -self.allowance / self.rate if self.allowance < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+class MeteredReader:
+    """File-like view of a download that counts bytes and draws them from the shared budget."""
+    SLICE = MB
+
+    def __init__(self, raw, budget: Bandwidth):
+        self.raw = raw
+        self.budget = budget
+        self.bytes = 0
+
+    def read(self, n=-1):
+        if n is None or n < 0:
+            data = self.raw.read()
+            self.budget.consume(len(data))
+            self.bytes += len(data)
+            return data
+        out = bytearray()
+        while len(out) < n:  # small slices so the budget is shared smoothly
+            chunk = self.raw.read(min(n - len(out), self.SLICE))
+            if not chunk:
+                break
+            self.budget.consume(len(chunk))
+            out += chunk
+        self.bytes += len(out)
+        return bytes(out)
+
+def upload_stream(bucket: str, key: str, url: str, budget: Bandwidth | None = None):
+    """Stream `url` into s3://bucket/key as a parallel multipart upload; returns throughput stats."""
     print(f"Downloading: {url}")
+    t0 = time.perf_counter()
     with requests.get(url, stream=True, timeout=300) as r:
         r.raise_for_status()
         # Ensure raw stream decompresses if needed
         r.raw.decode_content = True
-        s3.upload_fileobj(r.raw, bucket, key)
-    size = s3.head_object(Bucket=bucket, Key=key)["ContentLength"]
-    print(f"[ok] Uploaded s3://{bucket}/{key} ({size} bytes)")
+        reader = MeteredReader(r.raw, budget or Bandwidth(0))
+        s3.upload_fileobj(reader, bucket, key, Config=TRANSFER)
+    secs = time.perf_counter() - t0
+    stats = {"key": key, "bytes": reader.bytes, "seconds": round(secs, 1),
+             "mb_per_s": round(reader.bytes / MB / secs, 1) if secs else 0.0}
+    print(f"[ok] Uploaded s3://{bucket}/{key} ({reader.bytes} bytes, {stats['seconds']}s, {stats['mb_per_s']} MB/s)")
+    return dict(stats, keys=[key])
+
+class GzipPart:
+    """One output part: a gzip member built in memory, starting with the CSV header."""
+    def __init__(self, header: bytes):
+        self.compressor = zlib.compressobj(SEED_SPLIT_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        self.chunks = []
+        self.size = 0
+        self.rows = False
+        self.write(header)
+
+    def write(self, data: bytes):
+        out = self.compressor.compress(data)
+        if out:
+            self.chunks.append(out)
+            self.size += len(out)
+
+    def finish(self) -> bytes:
+        self.chunks.append(self.compressor.flush())
+        return b"".join(self.chunks)
+
+def upload_split(bucket: str, key: str, url: str, budget: Bandwidth | None = None):
+    """Stream a .csv.gz from `url` into roughly equal gzip parts <key stem>-part-NNNNN.csv.gz.
+
+    The part count comes from Content-Length / SEED_SPLIT_MB, and cuts follow the
+    compressed input consumed, so parts come out about the same size. Cuts happen
+    only at line ends and every part starts with the header row, so Glue and Athena
+    read each part as a standalone CSV (records must not contain quoted newlines).
+    At most SEED_UPLOAD_CONCURRENCY parts are in memory or in flight at a time.
+    """
+    print(f"Downloading: {url}")
+    stem = key[:-len(".csv.gz")] if key.endswith(".csv.gz") else key
+    keys, futures, t0 = [], [], time.perf_counter()
+    slots = threading.Semaphore(max(1, SEED_UPLOAD_CONCURRENCY))
+
+    def put(body: bytes, part_key: str):
+        try:
+            s3.upload_fileobj(io.BytesIO(body), bucket, part_key, Config=TRANSFER)
+        finally:
+            slots.release()
+
+    def ship(part: GzipPart):
+        part_key = f"{stem}-part-{len(keys):05d}.csv.gz"
+        body = part.finish()
+        slots.acquire()
+        keys.append(part_key)
+        futures.append(pool.submit(put, body, part_key))
+        return len(body)
+
+    with requests.get(url, stream=True, timeout=300) as r, \
+            ThreadPoolExecutor(max_workers=max(1, SEED_UPLOAD_CONCURRENCY)) as pool:
+        r.raise_for_status()
+        r.raw.decode_content = True
+        total = int(r.headers.get("Content-Length") or 0)
+        parts = max(1, math.ceil(total / (SEED_SPLIT_MB * MB))) if total else 0
+        reader = MeteredReader(r.raw, budget or Bandwidth(0))
+        inflate = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        header, pending, part, written = None, b"", None, 0
+        while True:
+            data = reader.read(MB)
+            if not data:
+                break
+            text = inflate.decompress(data)
+            while inflate.eof and inflate.unused_data:  # concatenated gzip members
+                rest = inflate.unused_data
+                inflate = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                text += inflate.decompress(rest)
+            if header is None:
+                pending += text
+                if b"\n" not in pending:
+                    continue
+                header, _, text = pending.partition(b"\n")
+                header += b"\n"
+                part = GzipPart(header)
+            if parts:  # cut at the next line end once this part's share of the input is consumed
+                due = len(keys) + 1 < parts and reader.bytes >= (len(keys) + 1) * total / parts
+            else:
+                due = part.size >= SEED_SPLIT_MB * MB
+            cut = text.rfind(b"\n") if due and part.rows else -1
+            if cut < 0:
+                part.write(text)
+                part.rows = part.rows or bool(text)
+                continue
+            part.write(text[:cut + 1])
+            written += ship(part)
+            part = GzipPart(header)
+            part.write(text[cut + 1:])
+            part.rows = bool(text[cut + 1:])
+        if part is not None and (part.rows or not keys):
+            written += ship(part)
+        for f in futures:
+            f.result()
+    secs = time.perf_counter() - t0
+    stats = {"key": f"{stem}-part-*.csv.gz", "bytes": reader.bytes, "seconds": round(secs, 1),
+             "mb_per_s": round(reader.bytes / MB / secs, 1) if secs else 0.0, "keys": keys}
+    print(f"[ok] Uploaded s3://{bucket}/{stats['key']} ({reader.bytes} bytes in, {len(keys)} parts, "
+          f"{written} bytes out, {stats['seconds']}s, {stats['mb_per_s']} MB/s)")
+    return stats
+
+def remove_stale(bucket: str, prefix: str, keep):
+    """Delete objects under prefix that this run didn't write (e.g. the unsplit file after switching to parts)."""
+    keep = set(keep)
+    stale = []
+    for page in s3.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=prefix):
+        stale.extend(o["Key"] for o in page.get("Contents", []) if o["Key"] not in keep)
+    for i in range(0, len(stale), 1000):
+        s3.delete_objects(Bucket=bucket, Delete={"Objects": [{"Key": k} for k in stale[i:i + 1000]]})
+    if stale:
+        print(f"[ok] Removed {len(stale)} stale objects under s3://{bucket}/{prefix}")
+
+def seed_one(bucket: str, key: str, url: str, budget: Bandwidth):
+    if SEED_SPLIT_MB and key.endswith(".csv.gz"):
+        stats = upload_split(bucket, key, url, budget)
+    else:
+        stats = upload_stream(bucket, key, url, budget)
+    remove_stale(bucket, key.rsplit("/", 1)[0] + "/", stats["keys"])
+    return stats
+
+def seed_files(bucket: str, files):
+    """Upload [(key, url), ...] concurrently under one bandwidth budget; prints per-file throughput."""
+    budget = Bandwidth(SEED_MAX_MBPS * MB)
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, SEED_FILE_CONCURRENCY)) as pool:
+        stats = list(pool.map(lambda f: seed_one(bucket, f[0], f[1], budget), files))
+    secs = time.perf_counter() - t0
+    total = sum(s["bytes"] for s in stats)
+    print(f"\n[ok] Seeded {len(stats)} files, {total / MB:.0f} MB in {secs:.1f}s "
+          f"({total / MB / secs:.1f} MB/s aggregate)")
+    for s in stats:
+        print(f"   {s['mb_per_s']:>7.1f} MB/s  {s['bytes'] / MB:>8.1f} MB  {s['seconds']:>6.1f}s  {s['key']}")
+    return stats
 
 def ensure_glue_db(name: str):
     try:
@@ -100,17 +336,172 @@ def list_tables(db: str):
             names.append(t["Name"])
     return names
 
+# -------- Parquet conversion --------
+# Types for the yellow-trip columns (matched case-insensitively); anything else is
+# inferred from the first batch and then enforced for the rest of the file.
+# passenger_count / ratecodeid are doubles because some months write them as "1.0".
+TAXI_TYPES = {
+    "vendorid": "int64", "tpep_pickup_datetime": "timestamp[s]", "tpep_dropoff_datetime": "timestamp[s]",
+    "passenger_count": "float64", "trip_distance": "float64", "ratecodeid": "float64",
+    "store_and_fwd_flag": "string", "pulocationid": "int64", "dolocationid": "int64", "payment_type": "int64",
+    "fare_amount": "float64", "extra": "float64", "mta_tax": "float64", "tip_amount": "float64",
+    "tolls_amount": "float64", "improvement_surcharge": "float64", "total_amount": "float64",
+    "congestion_surcharge": "float64", "airport_fee": "float64",
+}
+GLUE_TYPES = {"int8": "tinyint", "int16": "smallint", "int32": "int", "int64": "bigint", "float": "float",
+              "double": "double", "bool": "boolean", "string": "string", "large_string": "string", "date32[day]": "date"}
+
+def csv_header(bucket: str, key: str):
+    """Column names from the first KB of a (gzip) CSV object, without reading the rest."""
+    head = s3.get_object(Bucket=bucket, Key=key, Range="bytes=0-65535")["Body"].read()
+    if key.endswith(".gz"):
+        head = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(head)
+    return head.split(b"\n", 1)[0].decode("utf-8").strip().split(",")
+
+def glue_type(t) -> str:
+    s = str(t)
+    return "timestamp" if s.startswith("timestamp") else GLUE_TYPES.get(s, "string")
+
+def arrow_s3():
+    """pyarrow's native S3 filesystem with this script's credentials (honours AWS_PROFILE)."""
+    from pyarrow import fs
+    creds = _session.get_credentials().get_frozen_credentials()
+    return fs.S3FileSystem(access_key=creds.access_key, secret_key=creds.secret_key,
+                           session_token=creds.token, region=REGION)
+
+def convert_to_parquet(filesystem, bucket: str, src_keys, dest_prefix: str):
+    """Stream CSV(.gz) objects (one month, possibly in parts) into Parquet files under dest_prefix.
+
+    Reads and writes through pyarrow's own S3 streams (a Python file object under
+    the CSV reader can hang the interpreter when parsing fails). Each batch of
+    about PARQUET_BATCH_MB of CSV becomes one row group, and a new file starts
+    once the current one passes PARQUET_FILE_MB, so Athena gets split-sized
+    objects. Types found in the first object are enforced on the rest.
+    Returns {"schema", "rows", "files", "bytes", "skipped"}.
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+
+    header = csv_header(bucket, src_keys[0])
+    types = {c: pa.type_for_alias(TAXI_TYPES[c.lower()]) for c in header if c.lower() in TAXI_TYPES}
+    skipped = [0]
+    def skip(row):
+        skipped[0] += 1
+        return "skip"
+
+    t0 = time.perf_counter()
+    files, rows, written, part = [], 0, 0, 0
+    sink = writer = schema = None
+    for src_key in src_keys:
+        with filesystem.open_input_stream(f"{bucket}/{src_key}",
+                                          compression="gzip" if src_key.endswith(".gz") else None) as stream:
+            reader = pacsv.open_csv(
+                stream,
+                read_options=pacsv.ReadOptions(block_size=PARQUET_BATCH_MB * MB),
+                parse_options=pacsv.ParseOptions(invalid_row_handler=skip),
+                convert_options=pacsv.ConvertOptions(column_types=types, strings_can_be_null=True),
+            )
+            if schema is None:
+                types = {f.name: f.type for f in reader.schema}
+                schema = pa.schema([f.with_name(f.name.lower()) for f in reader.schema])
+            for batch in reader:
+                if writer is None:
+                    key = f"{dest_prefix}part-{part:05d}.parquet"
+                    sink = filesystem.open_output_stream(f"{bucket}/{key}")
+                    writer = pq.ParquetWriter(sink, schema, compression=PARQUET_CODEC, coerce_timestamps="ms",
+                                              allow_truncated_timestamps=True)
+                    files.append(key)
+                writer.write_table(pa.Table.from_batches([batch.rename_columns(schema.names)]))
+                rows += batch.num_rows
+                if sink.tell() >= PARQUET_FILE_MB * MB:
+                    writer.close()
+                    written += sink.tell()
+                    sink.close()
+                    writer = None
+                    part += 1
+    if writer is not None:
+        writer.close()
+        written += sink.tell()
+        sink.close()
+    secs = time.perf_counter() - t0
+    print(f"[ok] Parquet s3://{bucket}/{dest_prefix} ({rows} rows, {len(files)} files, {written / MB:.1f} MB "
+          f"{PARQUET_CODEC}, {skipped[0]} bad rows skipped, {secs:.1f}s)")
+    return {"schema": schema, "rows": rows, "files": files, "bytes": written, "skipped": skipped[0]}
+
+def register_parquet_table(db: str, table: str, location: str, columns, partitions):
+    """Create/update the Parquet table in Glue and add its year/month partitions (idempotent)."""
+    def storage(loc):
+        return {
+            "Columns": columns,
+            "Location": loc,
+            "InputFormat": "org.apache.hadoop.hive.ql.io.parquet.MapredParquetInputFormat",
+            "OutputFormat": "org.apache.hadoop.hive.ql.io.parquet.MapredParquetOutputFormat",
+            "SerdeInfo": {"SerializationLibrary": "org.apache.hadoop.hive.ql.io.parquet.serde.ParquetHiveSerDe",
+                          "Parameters": {"serialization.format": "1"}},
+        }
+    table_input = {
+        "Name": table,
+        "TableType": "EXTERNAL_TABLE",
+        "Parameters": {"classification": "parquet", "EXTERNAL": "TRUE", "parquet.compression": PARQUET_CODEC.upper()},
+        "PartitionKeys": [{"Name": "year", "Type": "string"}, {"Name": "month", "Type": "string"}],
+        "StorageDescriptor": storage(location),
+    }
+    try:
+        glue.create_table(DatabaseName=db, TableInput=table_input)
+        print(f"[ok] Created Glue table: {db}.{table}")
+    except glue.exceptions.AlreadyExistsException:
+        glue.update_table(DatabaseName=db, TableInput=table_input)
+        print(f"[ok] Updated Glue table: {db}.{table}")
+    for i in range(0, len(partitions), 100):  # batch_create_partition takes up to 100
+        resp = glue.batch_create_partition(DatabaseName=db, TableName=table, PartitionInputList=[
+            {"Values": [y, m], "StorageDescriptor": storage(f"{location}year={y}/month={m}/")}
+            for y, m in partitions[i:i + 100]])
+        for err in resp.get("Errors", []):
+            if err["ErrorDetail"]["ErrorCode"] != "AlreadyExistsException":
+                raise RuntimeError(f"Glue partition {err['PartitionValues']}: {err['ErrorDetail']['ErrorMessage']}")
+    print(f"[ok] Partitions registered: {len(partitions)}")
+
+def seed_parquet(bucket: str, months):
+    """Convert each seeded month to Parquet (concurrently) and register PARQUET_TABLE."""
+    filesystem = arrow_s3()
+    def one(month):
+        from pyarrow import fs
+        year, mm = month.split("-")
+        found = filesystem.get_file_info(fs.FileSelector(f"{bucket}/{RAW_ROOT}{year}/{mm}/"))
+        srcs = sorted(f.path.split("/", 1)[1] for f in found if f.path.endswith(".csv.gz"))  # one file or its parts
+        if not srcs:
+            raise RuntimeError(f"No raw CSV for {month} under s3://{bucket}/{RAW_ROOT}{year}/{mm}/")
+        return month, convert_to_parquet(filesystem, bucket, srcs, f"{PARQUET_ROOT}year={year}/month={mm}/")
+
+    with ThreadPoolExecutor(max_workers=max(1, PARQUET_CONCURRENCY)) as pool:
+        results = list(pool.map(one, months))
+    columns, seen = [], set()
+    for _, r in results:  # union across months, in file order; older files read missing columns as NULL
+        for f in r["schema"]:
+            if f.name not in seen:
+                seen.add(f.name)
+                columns.append({"Name": f.name, "Type": glue_type(f.type)})
+    register_parquet_table(GLUE_DB, PARQUET_TABLE, f"s3://{bucket}/{PARQUET_ROOT}", columns,
+                           [tuple(m.split("-")) for m, _ in results])
+    return results
+
 def main():
     ensure_bucket_exists(S3_BUCKET)
 
-    # Upload data
-    upload_stream(S3_BUCKET, f"{RAW_PREFIX}yellow_tripdata_2019-01.csv.gz", CSV_URL)
-    # Optional: zones lookup
-    upload_stream(S3_BUCKET, f"{S3_PREFIX}/raw/nyc_taxi/lookup/taxi_zone_lookup.csv", ZONES_URL)
+    # Upload data: one object per month under raw/nyc_taxi/<year>/<month>/, plus the zones lookup
+    files = []
+    for month in parse_months(SEED_MONTHS):
+        year, mm = month.split("-")
+        files.append((f"{RAW_ROOT}{year}/{mm}/yellow_tripdata_{month}.csv.gz", CSV_URL.format(month=month)))
+    files.append((f"{RAW_ROOT}lookup/taxi_zone_lookup.csv", ZONES_URL))
+    seed_files(S3_BUCKET, files)
 
     # Glue DB + Crawler
     ensure_glue_db(GLUE_DB)
-    s3_path = f"s3://{S3_BUCKET}/{S3_PREFIX}/raw/nyc_taxi/"
+    if SEED_PARQUET:
+        seed_parquet(S3_BUCKET, parse_months(SEED_MONTHS))
+    s3_path = f"s3://{S3_BUCKET}/{RAW_ROOT}"
     ensure_crawler(CRAWLER_NAME, GLUE_DB, s3_path)
     run_crawler_wait(CRAWLER_NAME)
 
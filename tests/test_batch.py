@@ -0,0 +1,37 @@
+import io
+import json
+
+import pytest
+
+from agent_cli import batch
+
+def test_catalog_failure_only_fails_that_database(monkeypatch):
+    def load(db):
+        if db == "broken":
+            raise RuntimeError("glue down")
+        return [{"table": "t", "columns": [], "partitions": []}]
+
+    def answer(question, db, **kwargs):
+        return dict(batch.failed_record(question, db, None), ok=True, sql="SELECT 1", total_ms=10.0)
+
+    monkeypatch.setattr(batch, "get_tables_and_columns", load)
+    monkeypatch.setattr(batch, "load_stats", lambda db: {})
+    monkeypatch.setattr(batch, "answer_question", answer)
+    out = io.StringIO()
+    items = [{"question": "a", "db": "good"}, {"question": "b", "db": "broken"}, {"question": "c", "db": "good"}]
+    summary = batch.run_batch(items, out, llm_concurrency=1, athena_concurrency=1)
+    records = {r["question"]: r for r in map(json.loads, out.getvalue().splitlines())}
+    assert records["a"]["ok"] and records["c"]["ok"]
+    assert not records["b"]["ok"] and records["b"]["error"] == "catalog load failed: RuntimeError: glue down"
+    assert (summary["ok"], summary["failed"]) == (2, 1)
+
+@pytest.mark.parametrize("lat, p50, p90, p99", [
+    ([], 0.0, 0.0, 0.0),
+    ([5.0], 5.0, 5.0, 5.0),
+    ([float(i) for i in range(1, 101)], 50.5, 90.1, 99.0),
+])
+def test_summary_percentiles(lat, p50, p90, p99):
+    records = [dict(batch.failed_record("q", "d", None), total_ms=ms) for ms in lat]
+    s = batch.summarize(records, 1.0)["latency_ms"]
+    assert (s[50], s[90], s[99]) == (p50, p90, p99)
+    assert s["max"] == max(lat, default=0.0)
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from agent_cli import candidates
+from agent_cli.candidates import explain_cost, select_candidate
+from agent_cli.column_stats import ColumnStats, TableStats
+
+TABLES = [{"table": "trips", "columns": ["fare", "tip", "zone"], "partitions": ["month"],
+           "types": {"fare": "double", "tip": "double", "zone": "string", "month": "string"}}]
+
+def io_plan(*sizes):
+    plan = {"inputTableColumnInfos": [{"table": {"tableName": "trips"}, "estimate": {"outputSizeInBytes": s}}
+                                      for s in sizes]}
+    return {"rows": [{"Query Plan": json.dumps(plan)}]}
+
+class FakeAthena:
+    """EXPLAIN results by SQL; records what was explained."""
+
+    def __init__(self, results):
+        self.results = results
+        self.explained = []
+
+    def __call__(self, statement):
+        sql = statement[len("EXPLAIN (TYPE IO, FORMAT JSON) "):]
+        self.explained.append(sql)
+        return self.results.get(sql, io_plan("NaN"))
+
+def generator(by_temperature):
+    def generate(temperature):
+        sql = by_temperature[temperature]
+        if isinstance(sql, Exception):
+            raise sql
+        return sql
+    return generate
+
+@pytest.fixture(autouse=True)
+def validation(monkeypatch):
+    monkeypatch.setattr(candidates.settings, "sql_validation", True)
+
+def test_cheapest_valid_explain_wins():
+    sqls = {0.0: "SELECT fare FROM trips", 0.4: "SELECT fare, tip FROM trips", 0.7: "SELECT nope FROM trips"}
+    athena = FakeAthena({sqls[0.0]: io_plan(5000), sqls[0.4]: io_plan(2000, 1000)})
+    run = select_candidate(3, generator(sqls), athena, TABLES)
+    assert run.chosen.sql == sqls[0.4] and run.chosen.cost == 3000 and run.chosen.cost_source == "explain"
+    assert "nope" not in " ".join(athena.explained)  # rejected locally, never explained
+    assert sum(c.valid for c in run.candidates) == 2
+
+def test_explain_error_disqualifies():
+    sqls = {0.0: "SELECT fare FROM trips", 0.4: "SELECT tip FROM trips"}
+    athena = FakeAthena({sqls[0.0]: {"error": "TABLE_NOT_FOUND"}, sqls[0.4]: io_plan(9000)})
+    run = select_candidate(2, generator(sqls), athena, TABLES)
+    assert run.chosen.sql == sqls[0.4]
+    assert run.candidates[0].error == "TABLE_NOT_FOUND"
+
+def test_falls_back_to_stats_then_order():
+    sqls = {0.0: "SELECT fare, tip, zone FROM trips", 0.4: "SELECT fare FROM trips"}
+    stats = {"trips": TableStats("trips", row_count=100, columns={
+        "fare": ColumnStats("fare", avg_width=8), "tip": ColumnStats("tip", avg_width=8),
+        "zone": ColumnStats("zone", avg_width=20)})}
+    run = select_candidate(2, generator(sqls), FakeAthena({}), TABLES, stats=stats)
+    assert (run.chosen.sql, run.chosen.cost, run.chosen.cost_source) == (sqls[0.4], 800, "stats")
+    run = select_candidate(2, generator(sqls), FakeAthena({}), TABLES)
+    assert run.chosen.sql == sqls[0.0] and run.chosen.cost_source == ""  # no estimate: coolest first
+
+def test_duplicates_are_explained_once_and_failed_generation_is_skipped():
+    sqls = {0.0: "SELECT fare FROM trips", 0.4: "select  FARE from trips;", 0.7: RuntimeError("throttled")}
+    athena = FakeAthena({sqls[0.0]: io_plan(100)})
+    run = select_candidate(3, generator(sqls), athena, TABLES)
+    assert athena.explained == [sqls[0.0]]
+    assert [c.cost for c in run.candidates[:2]] == [100, 100]
+    assert run.candidates[2].error == "generation failed: throttled"
+    assert run.chosen is run.candidates[0]
+
+def test_none_valid():
+    run = select_candidate(2, generator({0.0: "SELECT nope FROM trips", 0.4: "SELECT x FROM nowhere"}),
+                           FakeAthena({}), TABLES)
+    assert run.chosen is None and "none valid" in run.summary()
+
+def test_explain_cost_without_an_estimate():
+    assert explain_cost(io_plan(10, 20)) == 30
+    assert explain_cost(io_plan(10, "NaN")) is None
+    assert explain_cost({"rows": [{"Query Plan": "not json"}]}) is None
@@ -0,0 +1,70 @@
+import threading
+import time
+
+import pytest
+
+from agent_cli import catalog_watch
+from agent_cli.catalog_watch import diff_snapshots, watch_catalog
+
+SNAP = {"2019": {"version": "1", "schema": "a", "partitions": {"count": 3, "digest": "x"}},
+        "lookup": {"version": "1", "schema": "b"}}
+
+def test_diff_snapshots():
+    new = {"2019": dict(SNAP["2019"], partitions={"count": 4, "digest": "y"}),
+           "lookup": {"version": "2", "schema": "c"}, "2020": {"version": "1", "schema": "d"}}
+    assert [(e.table, e.kind) for e in diff_snapshots("db", SNAP, new)] == [
+        ("2019", "partitions"), ("2020", "created"), ("lookup", "schema")]
+    assert [(e.table, e.kind) for e in diff_snapshots("db", SNAP, {"lookup": SNAP["lookup"]})] == [("2019", "dropped")]
+
+@pytest.fixture
+def feed_env(monkeypatch, tmp_path):
+    monkeypatch.setattr(catalog_watch.settings, "cache_dir", str(tmp_path))
+    monkeypatch.setattr(catalog_watch.settings, "llm_cache_enabled", False)
+    monkeypatch.setattr(catalog_watch.settings, "semantic_cache_enabled", False)
+    monkeypatch.setattr(catalog_watch.settings, "catalog_feed", True)
+    monkeypatch.setattr(catalog_watch.settings, "catalog_poll_s", 0)
+    monkeypatch.setattr(catalog_watch, "_watchers", {})
+    snapshots = [SNAP]
+    monkeypatch.setattr(catalog_watch, "snapshot_catalog", lambda db, with_partitions=True: snapshots[-1])
+    invalidated = []
+    import agent_cli.column_stats as column_stats
+    monkeypatch.setattr(column_stats, "invalidate_stats", lambda db, tables: invalidated.append((db, sorted(tables))))
+    yield snapshots, invalidated
+    for watcher in catalog_watch._watchers.values():
+        watcher.stop()
+
+def test_polls_in_the_background_when_the_version_changes(feed_env):
+    snapshots, invalidated = feed_env
+    watch_catalog("db", "v1")  # baseline
+    watcher = catalog_watch._watchers["db"]
+    assert watcher.wait(1, timeout=5)
+    snapshots.append({"2019": SNAP["2019"], "lookup": {"version": "2", "schema": "c"}})
+    watch_catalog("db", "v1")  # same version: no Glue calls
+    assert not watcher.wait(2, timeout=0.2)
+    assert invalidated == []
+    watch_catalog("db", "v2")
+    assert watcher.wait(2, timeout=5)
+    assert invalidated == [("db", ["lookup"])]
+
+def test_periodic_poll_catches_partition_changes(feed_env, monkeypatch):
+    snapshots, invalidated = feed_env
+    monkeypatch.setattr(catalog_watch.settings, "catalog_poll_s", 0.05)
+    watch_catalog("db", "v1")
+    watcher = catalog_watch._watchers["db"]
+    assert watcher.wait(1, timeout=5)
+    snapshots.append({"2019": dict(SNAP["2019"], partitions={"count": 4, "digest": "y"}), "lookup": SNAP["lookup"]})
+    assert watcher.wait(watcher.polls + 2, timeout=5)  # same tables_version, still polled
+    assert invalidated == [("db", ["2019"])]
+
+def test_does_not_block_the_caller(feed_env, monkeypatch):
+    release = threading.Event()
+
+    def slow(db, with_partitions=True):
+        release.wait(5)
+        raise RuntimeError("glue down")  # failures are logged by the watcher, not raised
+    monkeypatch.setattr(catalog_watch, "snapshot_catalog", slow)
+    t0 = time.perf_counter()
+    watch_catalog("db", "v1")
+    assert time.perf_counter() - t0 < 0.5
+    release.set()
+    assert catalog_watch._watchers["db"].wait(1, timeout=5)
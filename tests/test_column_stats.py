@@ -0,0 +1,74 @@
+import pytest
+
+from agent_cli import column_stats
+
+TABLES = [{"table": "trips", "columns": ["fare"], "partitions": ["year"], "types": {"fare": "double", "year": "int"}},
+          {"table": "zones", "columns": ["zone"], "partitions": [], "types": {"zone": "string"}}]
+
+@pytest.fixture
+def sampled(monkeypatch, tmp_path):
+    """No Glue column statistics, so every collection is a sampled query; returns the queried tables."""
+    monkeypatch.setattr(column_stats.settings, "cache_dir", str(tmp_path))
+    monkeypatch.setattr(column_stats, "get_column_statistics", lambda db, table, cols: [])
+    queried = []
+
+    def execute(sql, database):
+        table = sql.rsplit("FROM ", 1)[1].split('"')[1]
+        queried.append(table)
+        return {"rows": [{"n": "10", "c0_nulls": "1", "c0_ndv": "7", "c0_min": "1", "c0_max": "9", "c0_width": "3"}]}
+
+    return queried, execute
+
+def test_fresh_stats_are_not_recollected(sampled):
+    queried, execute = sampled
+    column_stats.refresh_stats("db", TABLES, max_age_s=3600, execute=execute)
+    column_stats.refresh_stats("db", TABLES, max_age_s=3600, execute=execute)
+    assert sorted(queried) == ["trips", "zones"]
+    stored = column_stats.load_stats("db")
+    assert stored["trips"].source == "sample"
+    assert stored["trips"].row_count == round(10 * 100 / column_stats.settings.stats_sample_percent)
+    column_stats.refresh_stats("db", TABLES, max_age_s=0, execute=execute)
+    assert len(queried) == 4
+
+def test_stale_stats_are_recollected(sampled):
+    queried, execute = sampled
+    column_stats.refresh_stats("db", TABLES, max_age_s=3600, execute=execute)
+    stats = column_stats.load_stats("db")
+    stats["zones"].collected_at -= 7200
+    column_stats.save_stats("db", stats)
+    column_stats.refresh_stats("db", TABLES, max_age_s=3600, execute=execute)
+    assert queried == ["trips", "zones", "zones"]
+
+def test_invalidate_drops_only_named_tables(sampled):
+    queried, execute = sampled
+    column_stats.refresh_stats("db", TABLES, max_age_s=3600, execute=execute)
+    column_stats.invalidate_stats("db", ["trips", "missing"])
+    assert set(column_stats.load_stats("db")) == {"zones"}
+    column_stats.refresh_stats("db", TABLES, max_age_s=3600, execute=execute)
+    assert queried == ["trips", "zones", "trips"]
+    assert column_stats.get_column_stats("db", "trips", "fare").ndv == 7
+
+def test_failed_table_keeps_the_others(sampled):
+    queried, execute = sampled
+
+    def flaky(sql, database):
+        return {"error": "TABLE_NOT_FOUND"} if '"zones"' in sql else execute(sql, database)
+
+    stats = column_stats.refresh_stats("db", TABLES, max_age_s=3600, execute=flaky)
+    assert set(stats) == {"trips"} and set(column_stats.load_stats("db")) == {"trips"}
+
+def test_glue_statistics_win_over_sampling(monkeypatch, tmp_path):
+    monkeypatch.setattr(column_stats.settings, "cache_dir", str(tmp_path))
+    monkeypatch.setattr(column_stats, "get_column_statistics", lambda db, table, cols: [
+        {"ColumnName": "fare", "ColumnType": "double", "StatisticsData": {
+            "Type": "DOUBLE", "DoubleColumnStatisticsData": {
+                "NumberOfNulls": 5, "NumberOfDistinctValues": 40, "MinimumValue": 0.5, "MaximumValue": 99.0}}}])
+    monkeypatch.setattr(column_stats, "get_table_parameters", lambda db, table: {"recordCount": "100"})
+
+    def execute(sql, database):
+        raise AssertionError("sampled although Glue has statistics")
+
+    ts = column_stats.refresh_stats("db", TABLES[:1], execute=execute)["trips"]
+    assert (ts.source, ts.row_count) == ("glue", 100)
+    fare = ts.columns["fare"]
+    assert (fare.null_fraction, fare.ndv, fare.min_value, fare.max_value, fare.avg_width) == (0.05, 40, "0.5", "99.0", 8)
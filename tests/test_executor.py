@@ -0,0 +1,167 @@
+import io
+import json
+
+import pytest
+
+from agent_cli import executor
+from agent_cli.executor import HttpExecutor, InProcessExecutor, get_executor, set_executor
+from query_api import athena
+
+COLUMNS = ["zone", "trips"]
+OUTPUT = "s3://results/athena/q1.csv"
+
+class FakeAthena:
+    """One query "q1" whose result arrives in `pages` pages of `rows` rows each."""
+
+    def __init__(self, rows=3, pages=1, state="SUCCEEDED"):
+        self.rows, self.pages, self.state = rows, pages, state
+        self.fetched = 0
+
+    def start_query_execution(self, QueryString, **kwargs):
+        self.sql = QueryString
+        return {"QueryExecutionId": "q1"}
+
+    def get_query_execution(self, QueryExecutionId):
+        return {"QueryExecution": {"Status": {"State": self.state, "StateChangeReason": "COLUMN_NOT_FOUND: x"},
+                                   "Statistics": {"DataScannedInBytes": 2048, "EngineExecutionTimeInMillis": 120},
+                                   "ResultConfiguration": {"OutputLocation": OUTPUT}}}
+
+    def get_query_results(self, QueryExecutionId, NextToken=None):
+        page = int(NextToken or 0)
+        self.fetched += 1
+        rows = ([COLUMNS] if page == 0 else []) + [[f"z{page}-{i}", str(i)] for i in range(self.rows)]
+        out = {"ResultSet": {"ResultSetMetadata": {"ColumnInfo": [{"Name": "zone", "Type": "varchar"},
+                                                                  {"Name": "trips", "Type": "bigint"}]},
+                             "Rows": [{"Data": [{"VarCharValue": v} for v in r]} for r in rows]}}
+        if page + 1 < self.pages:
+            out["NextToken"] = str(page + 1)
+        return out
+
+    def get_query_runtime_statistics(self, QueryExecutionId):
+        return {"QueryRuntimeStatistics": {"Rows": {"OutputRows": self.rows * self.pages}}}
+
+class FakeS3:
+    def __init__(self, csv_bytes):
+        self.csv_bytes = csv_bytes
+        self.uploads = {}
+
+    def head_object(self, Bucket, Key):
+        return {"ContentLength": self.csv_bytes}
+
+    def generate_presigned_url(self, op, Params, ExpiresIn):
+        return f"https://{Params['Bucket']}.s3/{Params['Key']}?X-Amz-Expires={ExpiresIn}"
+
+    def get_object(self, Bucket, Key):
+        return {"Body": io.BytesIO(b"zone,trips\nz0-0,0\nz0-1,1\n")}
+
+    def upload_fileobj(self, f, Bucket, Key, ExtraArgs):
+        self.uploads[Key] = f.read()
+
+@pytest.fixture
+def aws(monkeypatch):
+    def install(athena_client, csv_bytes=100):
+        s3 = FakeS3(csv_bytes)
+        monkeypatch.setattr(athena, "_clients", {"athena": athena_client, "s3": s3})
+        return s3
+    monkeypatch.setattr(athena.settings, "inline_result_max_bytes", 1000)
+    monkeypatch.setattr(athena.settings, "result_preview_rows", 2)
+    monkeypatch.setattr(athena.settings, "result_offload_format", "csv")
+    monkeypatch.setattr(athena.settings, "result_url_ttl_s", 900)
+    return install
+
+def run(sql="SELECT zone, count(*) FROM trips GROUP BY 1"):
+    return InProcessExecutor().run(sql, "db")
+
+def test_small_result_is_inline(aws):
+    aws(FakeAthena(rows=3))
+    result = run()
+    assert result["row_count"] == 3 and not result["truncated"] and "result_location" not in result
+    assert result["rows"][0] == {"zone": "z0-0", "trips": "0"} and result["bytes_scanned"] == 2048
+
+def test_small_multi_page_result_is_fetched_whole(aws):
+    client = FakeAthena(rows=3, pages=3)
+    aws(client, csv_bytes=100)
+    result = run()
+    assert client.fetched == 3 and result["row_count"] == 9 and not result["truncated"]
+
+def test_large_result_is_offloaded_without_fetching_every_page(aws):
+    client = FakeAthena(rows=3, pages=50)
+    aws(client, csv_bytes=50_000)  # Athena's CSV already exceeds the inline limit
+    result = run()
+    assert client.fetched == 1
+    assert result["truncated"] and len(result["rows"]) == 2 and result["row_count"] == 150
+    assert result["result_location"] == {"uri": OUTPUT, "url": "https://results.s3/athena/q1.csv?X-Amz-Expires=900",
+                                         "format": "csv", "bytes": 50_000, "expires_in": 900}
+
+def test_wide_first_page_is_offloaded(aws, monkeypatch):
+    monkeypatch.setattr(athena.settings, "inline_result_max_bytes", 50)
+    aws(FakeAthena(rows=3))
+    result = run()
+    assert result["truncated"] and result["result_location"]["uri"] == OUTPUT
+
+def test_ndjson_offload(aws, monkeypatch):
+    monkeypatch.setattr(athena.settings, "inline_result_max_bytes", 50)
+    monkeypatch.setattr(athena.settings, "result_offload_format", "ndjson")
+    s3 = aws(FakeAthena(rows=3))
+    result = run()
+    loc = result["result_location"]
+    assert loc["uri"] == "s3://results/athena/q1.ndjson" and loc["format"] == "ndjson"
+    lines = s3.uploads["athena/q1.ndjson"].decode().splitlines()
+    assert [json.loads(line) for line in lines] == [{"zone": "z0-0", "trips": "0"}, {"zone": "z0-1", "trips": "1"}]
+    assert result["row_count"] == 2 and loc["bytes"] == len(s3.uploads["athena/q1.ndjson"])
+
+def test_engine_error_becomes_the_error_contract(aws):
+    aws(FakeAthena(state="FAILED"))
+    assert run() == {"error": "Athena error: FAILED: COLUMN_NOT_FOUND: x"}
+
+class FakeResponse:
+    def __init__(self, status_code, payload):
+        self.status_code, self.payload = status_code, payload
+        self.text = json.dumps(payload)
+
+    def json(self):
+        return self.payload
+
+class FakeSession:
+    def __init__(self, response):
+        self.response = response
+        self.posted = []
+
+    def mount(self, prefix, adapter):
+        pass
+
+    def post(self, url, json, timeout):
+        self.posted.append((url, json))
+        if isinstance(self.response, Exception):
+            raise self.response
+        return self.response
+
+def test_http_executor_passes_the_same_contract_through(aws):
+    aws(FakeAthena(rows=3, pages=50), csv_bytes=50_000)
+    offloaded = run()
+    session = FakeSession(FakeResponse(200, json.loads(json.dumps(offloaded))))
+    result = HttpExecutor(base_url="https://api/", session=session).run("SELECT 1", "db")
+    assert result == offloaded
+    assert session.posted == [("https://api/sql", {"query": "SELECT 1", "database": "db"})]
+
+@pytest.mark.parametrize("response, error", [
+    (FakeResponse(400, {"detail": "Athena error: FAILED"}), '{"detail": "Athena error: FAILED"}'),
+    (ConnectionError("refused"), "HTTP error: refused"),
+])
+def test_http_executor_errors(response, error):
+    assert HttpExecutor(base_url="https://api", session=FakeSession(response)).run("SELECT 1", "db") == {"error": error}
+
+def test_http_executor_without_base_url():
+    assert "QUERY_API_BASE" in HttpExecutor(base_url="", session=FakeSession(None)).run("SELECT 1", "db")["error"]
+
+def test_get_executor_follows_the_setting(monkeypatch):
+    monkeypatch.setattr(executor.settings, "sql_executor", "inprocess")
+    set_executor(None)
+    try:
+        assert isinstance(get_executor(), InProcessExecutor) and get_executor() is get_executor()
+        set_executor(None)
+        monkeypatch.setattr(executor.settings, "sql_executor", "grpc")
+        with pytest.raises(ValueError, match="Unknown SQL_EXECUTOR 'grpc'"):
+            get_executor()
+    finally:
+        set_executor(None)
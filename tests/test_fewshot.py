@@ -0,0 +1,53 @@
+import pytest
+
+from agent_cli import fewshot
+from agent_cli.fewshot import FewShotLibrary, render_examples
+from agent_cli.tokens import estimate_tokens
+
+PAIRS = [
+    ("average fare per payment type", 'SELECT payment_type, avg(fare_amount) FROM "2019" GROUP BY 1'),
+    ("average tip per payment type", 'SELECT payment_type, avg(tip_amount) FROM "2019" GROUP BY 1'),
+    ("total fare per vendor", 'SELECT vendorid, sum(fare_amount) FROM "2019" GROUP BY 1'),
+    ("count zones per borough", "SELECT borough, count(*) FROM lookup GROUP BY 1"),
+    ("longest trip per day", 'SELECT day, max(trip_distance) FROM "2019" GROUP BY 1'),
+]
+
+@pytest.fixture
+def library(monkeypatch, tmp_path):
+    monkeypatch.setattr(fewshot, "SEED_FEWSHOTS", [{"question": "count trips", "sql": 'SELECT count(*) FROM "2019"'}])
+    lib = FewShotLibrary("db", path=str(tmp_path / "fewshots.jsonl"))
+    for q, sql in PAIRS:
+        assert lib.record_success(q, sql)
+    return lib
+
+def questions(examples):
+    return [e.question for e in examples]
+
+def test_k_most_similar_first(library):
+    picked = library.select("average fare amount per payment type", ["2019", "lookup"], k=2, token_budget=10_000)
+    assert questions(picked) == ["average fare per payment type", "average tip per payment type"]
+
+def test_token_budget(library):
+    one = estimate_tokens(render_examples([library.examples[1]])) + 2
+    picked = library.select("average fare amount per payment type", ["2019"], k=5, token_budget=one)
+    assert questions(picked) == ["average fare per payment type"]
+    assert library.select("average fare amount per payment type", ["2019"], k=5, token_budget=1) == []
+
+def test_skips_missing_tables_and_the_question_itself(library):
+    picked = library.select("count zones per borough", ["2019"], k=10, token_budget=10_000)
+    assert "count zones per borough" not in questions(picked)
+    assert all("lookup" not in e.sql for e in picked)
+    assert len(picked) == len(PAIRS)  # the seed and the four on "2019"
+
+def test_duplicates_are_not_recorded_and_the_file_reloads(library):
+    assert not library.record_success("Average fare per payment type?", "SELECT 1")
+    reloaded = FewShotLibrary("db", path=library.path)
+    assert questions(reloaded.examples) == questions(library.examples)
+
+def test_trim_keeps_seeds_and_drops_the_oldest(library, monkeypatch):
+    monkeypatch.setattr(fewshot.settings, "fewshot_max_examples", 4)
+    library.record_success("median fare per zone", 'SELECT zone, approx_percentile(fare_amount, 0.5) FROM "2019"')
+    assert questions(library.examples) == ["count trips", "count zones per borough", "longest trip per day",
+                                           "median fare per zone"]
+    assert len(library._vecs) == 4
+    assert questions(FewShotLibrary("db", path=library.path).examples) == questions(library.examples)
@@ -0,0 +1,110 @@
+import json
+
+import pytest
+
+from agent_cli import glue_catalog, lambda_handler, sinks
+
+TABLES = [{"table": "trips", "columns": ["fare"], "partitions": [], "types": {"fare": "double"}}]
+
+@pytest.fixture
+def calls(monkeypatch):
+    monkeypatch.setattr(lambda_handler.settings, "catalog_feed", False)
+    monkeypatch.setattr(lambda_handler, "get_tables_and_columns", lambda db: TABLES)
+    monkeypatch.setattr(lambda_handler, "load_stats", lambda db: {})
+    monkeypatch.setattr(lambda_handler, "last_generation_metrics", lambda: None)
+    lambda_handler._catalogs.clear()
+    seen = []
+
+    def answer(question, database, **kwargs):
+        seen.append((question, database, kwargs))
+        ok = question != "bad"
+        return {"ok": ok, "sql": "SELECT 1", "result": {"rows": [[1]]} if ok else None, "attempts": 1 if ok else 3,
+                "semantic_cache": False, "error": None if ok else "COLUMN_NOT_FOUND: x",
+                "errors": [] if ok else [{"kind": "COLUMN_NOT_FOUND"}]}
+
+    monkeypatch.setattr(lambda_handler, "answer_question", answer)
+    return seen
+
+def test_http_uses_answer_question_with_warm_catalog(calls):
+    for _ in range(2):
+        out = lambda_handler.handler({"body": json.dumps({"question": "q", "db": "d"})}, None)
+        body = json.loads(out["body"])
+        assert out["statusCode"] == 200 and body["sql"] == "SELECT 1" and body["result"] == {"rows": [[1]]}
+    assert body["warm"]["catalog_cached"] is True
+    question, database, kwargs = calls[-1]
+    assert (question, database) == ("q", "d")
+    assert kwargs["tables"] is TABLES and kwargs["stats"] == {}
+    assert "fare" in kwargs["render"](TABLES)
+
+def test_http_failure_reports_classified_errors(calls):
+    body = json.loads(lambda_handler.handler({"question": "bad", "db": "d"}, None)["body"])
+    assert body["result"] == {"error": "COLUMN_NOT_FOUND: x", "errors": [{"kind": "COLUMN_NOT_FOUND"}]}
+    assert body["attempts"] == 3
+
+class FakeS3:
+    def generate_presigned_url(self, op, Params, ExpiresIn):
+        return f"https://{Params['Bucket']}.s3/{Params['Key']}?X-Amz-Expires={ExpiresIn}"
+
+def big_result(n=60_000):
+    rows = [{"trip": i, "note": "x" * 100} for i in range(n)]
+    return {"columns": ["trip", "note"], "schema": [{"name": "trip", "type": "bigint"}], "rows": rows,
+            "row_count": n, "truncated": False, "output": "s3://results/athena/q1.csv", "query_execution_id": "q1"}
+
+def test_small_response_is_untouched():
+    response = {"sql": "SELECT 1", "result": {"rows": [[1]], "row_count": 1}}
+    assert json.loads(lambda_handler._response_body(response)) == response
+
+def test_oversized_response_gets_preview_and_link(monkeypatch):
+    monkeypatch.setattr(glue_catalog, "s3_client", lambda: FakeS3())
+    body = lambda_handler._response_body({"sql": "SELECT *", "result": big_result()})
+    assert len(body) <= lambda_handler.MAX_RESPONSE_BYTES
+    result = json.loads(body)["result"]
+    assert result["truncated"] and len(result["rows"]) == lambda_handler.PREVIEW_ROWS
+    assert result["row_count"] == 60_000 and result["schema"] == [{"name": "trip", "type": "bigint"}]
+    loc = result["result_location"]
+    assert loc["uri"] == "s3://results/athena/q1.csv" and loc["format"] == "csv"
+    assert loc["url"].startswith("https://results.s3/athena/q1.csv")
+
+def test_oversized_response_without_output_location_keeps_preview(monkeypatch):
+    monkeypatch.setattr(glue_catalog, "s3_client", lambda: FakeS3())
+    result = dict(big_result(), output=None)
+    out = json.loads(lambda_handler._response_body({"sql": "SELECT *", "result": result}))["result"]
+    assert out["truncated"] and "result_location" not in out
+
+def test_cli_prints_truncated_result_without_location(capsys):
+    from agent_cli.agent import _print_result
+    _print_result({"rows": [[1]], "row_count": 10, "truncated": True})
+    assert "first 1 rows" in capsys.readouterr().out
+
+class FakeSqs:
+    def __init__(self):
+        self.bodies = []
+
+    def send_message(self, QueueUrl, MessageBody):
+        self.bodies.append(MessageBody)
+
+def test_sqs_sink_replaces_rows_above_the_limit(monkeypatch):
+    monkeypatch.setattr(glue_catalog, "s3_client", lambda: FakeS3())
+    sink = sinks.SqsSink("https://sqs.us-east-1.amazonaws.com/1/results")
+    sink._client = FakeSqs()
+    sink.write("m1", {"ok": True, "result": {"rows": [[1]], "row_count": 1}})
+    sink.write("m2", {"ok": True, "result": big_result(3_000)})
+    small, big = (json.loads(b) for b in sink._client.bodies)
+    assert small["result"]["rows"] == [[1]]
+    assert all(len(b.encode()) <= sinks.MAX_SQS_RECORD_BYTES for b in sink._client.bodies)
+    assert "rows" not in big["result"] and big["result"]["row_count"] == 3_000 and big["result"]["truncated"]
+    assert big["result"]["result_location"]["uri"] == "s3://results/athena/q1.csv"
+
+def test_sqs_sink_size_error_is_permanent(calls, monkeypatch):
+    class TooLarge(sinks.Sink):
+        written = []
+
+        def write(self, key, record):
+            if record.get("ok"):
+                raise sinks.SinkRecordTooLarge("300000 bytes without rows")
+            self.written.append(record)
+
+    monkeypatch.setattr(lambda_handler, "get_sink", TooLarge)
+    event = {"Records": [{"messageId": "m1", "eventSource": "aws:sqs", "body": json.dumps({"question": "q"})}]}
+    assert lambda_handler.handler(event, None) == {"batchItemFailures": []}
+    assert TooLarge.written[0]["error"].startswith("record too large for the sink")
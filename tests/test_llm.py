@@ -0,0 +1,77 @@
+import json
+
+import pytest
+import requests
+from botocore.exceptions import EventStreamError
+
+from agent_cli.llm import BedrockBackend, OpenAIBackend, RetryableError, RetryBudget
+
+class FakeResponse:
+    def __init__(self, status_code, text=""):
+        self.status_code, self.text, self.closed = status_code, text, False
+
+    def close(self):
+        self.closed = True
+
+@pytest.mark.parametrize("status, error", [(400, RuntimeError), (404, RuntimeError), (429, RetryableError),
+                                           (503, RetryableError)])
+def test_openai_closes_failed_responses(status, error):
+    session = requests.Session()
+    r = FakeResponse(status, "nope")
+    session.post = lambda *a, **kw: r
+    backend = OpenAIBackend(base_url="http://llm", api_key="k", model="m", session=session, max_retries=0)
+    with pytest.raises(error, match="nope"):
+        backend._post({}, stream=True)
+    assert r.closed
+
+class FakeStream:
+    def __init__(self, events):
+        self.events, self.closed = events, False
+
+    def __iter__(self):
+        for e in self.events:
+            if isinstance(e, Exception):
+                raise e
+            yield e
+
+    def close(self):
+        self.closed = True
+
+class FakeBedrock:
+    def __init__(self, *streams):
+        self.streams = list(streams)
+
+    def invoke_model_with_response_stream(self, modelId, body):
+        return {"body": self.streams.pop(0)}
+
+def chunk(text):
+    return {"chunk": {"bytes": json.dumps({"generation": text}).encode()}}
+
+def bedrock(*streams, retries=0):
+    return BedrockBackend(model_id="m", client=FakeBedrock(*streams), max_retries=retries, budget=RetryBudget(1.0))
+
+def test_bedrock_stream_reads_chunks():
+    stream = FakeStream([chunk("SELECT 1"), chunk(";"), chunk(" more")])
+    text, metrics = bedrock(stream).generate("p", {}, stream=True)
+    assert text == "SELECT 1;" and metrics.early_stop and stream.closed
+
+@pytest.mark.parametrize("event, error", [
+    ({"throttlingException": {"message": "slow down"}}, RetryableError),
+    ({"modelStreamErrorException": {"message": "boom"}}, RetryableError),
+    ({"internalServerException": {"message": "boom"}}, RetryableError),
+    ({"serviceUnavailableException": {"message": "boom"}}, RetryableError),
+    ({"validationException": {"message": "bad input"}}, RuntimeError),
+    (EventStreamError({"Error": {"Code": "throttlingException", "Message": "slow down"}}, "InvokeModelWithResponseStream"),
+     RetryableError),
+])
+def test_bedrock_stream_raises_on_error_events(event, error):
+    stream = FakeStream([chunk("SELECT "), event])
+    with pytest.raises(error):
+        bedrock(stream).generate("p", {}, stream=True)
+    assert stream.closed
+
+def test_bedrock_stream_error_is_retried(monkeypatch):
+    monkeypatch.setattr("agent_cli.llm.time.sleep", lambda s: None)
+    failed = FakeStream([chunk("SEL"), {"throttlingException": {"message": "slow down"}}])
+    text, metrics = bedrock(failed, FakeStream([chunk("SELECT 2;")]), retries=1).generate("p", {}, stream=True)
+    assert text == "SELECT 2;" and metrics.retries == 1
@@ -0,0 +1,80 @@
+import pytest
+
+from agent_cli import agent
+from agent_cli.llm import GenerationMetrics
+from agent_cli.llm_cache import LLMCache, cache_key, is_cacheable
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMCache(path=str(tmp_path / "llm_cache.sqlite"))
+
+class FakeBackend:
+    model_id = "fake"
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, prompt, params, stream=False):
+        self.calls += 1
+        return f'SELECT {self.calls} FROM "2019"', GenerationMetrics(total_ms=1.0)
+
+@pytest.mark.parametrize("params, cacheable", [
+    ({"temperature": 0.0, "top_p": 1.0}, True),
+    ({"temperature": 0.0}, True),
+    ({"temperature": 0.1, "top_p": 1.0}, False),
+    ({"temperature": 0.0, "top_p": 0.9}, False),
+    ({"temperature": 0.1, "top_p": 0.9}, False),
+    ({}, False),
+])
+def test_only_greedy_generations_are_cacheable(params, cacheable):
+    assert is_cacheable(params) == cacheable
+
+def test_put_get_discard(cache):
+    key = cache_key("m", {"temperature": 0}, "prompt")
+    assert cache.get(key) is None
+    cache.put(key, 'SELECT 1 FROM "2019"', ["2019"])
+    assert cache.get(key) == 'SELECT 1 FROM "2019"'
+    assert cache.discard(key)
+    assert cache.get(key) is None
+    assert not cache.discard(key)
+
+def test_invalidate_tables(cache):
+    cache.put("a", "x", ["2019"])
+    cache.put("b", "y", ["lookup"])
+    assert cache.invalidate_tables("db", ["2019"]) == 1
+    assert cache.get("a") is None and cache.get("b") == "y"
+
+def test_failed_completion_is_not_replayed(monkeypatch, cache):
+    backend = FakeBackend()
+    monkeypatch.setattr(agent, "get_backend", lambda: backend)
+    monkeypatch.setattr(agent, "get_llm_cache", lambda: cache)
+    monkeypatch.setattr(agent.settings, "llm_cache_enabled", True)
+    monkeypatch.setattr(agent.settings, "llm_streaming", False)
+
+    first = agent.ask_llm("prompt")
+    assert agent.ask_llm("prompt") == first and backend.calls == 1
+    agent.forget_llm("prompt")
+    assert agent.ask_llm("prompt") != first and backend.calls == 2
+    agent.ask_llm("prompt", temperature=0.7)  # sampled: never stored
+    agent.ask_llm("prompt", temperature=0.7)
+    assert backend.calls == 4
+
+def test_default_decoding_is_cached():
+    assert is_cacheable(agent.GENERATION_PARAMS)
+
+def test_repeated_question_is_served_from_the_cache(monkeypatch, cache):
+    backend = FakeBackend()
+    monkeypatch.setattr(agent, "get_backend", lambda: backend)
+    monkeypatch.setattr(agent, "get_llm_cache", lambda: cache)
+    monkeypatch.setattr(agent, "run_sql_via_api", lambda sql, db: {"columns": ["c"], "rows": [[1]]})
+    monkeypatch.setattr(agent, "record_success", lambda *a: None)
+    for name, value in [("llm_cache_enabled", True), ("llm_streaming", False), ("semantic_cache_enabled", False),
+                        ("fewshot_retrieval", False), ("catalog_feed", False), ("candidates", 1)]:
+        monkeypatch.setattr(agent.settings, name, value)
+    tables = [{"table": "2019", "columns": ["fare_amount"], "partitions": []}]
+
+    first = agent.answer_question("How many trips?", "db", tables=tables, stats={}, log=None)
+    second = agent.answer_question("How many trips?", "db", tables=tables, stats={}, log=None)
+    assert first["ok"] and second["ok"] and second["sql"] == first["sql"]
+    assert backend.calls == 1
+    assert second["attempt_log"][0]["cached"]
@@ -0,0 +1,114 @@
+import base64
+import json
+
+import pytest
+
+from query_api import lambda_handler
+
+def event(body, method="POST", path="/sql"):
+    return {"version": "2.0", "rawPath": path, "rawQueryString": "", "routeKey": "$default",
+            "headers": {"content-type": "application/json", "host": "api"}, "body": body, "isBase64Encoded": False,
+            "requestContext": {"http": {"method": method, "path": path, "sourceIp": "10.0.0.1",
+                                        "protocol": "HTTP/1.1"}, "stage": "$default", "accountId": "1",
+                               "apiId": "api", "domainName": "api", "requestId": "r", "routeKey": "$default",
+                               "timeEpoch": 0, "time": "now"}}
+
+BODIES = ["{}", '{"query": null}', '{"query": [1]}', '{"query": 5}', '{"query": "SELECT 1", "database": 5}',
+          "not json", "[1]", None]
+
+@pytest.mark.parametrize("body", BODIES)
+def test_matches_fastapi(body, monkeypatch):
+    pytest.importorskip("fastapi")
+    pytest.importorskip("mangum")
+    from query_api import app
+
+    def run_query(sql, **kwargs):
+        return {"sql": sql, **kwargs}
+
+    monkeypatch.setattr(app, "run_query", run_query)
+    monkeypatch.setattr(lambda_handler, "run_query", run_query)
+    expected = app.handler(event(body), type("Context", (), {})())
+    out = lambda_handler.handler(event(body), None)
+    assert out["statusCode"] == expected["statusCode"]
+    assert json.loads(out["body"]) == json.loads(expected["body"])
+
+@pytest.mark.parametrize("body, detail", [
+    ("{}", [{"loc": ["body", "query"], "msg": "field required", "type": "value_error.missing"}]),
+    ('{"query": null}', [{"loc": ["body", "query"], "msg": "none is not an allowed value",
+                          "type": "type_error.none.not_allowed"}]),
+    ('{"query": [1]}', [{"loc": ["body", "query"], "msg": "str type expected", "type": "type_error.str"}]),
+    ("[1]", [{"loc": ["body"], "msg": "value is not a valid dict", "type": "type_error.dict"}]),
+    (None, [{"loc": ["body"], "msg": "field required", "type": "value_error.missing"}]),
+    ("not json", [{"loc": ["body", 0], "msg": "Expecting value: line 1 column 1 (char 0)",
+                   "type": "value_error.jsondecode",
+                   "ctx": {"msg": "Expecting value", "doc": "not json", "pos": 0, "lineno": 1, "colno": 1}}]),
+])
+def test_pydantic_v1_shape(body, detail, monkeypatch):
+    # as FastAPI 0.99.1 + pydantic 1.10.13 (requirements.txt) answer these bodies
+    monkeypatch.setattr(lambda_handler, "_pydantic_v1", lambda: True)
+    out = lambda_handler.handler(event(body), None)
+    assert out["statusCode"] == 422 and json.loads(out["body"]) == {"detail": detail}
+
+def test_pydantic_v1_coerces_numbers(monkeypatch):
+    monkeypatch.setattr(lambda_handler, "_pydantic_v1", lambda: True)
+    assert lambda_handler.parse_sql_request('{"query": 5}')[0]["query"] == "5"
+
+@pytest.fixture
+def engine(monkeypatch):
+    calls = []
+
+    def run_query(sql, database, workgroup, output_s3):
+        calls.append(("sql", sql, database, workgroup))
+        if sql == "boom":
+            raise RuntimeError("Athena error: FAILED: syntax")
+        return {"rows": [{"a": "1"}], "row_count": 1}
+
+    def list_tables(db):
+        calls.append(("tables", db))
+        if db == "missing":
+            raise RuntimeError("EntityNotFoundException")
+        return ["2019", "lookup"]
+
+    monkeypatch.setattr(lambda_handler, "run_query", run_query)
+    monkeypatch.setattr(lambda_handler, "list_tables", list_tables)
+    return calls
+
+def call(event_):
+    out = lambda_handler.handler(event_, None)
+    return out["statusCode"], json.loads(out["body"])
+
+def v1_event(method, path, body=None, params=None, b64=False):
+    if b64 and body is not None:
+        body = base64.b64encode(body.encode()).decode()
+    return {"httpMethod": method, "path": path, "queryStringParameters": params, "body": body, "isBase64Encoded": b64}
+
+def test_routes(engine):
+    settings = lambda_handler.settings
+    assert call(event(None, "GET", "/health")) == (200, {"ok": True, "region": settings.aws_region,
+                                                          "db": settings.glue_database})
+    assert call(dict(event(None, "GET", "/tables/"), queryStringParameters={"db": "d"})) == \
+        (200, {"database": "d", "tables": ["2019", "lookup"]})
+    assert call(event('{"query": "SELECT 1", "database": "d"}')) == (200, {"rows": [{"a": "1"}], "row_count": 1})
+    assert engine == [("tables", "d"), ("sql", "SELECT 1", "d", settings.athena_workgroup)]
+
+def test_rest_v1_and_base64_events(engine):
+    assert call(v1_event("POST", "/sql", '{"query": "SELECT 2"}', b64=True))[0] == 200
+    assert call(v1_event("GET", "/tables"))[1]["database"] == lambda_handler.settings.glue_database
+    assert engine[0][1] == "SELECT 2"
+
+@pytest.mark.parametrize("method, path, status, detail", [
+    ("GET", "/nope", 404, "Not Found"),
+    ("POST", "/health", 405, "Method Not Allowed"),
+    ("GET", "/sql", 405, "Method Not Allowed"),
+])
+def test_unknown_route_and_method(engine, method, path, status, detail):
+    assert call(event(None, method, path)) == (status, {"detail": detail})
+    assert engine == []
+
+def test_validation_and_engine_errors(engine):
+    status, body = call(event('{"database": "d"}'))
+    assert status == 422 and body["detail"][0]["loc"] == ["body", "query"]
+    assert call(event('{"query": "boom"}')) == (400, {"detail": "Athena error: FAILED: syntax"})
+    assert call(dict(event(None, "GET", "/tables"), queryStringParameters={"db": "missing"})) == \
+        (400, {"detail": "EntityNotFoundException"})
+    assert call({"unexpected": True})[0] == 400
@@ -0,0 +1,82 @@
+import pytest
+
+from agent_cli.repair import ClassifiedError, check_and_execute, classify_error, repair, retry_feedback
+
+TABLES = [
+    {"table": "2019", "columns": ["vendorid", "tpep_pickup_datetime", "payment_type", "fare_amount", "order"],
+     "partitions": ["month"],
+     "types": {"vendorid": "bigint", "tpep_pickup_datetime": "string", "payment_type": "bigint",
+               "fare_amount": "double", "order": "string", "month": "string"}},
+    {"table": "lookup", "columns": ["locationid", "borough", "zone"], "partitions": [],
+     "types": {"locationid": "bigint", "borough": "string", "zone": "string"}},
+]
+
+@pytest.mark.parametrize("message, code, name", [
+    ("COLUMN_NOT_FOUND: line 1:8: Column 'fare' cannot be resolved", "COLUMN_NOT_FOUND", "fare"),
+    ("TABLE_NOT_FOUND: line 1:15: Table 'awsdatacatalog.db.trips' does not exist", "TABLE_NOT_FOUND",
+     "awsdatacatalog.db.trips"),
+    ("FUNCTION_NOT_FOUND: line 1:8: Function 'avrg' not registered", "FUNCTION_NOT_FOUND", "avrg"),
+    ("SYNTAX_ERROR: line 1:15: mismatched input '2019'. Expecting: <identifier>", "SYNTAX_ERROR", "2019"),
+    ("SYNTAX_ERROR: line 1:30: Cannot apply operator: varchar = integer", "TYPE_MISMATCH", None),
+    ("Query exhausted resources at this scale factor", "UNKNOWN", None),
+])
+def test_classify_error(message, code, name):
+    err = classify_error(message)
+    assert (err.code, err.name) == (code, name)
+
+def test_classify_error_position_and_types():
+    err = classify_error("SYNTAX_ERROR: line 2:7: Cannot apply operator: varchar(10) = integer")
+    assert (err.line, err.column, err.types) == (2, 7, ("varchar(10)", "integer"))
+
+@pytest.mark.parametrize("sql, error, expected", [
+    ("SELECT fare_amout FROM \"2019\"", ClassifiedError("COLUMN_NOT_FOUND", "", name="fare_amout"),
+     'SELECT fare_amount FROM "2019"'),
+    ("SELECT zone FROM lookups", ClassifiedError("TABLE_NOT_FOUND", "", name="lookups"), "SELECT zone FROM lookup"),
+    ("SELECT count(*) FROM 2019", ClassifiedError("SYNTAX_ERROR", "", name="2019"), 'SELECT count(*) FROM "2019"'),
+    ('SELECT order FROM "2019"', ClassifiedError("SYNTAX_ERROR", "", name="order"), 'SELECT "order" FROM "2019"'),
+    ('SELECT * FROM "2019" WHERE payment_type = \'1\'', ClassifiedError("TYPE_MISMATCH", ""),
+     'SELECT * FROM "2019" WHERE payment_type = 1'),
+    ('SELECT * FROM "2019" WHERE month IN (1, 2)', ClassifiedError("TYPE_MISMATCH", ""),
+     "SELECT * FROM \"2019\" WHERE month IN ('1', '2')"),
+    ('SELECT * FROM "2019" WHERE tpep_pickup_datetime >= TIMESTAMP \'2019-01-01\'', ClassifiedError("TYPE_MISMATCH", ""),
+     'SELECT * FROM "2019" WHERE CAST(tpep_pickup_datetime AS timestamp) >= TIMESTAMP \'2019-01-01\''),
+    ('SELECT date_trunc(\'day\', tpep_pickup_datetime) FROM "2019"', ClassifiedError("TYPE_MISMATCH", ""),
+     'SELECT date_trunc(\'day\', CAST(tpep_pickup_datetime AS timestamp)) FROM "2019"'),
+])
+def test_rules(sql, error, expected):
+    fix = repair(sql, [error], TABLES)
+    assert fix is not None and fix.sql == expected
+
+@pytest.mark.parametrize("sql, error", [
+    ('SELECT completely_different FROM "2019"', ClassifiedError("COLUMN_NOT_FOUND", "", name="completely_different")),
+    ("SELECT * FROM nothing_like_it", ClassifiedError("TABLE_NOT_FOUND", "", name="nothing_like_it")),
+    ('SELECT avrg(fare_amount) FROM "2019"', ClassifiedError("FUNCTION_NOT_FOUND", "", name="avrg")),
+    ("SELECT 1", ClassifiedError("UNKNOWN", "boom")),
+])
+def test_no_rule_applies(sql, error):
+    assert repair(sql, [error], TABLES) is None
+
+def test_column_fix_leaves_functions_and_qualifiers():
+    sql = 'SELECT zon, zon(x), zon.a FROM lookup'
+    fix = repair(sql, [ClassifiedError("COLUMN_NOT_FOUND", "", name="zon")], TABLES)
+    assert fix.sql == 'SELECT zone, zon(x), zon.a FROM lookup'
+
+def test_check_and_execute_repairs_before_executing():
+    executed = []
+    sql, result, errors = check_and_execute('SELECT fare_amout FROM "2019"', TABLES,
+                                            lambda s: executed.append(s) or {"rows": []})
+    assert executed == ['SELECT fare_amount FROM "2019"']
+    assert (sql, result, errors) == (executed[0], {"rows": []}, [])
+
+def test_check_and_execute_repairs_engine_errors():
+    replies = iter([{"error": "SYNTAX_ERROR: line 1:31: Cannot apply operator: bigint = varchar(1)"}, {"rows": []}])
+    executed = []
+    sql, result, errors = check_and_execute('SELECT * FROM "2019" WHERE vendorid = \'1\'', TABLES,
+                                            lambda s: executed.append(s) or next(replies))
+    assert executed[-1] == sql == 'SELECT * FROM "2019" WHERE vendorid = 1' and not errors
+
+def test_check_and_execute_gives_up():
+    sql, result, errors = check_and_execute('SELECT nope FROM "2019"', TABLES, lambda s: pytest.fail("executed"))
+    assert result is None and [e.code for e in errors] == ["COLUMN_NOT_FOUND"]
+    text = retry_feedback(sql, errors)
+    assert text.startswith("Previous SQL (failed):\nSELECT nope") and "- COLUMN_NOT_FOUND 'nope'" in text
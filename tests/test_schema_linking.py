@@ -0,0 +1,46 @@
+from agent_cli.schema_linking import foreign_keys, link_schema
+
+def table(name, columns, partitions=()):
+    return {"table": name, "columns": list(columns), "partitions": list(partitions)}
+
+TRIPS = table("trips", ["vendorid", "pulocationid", "dolocationid", "passenger_count", "trip_distance", "fare_amount",
+                        "tip_amount", "tolls_amount", "total_amount", "payment_type", "congestion_surcharge"],
+              ["year", "month"])
+ZONES = table("zones", ["locationid", "borough", "zone", "service_zone"])
+WEATHER = table("weather", ["station", "observed_at", "temperature", "precipitation", "wind_speed"], ["day"])
+TABLES = [TRIPS, ZONES, WEATHER]
+
+def render(tables):
+    return "\n".join(f'{t["table"]}({", ".join(t["columns"])}) partitioned by ({", ".join(t["partitions"])})'
+                     for t in tables)
+
+def test_foreign_keys():
+    assert sorted(foreign_keys(TABLES)) == [("trips", "dolocationid", "zones", "locationid"),
+                                            ("trips", "pulocationid", "zones", "locationid")]
+
+def test_keeps_join_partner_and_drops_unrelated_tables():
+    linked = link_schema("average fare by pickup borough", TABLES, render, token_budget=10_000)
+    assert [t["table"] for t in linked.tables] == ["trips", "zones"]
+    assert linked.tables[0] == TRIPS  # within budget: whole tables
+    assert linked.tokens_after < linked.tokens_before
+
+def test_reduced_tables_keep_join_keys_and_partitions():
+    whole = link_schema("average fare by pickup borough", TABLES, render, token_budget=10_000)
+    budget = whole.tokens_after - 10
+    linked = link_schema("average fare by pickup borough", TABLES, render, token_budget=budget)
+    assert linked.tokens_after <= budget
+    trips, zones = linked.tables
+    assert {"fare_amount", "pulocationid", "dolocationid"} <= set(trips["columns"])
+    assert "congestion_surcharge" not in trips["columns"]
+    assert trips["partitions"] == ["year", "month"]
+    assert {"locationid", "borough"} <= set(zones["columns"])
+
+def test_never_returns_an_empty_schema():
+    linked = link_schema("average fare and tip per payment type", TABLES, render, token_budget=1)
+    assert [t["table"] for t in linked.tables] == ["trips"]
+    assert {"fare_amount", "tip_amount", "payment_type"} <= set(linked.tables[0]["columns"])
+    assert linked.tables[0]["partitions"] == ["year", "month"]
+
+def test_max_tables_keeps_the_best_scoring():
+    linked = link_schema("average fare by pickup borough", TABLES, render, max_tables=1, token_budget=10_000)
+    assert [t["table"] for t in linked.tables] == [max(linked.scores, key=linked.scores.get)]
@@ -0,0 +1,180 @@
+import gzip
+import importlib.util
+import io
+import os
+import random
+
+import pytest
+
+SEED_PY = os.path.join(os.path.dirname(__file__), "..", "setup", "seed.py")
+
+@pytest.fixture(scope="module")
+def seed():
+    """setup/seed.py as a module: it reads S3_BUCKET and builds (offline) boto3 clients at import."""
+    pytest.importorskip("boto3")
+    pytest.importorskip("dotenv")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("S3_BUCKET", "seed-bucket")
+        mp.delenv("AWS_PROFILE", raising=False)
+        mp.setattr("dotenv.load_dotenv", lambda *args, **kwargs: None)  # keep the repo's .env out of the tests
+        spec = importlib.util.spec_from_file_location("seed", SEED_PY)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module
+
+@pytest.mark.parametrize("spec, months", [
+    ("2019-01", ["2019-01"]),
+    ("2019-01, 2019-03", ["2019-01", "2019-03"]),
+    ("2019-11:2020-02", ["2019-11", "2019-12", "2020-01", "2020-02"]),
+    ("2019-01:2019-12", [f"2019-{m:02d}" for m in range(1, 13)]),
+    ("2019-05:2019-05,2020-01", ["2019-05", "2020-01"]),
+    ("2019-06:2019-03", []),
+])
+def test_parse_months(seed, spec, months):
+    assert seed.parse_months(spec) == months
+
+TRIPS_CSV = ("VendorID,tpep_pickup_datetime,passenger_count,fare_amount,note\n"
+             "1,2019-01-01 00:10:00,1.0,7.5,a\n"
+             "2,2019-01-01 00:20:00,2,12.25,\n"
+             "1,2019-01-01 00:30:00\n")  # short row: skipped, not fatal
+
+class FakeS3:
+    def __init__(self, root):
+        self.root = root
+        self.uploads = {}
+
+    def get_object(self, Bucket, Key, Range=None):
+        with open(os.path.join(self.root, Bucket, Key), "rb") as f:
+            data = f.read()
+        if Range:
+            first, last = map(int, Range[len("bytes="):].split("-"))
+            data = data[first:last + 1]
+        return {"Body": io.BytesIO(data)}
+
+    def upload_fileobj(self, fileobj, Bucket, Key, Config=None):
+        self.uploads[Key] = fileobj.read()
+
+def test_convert_to_parquet(seed, monkeypatch, tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    from pyarrow import fs
+    raw = tmp_path / "seed-bucket" / "raw" / "2019" / "01"
+    raw.mkdir(parents=True)
+    (tmp_path / "seed-bucket" / "parquet").mkdir()
+    for i, body in enumerate([TRIPS_CSV, TRIPS_CSV.split("\n", 1)[0] + "\n2,2019-01-02 08:00:00,3,40.0,b\n"]):
+        (raw / f"trips-part-{i:05d}.csv.gz").write_bytes(gzip.compress(body.encode()))
+    monkeypatch.setattr(seed, "s3", FakeS3(str(tmp_path)))
+    monkeypatch.setattr(seed, "PARQUET_FILE_MB", 0)  # a new file after every batch
+    filesystem = fs.SubTreeFileSystem(str(tmp_path), fs.LocalFileSystem())
+
+    out = seed.convert_to_parquet(filesystem, "seed-bucket", ["raw/2019/01/trips-part-00000.csv.gz",
+                                                              "raw/2019/01/trips-part-00001.csv.gz"], "parquet/")
+    assert (out["rows"], out["skipped"]) == (3, 1)
+    assert out["files"] == ["parquet/part-00000.parquet", "parquet/part-00001.parquet"]
+    assert out["schema"].names == ["vendorid", "tpep_pickup_datetime", "passenger_count", "fare_amount", "note"]
+    assert [seed.glue_type(f.type) for f in out["schema"]] == ["bigint", "timestamp", "double", "double", "string"]
+    table = pa.concat_tables(pq.read_table(str(tmp_path / "seed-bucket" / f)) for f in out["files"])
+    assert table.column("passenger_count").to_pylist() == [1.0, 2.0, 3.0]
+    assert table.column("note").to_pylist() == ["a", None, "b"]
+
+class AlreadyExists(Exception):
+    pass
+
+class FakeGlue:
+    exceptions = type("Exceptions", (), {"AlreadyExistsException": AlreadyExists})
+
+    def __init__(self, partition_error="AlreadyExistsException"):
+        self.tables, self.calls, self.partition_error = {}, [], partition_error
+
+    def create_table(self, DatabaseName, TableInput):
+        self.calls.append("create")
+        if TableInput["Name"] in self.tables:
+            raise AlreadyExists()
+        self.tables[TableInput["Name"]] = TableInput
+
+    def update_table(self, DatabaseName, TableInput):
+        self.calls.append("update")
+        self.tables[TableInput["Name"]] = TableInput
+
+    def batch_create_partition(self, DatabaseName, TableName, PartitionInputList):
+        self.calls.append(len(PartitionInputList))
+        first = PartitionInputList[0]["Values"]
+        return {"Errors": [{"PartitionValues": first,
+                            "ErrorDetail": {"ErrorCode": self.partition_error, "ErrorMessage": "nope"}}]}
+
+def test_register_parquet_table_is_idempotent(seed, monkeypatch):
+    glue = FakeGlue()
+    monkeypatch.setattr(seed, "glue", glue)
+    partitions = [(str(2000 + i // 12), f"{i % 12 + 1:02d}") for i in range(150)]
+    columns = [{"Name": "fare_amount", "Type": "double"}]
+    for _ in range(2):
+        seed.register_parquet_table("db", "trips_parquet", "s3://b/parquet/", columns, partitions)
+    assert glue.calls == ["create", 100, 50, "create", "update", 100, 50]
+    table = glue.tables["trips_parquet"]
+    assert [k["Name"] for k in table["PartitionKeys"]] == ["year", "month"]
+    assert table["StorageDescriptor"]["Location"] == "s3://b/parquet/"
+
+def test_register_parquet_table_surfaces_other_partition_errors(seed, monkeypatch):
+    monkeypatch.setattr(seed, "glue", FakeGlue(partition_error="AccessDeniedException"))
+    with pytest.raises(RuntimeError, match="nope"):
+        seed.register_parquet_table("db", "t", "s3://b/p/", [], [("2019", "01")])
+
+class FakeDownload:
+    """requests.get(..., stream=True) for a gzip body."""
+
+    def __init__(self, body, content_length=True):
+        self.raw = io.BytesIO(body)
+        self.headers = {"Content-Length": str(len(body))} if content_length else {}
+
+    def raise_for_status(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+def trips_csv(rows, seed_=0):
+    rng = random.Random(seed_)
+    lines = [f"{i},{rng.getrandbits(128):032x},{rng.random():.6f}\n" for i in range(rows)]
+    return "id,token,fare\n", "".join(lines)
+
+PART = 8 * 64 * 1024
+
+def split(seed, monkeypatch, body, content_length=True):
+    s3 = FakeS3("")
+    monkeypatch.setattr(seed, "s3", s3)
+    # 64 KB reads and 512 KB parts: the production 1 MB : 32 MB ratio, scaled down
+    monkeypatch.setattr(seed, "MB", 64 * 1024)
+    monkeypatch.setattr(seed, "SEED_SPLIT_MB", 8)
+    monkeypatch.setattr(seed.requests, "get", lambda url, stream, timeout: FakeDownload(body, content_length))
+    stats = seed.upload_split("seed-bucket", "raw/2019/01/trips.csv.gz", "https://example/trips.csv.gz")
+    return stats, [s3.uploads[k] for k in stats["keys"]]
+
+@pytest.mark.parametrize("content_length", [True, False])
+def test_upload_split_round_trip(seed, monkeypatch, content_length):
+    header, rows = trips_csv(120_000)
+    body = gzip.compress((header + rows).encode())
+    stats, parts = split(seed, monkeypatch, body, content_length=content_length)
+    assert stats["keys"] == [f"raw/2019/01/trips-part-{i:05d}.csv.gz" for i in range(len(parts))]
+    if content_length:  # Content-Length / SEED_SPLIT_MB parts
+        assert len(parts) == -(-len(body) // PART)
+    else:  # no length: a part closes once its own output reaches SEED_SPLIT_MB
+        assert len(parts) >= 3 and all(len(p) >= PART for p in parts[:-1])
+    texts = [gzip.decompress(p).decode() for p in parts]
+    assert all(t.startswith(header) and t.endswith("\n") and len(t) > len(header) for t in texts)
+    assert "".join(t[len(header):] for t in texts) == rows  # cuts only at line ends, nothing lost or repeated
+    if content_length:  # cut by compressed input consumed: parts come out about the same size
+        sizes = [len(p) for p in parts[:-1]]
+        assert max(sizes) < 1.5 * min(sizes)
+
+def test_upload_split_concatenated_members_and_small_files(seed, monkeypatch):
+    header, rows = trips_csv(3_000)
+    half = len(rows) // 2
+    cut = rows.index("\n", half) + 1
+    body = gzip.compress((header + rows[:cut]).encode()) + gzip.compress(rows[cut:].encode())
+    stats, parts = split(seed, monkeypatch, body)
+    assert len(parts) == 1 and gzip.decompress(parts[0]).decode() == header + rows
+    stats, parts = split(seed, monkeypatch, gzip.compress(header.encode()))
+    assert [gzip.decompress(p).decode() for p in parts] == [header]  # header-only source still lands
@@ -0,0 +1,150 @@
+import json
+
+import pytest
+
+from agent_cli.embeddings import embed, normalize_text
+from agent_cli.semantic_cache import SemanticCache, literal_signature
+
+SQL = 'SELECT payment_type, avg(fare_amount) FROM "2019" GROUP BY 1'
+
+# (cached question, new question, should reuse the cached SQL)
+PAIRS = [
+    ("Average fare per payment type", "What is the average fare for each payment type", True),
+    ("Average fare per payment type", "mean fare amount by payment type", True),
+    ("Average fare per payment type", "Average fare amount per payment type", True),
+    ("Count trips per payment type", "How many trips for each payment type?", True),
+    ("Count trips per payment type", "count rides per payment method", True),
+    ("Top 10 pickup zones by trips", "Show me the top 10 pickup zones by trips", True),
+    ("Average fare per payment type", "Max fare per payment type", False),
+    ("Average fare per payment type", "Average tip per payment type", False),
+    ("Average fare per payment type", "Average fare per vendor", False),
+    ("Count trips per borough", "Count trips per pickup borough", False),
+    ("Count trips per pickup zone", "Count trips per dropoff zone", False),
+    ("Average tip amount per hour", "Average total amount per hour", False),
+    ("trips longer than 20 miles", "trips shorter than 20 miles", False),
+    ("trips with at least 3 passengers", "trips with at most 3 passengers", False),
+    ("trips with a tip", "trips without a tip", False),
+    ("Count trips in January", "Count trips in February", False),
+    ("Count trips per payment type", "Count trips per payment type in 2019", False),
+]
+
+@pytest.mark.parametrize("cached, question, hit", PAIRS)
+def test_lookup(cached, question, hit):
+    cache = SemanticCache(dim=128)
+    cache.insert(cached, SQL, "db", "v1")
+    assert (cache.lookup(question, "db", "v1") is not None) == hit
+
+# Written after the threshold was set and never used to tune it: (cached question, new question, paraphrase)
+HELD_OUT = [
+    ("Total tip amount per vendor", "What is the total tip for each vendor?", True),
+    ("Average trip distance by hour", "mean trip distance per hour", True),
+    ("Count trips per dropoff zone", "how many rides for each dropoff zone", True),
+    ("Median fare per borough", "What is the median fare in each borough", True),
+    ("Total revenue per day", "Show total revenue by day", True),
+    ("Average passengers per trip by vendor", "average passenger count per trip for each vendor", True),
+    ("Trips with more than 4 passengers", "rides with more than 4 passengers", True),
+    ("Top 5 dropoff zones by revenue", "top 5 dropoff zones by total revenue", True),
+    ("Total tip amount per vendor", "Total tolls amount per vendor", False),
+    ("Average trip distance by hour", "Average trip duration by hour", False),
+    ("Count trips per dropoff zone", "Count trips per dropoff borough", False),
+    ("Median fare per borough", "Median tip per borough", False),
+    ("Total revenue per day", "Total revenue per month", False),
+    ("Trips with more than 4 passengers", "Trips with more than 4 miles", False),
+    ("Top 5 dropoff zones by revenue", "Top 5 pickup zones by revenue", False),
+    ("Average fare for credit card payments", "Average fare for cash payments", False),
+    ("Count trips per vendor", "Count trips per rate code", False),
+    ("Average speed per hour", "Average distance per hour", False),
+]
+
+def test_held_out_pairs():
+    hits = {}
+    for cached, question, paraphrase in HELD_OUT:
+        cache = SemanticCache(dim=128)
+        cache.insert(cached, SQL, "db", "v1")
+        hits[question] = (cache.lookup(question, "db", "v1") is not None, paraphrase)
+    assert not [q for q, (hit, paraphrase) in hits.items() if hit and not paraphrase]  # never the wrong SQL
+    assert sum(hit for hit, paraphrase in hits.values() if paraphrase) >= 5  # of 8; the rest fall back to the LLM
+
+@pytest.mark.parametrize("threshold", [0.5, 0.8])
+def test_aggregation_must_match_at_any_threshold(threshold):
+    cache = SemanticCache(dim=128, threshold=threshold)
+    cache.insert("Average fare per payment type", SQL, "db", "v1")
+    assert cache.lookup("Max fare per payment type", "db", "v1") is None
+    assert cache.lookup("Minimum fare per payment type", "db", "v1") is None
+    assert cache.lookup("Average fare per payment type", "db", "v1") is not None
+
+def test_signature():
+    assert literal_signature("Top 10 zones") == literal_signature("the 10 busiest zones") == ("10", "max")
+    assert literal_signature("at least 3 passengers") == ("3", ">=")
+    assert literal_signature("how many trips in total") == ("count", "sum")
+    assert literal_signature("Trips in 'Manhattan' in March") == ("'manhattan'", "mar")
+
+def test_synonyms_fold():
+    assert normalize_text("rides per payment method") == normalize_text("trips per payment type")
+    assert float(embed("mean fare") @ embed("avg fare")) == pytest.approx(1.0)
+
+def test_namespaces_are_separate():
+    cache = SemanticCache(dim=128)
+    cache.insert("Average fare per payment type", SQL, "db", "v1")
+    assert cache.lookup("Average fare per payment type", "db", "v2") is None
+    assert cache.lookup("Average fare per payment type", "other", "v1") is None
+    assert cache.search("Average fare per payment type", "db", "v2") == []
+
+def test_lru_eviction_across_namespaces():
+    cache = SemanticCache(dim=128, max_entries=3, capacity=2)
+    cache.insert("count trips per vendor", SQL, "db", "v1")
+    cache.insert("count trips per borough", SQL, "db", "v2")
+    cache.insert("count trips per zone", SQL, "db", "v1")
+    assert cache.lookup("count trips per vendor", "db", "v1") is not None  # now the most recently used
+    cache.insert("count trips per hour", SQL, "db", "v1")
+    assert len(cache) == 3
+    assert cache.lookup("count trips per borough", "db", "v2") is None
+    assert cache.lookup("count trips per vendor", "db", "v1") is not None
+
+def test_grow_evict_and_reuse_columns():
+    cache = SemanticCache(dim=128, capacity=2)
+    questions = [f"count trips with {n} passengers" for n in range(10)]
+    for q in questions:
+        cache.insert(q, SQL, "db", "v1")
+    assert all(cache.lookup(q, "db", "v1").entry.question == q for q in questions)
+    assert cache.evict(questions[3], "db", "v1")
+    assert not cache.evict(questions[3], "db", "v1")
+    assert cache.lookup(questions[3], "db", "v1") is None
+    cache.insert("count trips with 42 passengers", SQL, "db", "v1")
+    assert len(cache) == 10
+
+def test_shard_max_bounds_one_signature():
+    cache = SemanticCache(dim=128, max_entries=10, shard_max=3, capacity=2)
+    for area in ["harlem", "soho", "chelsea"]:
+        cache.insert(f"count trips in {area}", SQL, "db", "v1")
+    cache.insert("count trips with 2 passengers", SQL, "db", "v1")  # another signature: not counted
+    assert cache.lookup("count trips in harlem", "db", "v1") is not None
+    cache.insert("count trips in tribeca", SQL, "db", "v1")
+    assert len(cache) == 4
+    assert cache.lookup("count trips in soho", "db", "v1") is None  # least recently used of its shard
+    assert cache.lookup("count trips in harlem", "db", "v1") is not None
+    assert cache.lookup("count trips with 2 passengers", "db", "v1") is not None
+
+def test_invalidate_tables():
+    cache = SemanticCache(dim=128)
+    cache.insert("count trips", 'SELECT count(*) FROM "2019"', "db", "v1")
+    cache.insert("count zones", "SELECT count(*) FROM lookup", "db", "v1")
+    cache.insert("count trips", 'SELECT count(*) FROM "2019"', "other", "v1")
+    assert cache.invalidate_tables("db", ["2019"]) == 1
+    assert cache.lookup("count trips", "db", "v1") is None
+    assert cache.lookup("count zones", "db", "v1") is not None
+    assert cache.lookup("count trips", "other", "v1") is not None
+    assert cache.invalidate_tables("other", ["2019"]) == 1
+
+def test_log_replay(tmp_path):
+    path = str(tmp_path / "semantic_cache.jsonl")
+    cache = SemanticCache(dim=128, path=path)
+    cache.insert("count trips per vendor", SQL, "db", "v1")
+    cache.insert("count trips per zone", SQL, "db", "v1")
+    cache.evict("count trips per zone", "db", "v1")
+    reloaded = SemanticCache(dim=128, path=path)
+    reloaded.load()
+    assert len(reloaded) == 1
+    assert reloaded.lookup("count trips per vendor", "db", "v1") is not None
+    with open(path) as f:
+        assert [json.loads(line)["question"] for line in f] == ["count trips per vendor"]
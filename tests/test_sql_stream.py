@@ -0,0 +1,38 @@
+import pytest
+
+from agent_cli.sql_utils import SqlStreamDetector
+
+def feed_all(chunks):
+    d = SqlStreamDetector()
+    for c in chunks:
+        if d.feed(c) is not None:
+            break
+    return d
+
+@pytest.mark.parametrize("text, sql", [
+    ("Here you go:\nSELECT a FROM t; trailing", "SELECT a FROM t;"),
+    ("```sql\nSELECT 'a;b', \"c;\" FROM t -- ;\n/* ; */ WHERE x IN (SELECT 1;) ;",
+     "SELECT 'a;b', \"c;\" FROM t -- ;\n/* ; */ WHERE x IN (SELECT 1;) ;"),
+    ("```sql\nSELECT a FROM t\n```\nmore", "SELECT a FROM t"),
+    ("<think>select nothing; here</think>SELECT 1;", "SELECT 1;"),
+    ("<THINK>select; </Think>\nWITH x AS (SELECT 1) SELECT * FROM x;", "WITH x AS (SELECT 1) SELECT * FROM x;"),
+    ("The selection is: SELECT 'it''s;' FROM t;", "SELECT 'it''s;' FROM t;"),
+])
+@pytest.mark.parametrize("split", [lambda s: [s], list])
+def test_detects_first_statement(text, sql, split):
+    d = feed_all(split(text))
+    assert d.sql == sql
+    assert d.text.rstrip().endswith(sql)
+
+def test_incomplete_statement_stays_open():
+    d = feed_all(["SELECT a FROM t WHERE s = 'x;", "y"])
+    assert not d.done and d.sql is None
+    assert d.text == "SELECT a FROM t WHERE s = 'x;y"
+
+def test_unclosed_think_never_starts():
+    d = feed_all(["<think>", "SELECT 1;" * 100])
+    assert not d.done and d.start is None
+
+def test_tag_split_across_chunks():
+    d = feed_all(["<thi", "nk>select 1;</th", "INK>sel", "ect 2", ";"])
+    assert d.sql == "select 2;"
@@ -0,0 +1,68 @@
+import pytest
+
+from agent_cli.sql_lexer import apply_edits, cte_names, statement_end, tokenize
+from agent_cli.sql_utils import ensure_limit, fingerprint, normalize_sql, quote_table_names, referenced_tables
+
+def test_tokenize_keeps_literals_whole():
+    toks = tokenize("SELECT 'a;b' AS \"x\"\"y\", 1.5e3 -- FROM t\nFROM t /* ; */")
+    assert [(t.kind, t.text) for t in toks] == [
+        ("ident", "SELECT"), ("string", "'a;b'"), ("ident", "AS"), ("qident", '"x""y"'), ("op", ","),
+        ("number", "1.5e3"), ("ident", "FROM"), ("ident", "t")]
+    assert toks[3].lower == 'x"y'
+
+def test_statement_end():
+    sql = "SELECT ';' FROM t WHERE x IN (SELECT 1; ) ; SELECT 2"
+    assert sql[:statement_end(sql)] == "SELECT ';' FROM t WHERE x IN (SELECT 1; ) ;"
+    assert statement_end("SELECT 1 -- ;") is None
+
+def test_apply_edits():
+    assert apply_edits("abcdef", [(4, 5, "E"), (0, 1, "A")]) == "AbcdEf"
+
+def test_cte_names():
+    assert cte_names(tokenize("WITH a AS (SELECT 1), b (x) AS (SELECT 2) SELECT * FROM a, b")) == ["a", "b"]
+
+@pytest.mark.parametrize("sql, tables", [
+    ('SELECT * FROM "2019" t JOIN lookup z ON t.a = z.b', {"2019", "lookup"}),
+    ('SELECT * FROM nyc."2019", db.lookup', {"2019", "lookup"}),
+    ("WITH x AS (SELECT * FROM trips) SELECT * FROM x", {"trips"}),
+    ("SELECT extract(year FROM ts), trim(LEADING ' ' FROM s) FROM trips", {"trips"}),
+    ("SELECT * FROM trips, UNNEST(arr) AS u(v)", {"trips"}),
+    ("SELECT * FROM trips WHERE a IS DISTINCT FROM 2019 AND b IS NOT DISTINCT FROM c", {"trips"}),
+    ("SELECT 'FROM secret' -- FROM other\nFROM trips", {"trips"}),
+])
+def test_referenced_tables(sql, tables):
+    assert referenced_tables(sql) == tables
+
+@pytest.mark.parametrize("sql, expected", [
+    ("SELECT * FROM 2019 WHERE year = 2019", 'SELECT * FROM "2019" WHERE year = 2019'),
+    ("SELECT * FROM db.2019 t JOIN 2019 u ON 1=1", 'SELECT * FROM db."2019" t JOIN "2019" u ON 1=1'),
+    ("SELECT '2019' FROM \"2019\"", "SELECT '2019' FROM \"2019\""),
+    ("SELECT * FROM lookup WHERE x IS DISTINCT FROM 2019", "SELECT * FROM lookup WHERE x IS DISTINCT FROM 2019"),
+])
+def test_quote_table_names(sql, expected):
+    assert quote_table_names(sql, ["2019", "lookup"]) == expected
+
+@pytest.mark.parametrize("sql, expected", [
+    ('SELECT * FROM "2019"', 'SELECT * FROM "2019"\nLIMIT 1000'),
+    ("SELECT * FROM t;", "SELECT * FROM t\nLIMIT 1000;"),
+    ("SELECT * FROM t LIMIT 5000", "SELECT * FROM t LIMIT 1000"),
+    ("SELECT * FROM t LIMIT ALL", "SELECT * FROM t LIMIT 1000"),
+    ("SELECT * FROM t LIMIT 10", "SELECT * FROM t LIMIT 10"),
+    ("SELECT * FROM t FETCH FIRST 10 ROWS ONLY", "SELECT * FROM t FETCH FIRST 10 ROWS ONLY"),
+    ("SELECT * FROM (SELECT * FROM t LIMIT 5) s", "SELECT * FROM (SELECT * FROM t LIMIT 5) s\nLIMIT 1000"),
+    ("SELECT x, sum(y) OVER (PARTITION BY x) FROM t", "SELECT x, sum(y) OVER (PARTITION BY x) FROM t\nLIMIT 1000"),
+    # aggregates and single-row statements are never capped
+    ('SELECT count(*) FROM "2019"', 'SELECT count(*) FROM "2019"'),
+    ("SELECT payment_type, avg(fare) FROM t GROUP BY 1", "SELECT payment_type, avg(fare) FROM t GROUP BY 1"),
+    ("SELECT count(*) FILTER (WHERE x > 1) FROM t", "SELECT count(*) FILTER (WHERE x > 1) FROM t"),
+    ("SELECT 1", "SELECT 1"),
+    ("SHOW TABLES", "SHOW TABLES"),
+])
+def test_ensure_limit(sql, expected):
+    assert ensure_limit(sql, 1000) == expected
+
+def test_fingerprint_ignores_layout():
+    assert normalize_sql("select  A from t -- x\n;") == "select a from t"
+    assert fingerprint("SELECT a FROM t WHERE b = 1") == fingerprint("select a\nfrom t where b = 1;")
+    assert fingerprint("SELECT a FROM t WHERE b = 1", literals=False) == fingerprint("SELECT a FROM t WHERE b = 2",
+                                                                                   literals=False)
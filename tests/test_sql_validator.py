@@ -0,0 +1,61 @@
+import pytest
+
+from agent_cli.repair import check_and_execute
+from agent_cli.sql_validator import validate_sql
+
+TABLES = [
+    {"table": "2019", "columns": ["vendorid", "tpep_pickup_datetime", "payment_type", "fare_amount", "tip_amount"],
+     "partitions": []},
+    {"table": "lookup", "columns": ["locationid", "borough", "zone"], "partitions": []},
+]
+
+def codes(sql):
+    return [e.code for e in validate_sql(sql, TABLES).errors]
+
+@pytest.mark.parametrize("sql", [
+    'SELECT payment_type, count(*) AS trips FROM "2019" GROUP BY 1 ORDER BY 2 DESC',
+    'SELECT t.fare_amount, z.zone FROM "2019" t JOIN lookup z ON t.vendorid = z.locationid',
+    'WITH x AS (SELECT fare_amount AS f FROM "2019") SELECT f FROM x',
+    'SELECT extract(year FROM tpep_pickup_datetime) FROM "2019"',
+    'SELECT first_value(fare_amount) OVER (ORDER BY tip_amount), last_value(fare_amount) OVER (ORDER BY tip_amount) '
+    'FROM "2019"',
+    'SELECT any_value(fare_amount), none_match(ARRAY[fare_amount], v -> v < 0) FROM "2019"',
+    "SELECT at_timezone(current_timestamp, 'UTC')",
+    'SELECT count(*) FROM "2019" WHERE payment_type IS DISTINCT FROM 1',
+    'SELECT count(*) FROM "2019" WHERE payment_type IS NOT DISTINCT FROM 1',
+    'SELECT sum(fare_amount) OVER w FROM "2019" WINDOW w AS (PARTITION BY payment_type ORDER BY tip_amount)',
+    'SELECT rank() OVER (w ORDER BY fare_amount) FROM "2019" '
+    'WINDOW w AS (PARTITION BY payment_type), v AS (PARTITION BY vendorid)',
+    'SELECT fare_amount "Fare", count(*) "Trips" FROM "2019" GROUP BY 1 ORDER BY "Fare", "Trips"',
+])
+def test_valid_trino_is_accepted(sql):
+    result = validate_sql(sql, TABLES)
+    assert result.ok, result.feedback()
+    assert not result.warnings
+
+@pytest.mark.parametrize("sql, code", [
+    ('SELECT fare FROM "2019"', "COLUMN_NOT_FOUND"),
+    ('SELECT "Fare" FROM "2019"', "COLUMN_NOT_FOUND"),
+    ('SELECT t.borough FROM "2019" t', "COLUMN_NOT_FOUND"),
+    ('SELECT * FROM trips', "TABLE_NOT_FOUND"),
+    ('SELECT * FROM 2019', "SYNTAX_ERROR"),
+    ('SELECT count(* FROM "2019"', "SYNTAX_ERROR"),
+    ("SELECT 'open FROM lookup", "SYNTAX_ERROR"),
+    ('SELECT 1; SELECT 2', "SYNTAX_ERROR"),
+])
+def test_errors(sql, code):
+    assert code in codes(sql)
+
+def test_distinct_from_still_checks_relations():
+    assert codes('SELECT * FROM trips WHERE vendorid IS DISTINCT FROM 1') == ["TABLE_NOT_FOUND"]
+
+def test_unknown_function_is_a_warning():
+    result = validate_sql('SELECT avrg(fare_amount) FROM "2019"', TABLES)
+    assert result.ok
+    assert [(w.code, w.suggestion) for w in result.warnings] == [("FUNCTION_NOT_FOUND", "avg")]
+
+def test_unknown_function_is_executed():
+    executed = []
+    sql, result, errors = check_and_execute('SELECT brand_new_fn(fare_amount) FROM "2019"', TABLES,
+                                            lambda s: executed.append(s) or {"rows": []})
+    assert executed == [sql] and result == {"rows": []} and errors == []
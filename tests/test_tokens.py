@@ -0,0 +1,54 @@
+import pytest
+
+from agent_cli.tokens import Section, estimate_tokens, fit_sections
+
+def words(n, tag):
+    return " ".join(f"{tag}{i:03d}" for i in range(n))
+
+def sections():
+    return [
+        Section("system", words(5, "sys"), priority=0, suffix="\n", required=True),
+        Section("schema", "\n".join(words(3, f"t{i}c") for i in range(4)), priority=1, prefix="Schema:\n",
+                suffix="\n", split="\n", required=True),
+        Section("examples", "\n\n".join(words(3, f"ex{i}") for i in range(3)), priority=2, prefix="Examples:\n",
+                suffix="\n", split="\n\n"),
+        Section("history", words(5, "his"), priority=3, suffix="\n"),
+        Section("question", words(2, "qqq"), priority=0, required=True),
+    ]
+
+def full_tokens():
+    return estimate_tokens("".join(s.render() for s in sections()))
+
+def test_within_budget_keeps_everything():
+    built = fit_sections(sections(), budget=full_tokens())
+    assert built.text == "".join(s.render() for s in sections())
+    assert built.total_tokens == estimate_tokens(built.text) and not built.dropped and not built.trimmed
+
+# Costs: system 10, schema 3 + 4 units x 12, examples 3 + 3 units x 9, history 10, question 4 tokens.
+@pytest.mark.parametrize("cut, dropped, trimmed", [
+    (1, ["history"], {}),                              # unsplit, lowest priority: dropped whole
+    (11, ["history"], {"examples": 1}),                # then examples lose units from the end
+    (25, ["history"], {"examples": 2}),
+    (35, ["history", "examples"], {}),                 # ... and go once one unit is still too much
+    (45, ["history", "examples"], {"schema": 1}),      # required: trimmed, never dropped
+    (10_000, ["history", "examples"], {"schema": 3}),  # down to its first unit, then over budget
+])
+def test_priority_and_truncation_order(cut, dropped, trimmed):
+    budget = full_tokens() - cut
+    built = fit_sections(sections(), budget)
+    assert built.dropped == dropped and built.trimmed == trimmed
+    assert built.total_tokens == estimate_tokens(built.text)
+    assert built.over_budget == (built.total_tokens > budget)
+    for name in ("system", "question"):
+        assert built.tokens[name] > 0
+
+def test_trimmed_units_come_off_the_end():
+    built = fit_sections(sections(), full_tokens() - 11)
+    assert "ex000" in built.text and "ex100" in built.text and "ex200" not in built.text
+    assert "his000" not in built.text
+
+def test_minimum_prompt_when_nothing_fits():
+    built = fit_sections(sections(), budget=0)
+    assert built.over_budget
+    assert "t0c000" in built.text and "t1c000" not in built.text
+    assert "sys000" in built.text and built.text.endswith(words(2, "qqq"))
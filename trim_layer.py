@@ -0,0 +1,134 @@
+"""Trim a pip --target layer tree to the AWS services this repo uses, precompile it, verify it.
+
+    python trim_layer.py layer/python                     # services found in the source + sts
+    python trim_layer.py layer/python --service sqs       # keep extra services
+    python trim_layer.py layer/python --import fastapi --import mangum
+
+Steps:
+  1. keep botocore/data/<service> (and boto3/data/<service> resources) only for
+     the services constructed anywhere in agent_cli/, query_api/, setup/, ui/
+     (`client("glue")`, `boto3.client("bedrock-runtime", ...)`), plus sts for
+     assume-role/web-identity credentials; drop examples-1.json (docs only)
+     and boto3's rst examples
+  2. precompile everything with unchecked-hash .pyc: /opt is read-only on Lambda,
+     so without bytecode every cold start compiles boto3/botocore from source, and
+     zip mtimes can't invalidate hash-based pycs
+  3. in a fresh interpreter that sees only the layer, construct a client for
+     every kept service (and import any --import modules); exits non-zero on failure
+
+Run it with the same Python as the Lambda runtime (build_layer.sh runs it in the
+runtime image) so the bytecode tag matches.
+"""
+import argparse
+import compileall
+import os
+import py_compile
+import re
+import shutil
+import subprocess
+import sys
+from typing import Dict, Iterable, List, Set
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIRS = ("agent_cli", "query_api", "setup", "ui")
+ALWAYS_KEEP = {"sts"}  # credential providers build STS clients internally
+_CLIENT = re.compile(r"""\bclient\(\s*["']([a-z0-9-]+)["']""")
+
+def referenced_services(dirs: Iterable[str] = SOURCE_DIRS) -> Set[str]:
+    """AWS service names passed to client(...) anywhere in the repo's own code."""
+    found: Set[str] = set()
+    for d in dirs:
+        for base, _, files in os.walk(os.path.join(ROOT, d)):
+            for f in files:
+                if f.endswith(".py"):
+                    with open(os.path.join(base, f), encoding="utf-8") as fh:
+                        found.update(_CLIENT.findall(fh.read()))
+    return found
+
+def _size(path: str) -> int:
+    total = 0
+    for base, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(base, f)) for f in files)
+    return total
+
+def trim(site_dir: str, services: Set[str]) -> Dict[str, int]:
+    """Remove unused service models and doc-only data in place; returns {"removed_bytes", "removed_services"}."""
+    before = _size(site_dir)
+    removed = 0
+    data = os.path.join(site_dir, "botocore", "data")
+    for name in os.listdir(data):
+        path = os.path.join(data, name)
+        if not os.path.isdir(path):
+            continue  # endpoints.json, partitions.json, _retry.json, sdk-default-configuration.json
+        if name not in services:
+            shutil.rmtree(path)
+            removed += 1
+            continue
+        for base, _, files in os.walk(path):
+            for f in files:
+                if f.startswith("examples-"):
+                    os.remove(os.path.join(base, f))
+    resources = os.path.join(site_dir, "boto3", "data")
+    if os.path.isdir(resources):
+        for name in os.listdir(resources):
+            if name not in services:
+                shutil.rmtree(os.path.join(resources, name))
+    shutil.rmtree(os.path.join(site_dir, "boto3", "examples"), ignore_errors=True)
+    return {"removed_bytes": before - _size(site_dir), "removed_services": removed}
+
+def precompile(site_dir: str) -> bool:
+    """Replace whatever bytecode pip wrote with unchecked-hash pycs for the running interpreter."""
+    for base, dirs, _ in os.walk(site_dir):
+        if "__pycache__" in dirs:
+            shutil.rmtree(os.path.join(base, "__pycache__"))
+            dirs.remove("__pycache__")
+    return compileall.compile_dir(site_dir, quiet=1, workers=0,
+                                  invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+
+_VERIFY = """
+import sys
+sys.path.insert(0, {site!r})
+import boto3
+from botocore.exceptions import DataNotFoundError
+for m in {imports!r}:
+    __import__(m)
+session = boto3.Session(region_name="us-east-1", aws_access_key_id="x", aws_secret_access_key="x")
+loader = session._session.get_component("data_loader")
+for s in {services!r}:
+    c = session.client(s)  # service model, endpoint rules, partitions, retry config
+    assert c.meta.service_model.operation_names, s
+    try:
+        loader.load_service_model(s, "paginators-1")
+    except DataNotFoundError:
+        pass
+    if s == "s3":
+        session.resource("s3")
+"""
+
+def verify(site_dir: str, services: Iterable[str], imports: Iterable[str] = ()) -> None:
+    """Construct every kept client from the layer alone (-S: no other site-packages); raises on failure."""
+    code = _VERIFY.format(site=os.path.abspath(site_dir), services=sorted(services), imports=list(imports))
+    proc = subprocess.run([sys.executable, "-S", "-c", code], capture_output=True, text=True,
+                          env=dict(os.environ, AWS_EC2_METADATA_DISABLED="true"))
+    if proc.returncode != 0:
+        raise RuntimeError(f"layer verification failed:\n{proc.stderr[-3000:]}")
+
+def main(argv: List[str] | None = None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("site_dir", help="the layer's python/ directory")
+    ap.add_argument("--service", action="append", default=[], help="extra service to keep (repeatable)")
+    ap.add_argument("--import", dest="imports", action="append", default=[], help="module that must import from the layer")
+    ap.add_argument("--no-compile", action="store_true")
+    args = ap.parse_args(argv)
+
+    services = referenced_services() | ALWAYS_KEEP | set(args.service)
+    before = _size(args.site_dir)
+    stats = trim(args.site_dir, services)
+    if not args.no_compile and not precompile(args.site_dir):
+        sys.exit("compileall reported errors")
+    verify(args.site_dir, services, args.imports)
+    print(f"kept {', '.join(sorted(services))}; removed {stats['removed_services']} service models, "
+          f"{before / 1e6:.1f} MB -> {_size(args.site_dir) / 1e6:.1f} MB (with bytecode)")
+
+if __name__ == "__main__":
+    main()
@@ -55,6 +55,11 @@ if execute_mode == "Direct SQL":
             if result:
                 st.success(f"✅ {result['row_count']} rows | {result['bytes_scanned']} bytes | {result['engine_ms']} ms")
                 st.dataframe(result["rows"])
+                if result.get("truncated"):
+                    loc = result.get("result_location")
+                    link = (f"[Download the full result ({loc['format']})]({loc['url']}) — link expires in "
+                            f"{loc['expires_in']} s." if loc else "No link to the full result is available.")
+                    st.info(f"Showing the first {len(result['rows'])} rows. {link}")
 else:
     st.subheader("💬 Ask a question")
     question = st.text_input("Natural language question", placeholder="e.g., Count trips per payment type")